@@ -0,0 +1,33 @@
+"""add message history index
+
+Revision ID: 8f2c1a7d4e90
+Revises: d5d6a4f8810e
+Create Date: 2026-10-18 10:12:41.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2c1a7d4e90'
+down_revision: Union[str, Sequence[str], None] = 'd5d6a4f8810e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_message_conversation_id_created_at',
+        'message',
+        ['conversation_id', 'created_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_message_conversation_id_created_at', table_name='message')
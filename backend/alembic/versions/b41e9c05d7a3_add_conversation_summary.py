@@ -0,0 +1,30 @@
+"""add conversation summary
+
+Revision ID: b41e9c05d7a3
+Revises: 8f2c1a7d4e90
+Create Date: 2026-10-18 11:02:17.284406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41e9c05d7a3'
+down_revision: Union[str, Sequence[str], None] = '8f2c1a7d4e90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('conversation', sa.Column('summary', sa.Text(), nullable=True))
+    op.add_column('conversation', sa.Column('summarized_until', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('conversation', 'summarized_until')
+    op.drop_column('conversation', 'summary')
@@ -0,0 +1,34 @@
+"""add conversation user index
+
+Revision ID: c7d3f2a91b58
+Revises: b41e9c05d7a3
+Create Date: 2026-10-18 12:20:05.917342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d3f2a91b58'
+down_revision: Union[str, Sequence[str], None] = 'b41e9c05d7a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # message (conversation_id, created_at) already exists (8f2c1a7d4e90)
+    op.create_index(
+        'ix_conversation_user_id_created_at',
+        'conversation',
+        ['user_id', 'created_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_conversation_user_id_created_at', table_name='conversation')
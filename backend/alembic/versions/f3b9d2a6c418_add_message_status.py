@@ -0,0 +1,28 @@
+"""add message status
+
+Revision ID: f3b9d2a6c418
+Revises: e2a8c4f61d07
+Create Date: 2026-10-18 17:26:41.902733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b9d2a6c418'
+down_revision: Union[str, Sequence[str], None] = 'e2a8c4f61d07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('message', sa.Column('status', sa.String(), server_default='complete', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('message', 'status')
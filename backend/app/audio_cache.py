@@ -0,0 +1,226 @@
+# backend/app/audio_cache.py
+"""
+Content-addressed cache for synthesized TTS audio.
+
+Entries are keyed by sha256(normalized text, voice_id, model_id, output_format)
+and stored as files under TTS_CACHE_DIR, evicted least-recently-used once the
+entries a process knows about (found at startup plus those it wrote) exceed
+TTS_CACHE_MAX_BYTES. The budget is per process: workers sharing the directory
+don't see each other's writes, so together they can exceed it, and a file
+another worker evicted is simply treated as a miss. Hits are read through mmap
+and can be served with HTTP Range. Misses are tee'd: the upstream audio is streamed to
+the client and written to a temp file that is atomically published when the
+stream completes.
+
+TTS_CACHE_SHARED_DIR optionally points at a directory shared by every
+instance (EFS/NFS mount); local misses are looked up there before calling
+ElevenLabs, and new entries are published to it too.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import shutil
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import BinaryIO, Iterable, Iterator
+
+TTS_CACHE_DIR        = os.getenv("TTS_CACHE_DIR", "/tmp/tts-cache")
+TTS_CACHE_MAX_BYTES  = int(os.getenv("TTS_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+TTS_CACHE_SHARED_DIR = os.getenv("TTS_CACHE_SHARED_DIR", "")
+CHUNK_SIZE = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(text: str, voice_id: str, model_id: str, output_format: str) -> str:
+    payload = json.dumps(
+        [normalize_text(text), voice_id, model_id, output_format],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Single `bytes=a-b` range → inclusive (start, end); None for the full body."""
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        raise ValueError("unsupported range")
+    first, last = match.groups()
+    if first == "":
+        # suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+class _SharedStore:
+    """Directory shared between instances; a plain file copy per entry."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def fetch(self, key: str, dest: str) -> bool:
+        src = self.path(key)
+        if not os.path.exists(src):
+            return False
+        tmp = f"{dest}.{os.getpid()}.part"
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+        return True
+
+    def publish(self, key: str, src: str) -> None:
+        dest = self.path(key)
+        if os.path.exists(dest):
+            return
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp = f"{dest}.{os.getpid()}.part"
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+
+
+class AudioCache:
+    def __init__(self, root: str, max_bytes: int, shared: _SharedStore | None = None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key → size, LRU order
+        self._bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._scan()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def _scan(self) -> None:
+        """Rebuild the LRU index from disk, oldest access first."""
+        entries = []
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith(".part"):
+                    continue
+                st = os.stat(os.path.join(dirpath, name))
+                entries.append((st.st_atime, name, st.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._bytes += size
+
+    def _register(self, key: str, size: int) -> None:
+        with self._lock:
+            if key in self._index:
+                self._bytes -= self._index.pop(key)
+            self._index[key] = size
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._index) > 1:
+                old_key, old_size = self._index.popitem(last=False)
+                self._bytes -= old_size
+                try:
+                    os.remove(self._path(old_key))
+                except FileNotFoundError:
+                    pass
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            size = self._index.pop(key, None)
+            if size is not None:
+                self._bytes -= size
+
+    def _open(self, key: str) -> tuple[BinaryIO, int] | None:
+        try:
+            f = open(self._path(key), "rb")
+        except FileNotFoundError:
+            # evicted by another worker or cleaned up behind our back
+            self._forget(key)
+            return None
+        return f, os.fstat(f.fileno()).st_size
+
+    def lookup(self, key: str) -> tuple[BinaryIO, int] | None:
+        """
+        Open a cached entry (local, else pulled from the shared store) and
+        return (file, size); the caller hands the file to read(), which closes it.
+        Blocking file I/O: call it from the threadpool.
+        """
+        with self._lock:
+            known = key in self._index
+            if known:
+                self._index.move_to_end(key)
+        if known:
+            entry = self._open(key)
+            if entry is not None:
+                return entry
+        if self.shared is None:
+            return None
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            if not self.shared.fetch(key, path):
+                return None
+        except OSError:
+            logger.exception("shared TTS cache read failed for %s", key)
+            return None
+        entry = self._open(key)
+        if entry is not None:
+            self._register(key, entry[1])
+        return entry
+
+    def read(self, f: BinaryIO, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+        """Yield [start, end] (inclusive) of a file from lookup() through mmap, then close it."""
+        with f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            stop = len(mm) if end is None else end + 1
+            for offset in range(start, stop, CHUNK_SIZE):
+                yield bytes(mm[offset:min(offset + CHUNK_SIZE, stop)])
+
+    def tee(self, key: str, upstream: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Pass upstream chunks through while writing them to the cache. This is a
+        sync generator, so StreamingResponse iterates it (and the shared-store
+        publish at the end) in the threadpool.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        complete = False
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in upstream:
+                    out.write(chunk)
+                    yield chunk
+            complete = True
+        finally:
+            if complete and os.path.getsize(tmp) > 0:
+                os.replace(tmp, path)
+                self._register(key, os.path.getsize(path))
+                if self.shared is not None:
+                    try:
+                        self.shared.publish(key, path)
+                    except OSError:
+                        logger.exception("shared TTS cache write failed for %s", key)
+            else:
+                os.remove(tmp)
+
+
+audio_cache = AudioCache(
+    TTS_CACHE_DIR,
+    TTS_CACHE_MAX_BYTES,
+    shared=_SharedStore(TTS_CACHE_SHARED_DIR) if TTS_CACHE_SHARED_DIR else None,
+)
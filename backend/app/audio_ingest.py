@@ -0,0 +1,210 @@
+# backend/app/audio_ingest.py
+"""
+Streaming audio ingest for speech-to-text.
+
+Uploads are parsed from the request body as it arrives (no UploadFile
+spooling) and piped straight into ffmpeg, which decodes
+whatever the browser recorded (WebM/Opus, OGG, MP3, WAV...) and downsamples it
+to 16 kHz mono signed 16-bit PCM, the rate Whisper works at internally. Size
+and duration caps are enforced while the data flows, so an oversized
+recording is rejected without ever being fully buffered. The number of
+concurrent ffmpeg processes is bounded per worker.
+"""
+import asyncio
+import io
+import os
+from typing import AsyncIterator
+
+import soundfile
+from fastapi import HTTPException, Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+
+SAMPLE_RATE = 16000
+BYTES_PER_SECOND = SAMPLE_RATE * 2  # mono s16le
+
+STT_MAX_UPLOAD_BYTES = int(os.getenv("STT_MAX_UPLOAD_BYTES", 10 * 1024 * 1024))
+STT_MAX_SECONDS      = float(os.getenv("STT_MAX_SECONDS", 120))
+STT_TRANSCODE_CONCURRENCY = int(os.getenv("STT_TRANSCODE_CONCURRENCY", os.cpu_count() or 2))
+CHUNK_SIZE = 64 * 1024
+
+_transcode_slots = asyncio.Semaphore(STT_TRANSCODE_CONCURRENCY)
+
+FFMPEG_ARGS = [
+    "ffmpeg", "-hide_banner", "-loglevel", "error",
+    "-i", "pipe:0",
+    "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE),
+    "-f", "s16le", "pipe:1",
+]
+
+
+# room for the multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD = 16 * 1024
+
+
+def multipart_file_chunks(
+    request: Request,
+    field: str,
+    content_types: set[str],
+) -> AsyncIterator[bytes]:
+    """
+    The `field` file of a multipart/form-data request, streamed straight from
+    the socket. Unlike UploadFile, nothing is spooled before the handler runs:
+    the headers are checked right away (a Content-Length over the cap is a 413
+    before any body is read), and the body is counted as it arrives.
+    Raises 400 for a missing/unsupported part and 413 for an oversized body.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(400, "Expected multipart/form-data")
+    limit = STT_MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise HTTPException(413, "Audio upload too large")
+    return _multipart_file_chunks(request, boundary, field, content_types, limit)
+
+
+async def _multipart_file_chunks(
+    request: Request,
+    boundary: bytes,
+    field: str,
+    content_types: set[str],
+    limit: int,
+) -> AsyncIterator[bytes]:
+    pending: list[bytes] = []
+    part: dict = {"headers": {}, "name": b"", "value": b""}
+    state = {"in_file": False, "seen_file": False, "done_file": False}
+
+    def on_part_begin():
+        part["headers"] = {}
+
+    def on_header_field(data, start, end):
+        part["name"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        part["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][part["name"].lower()] = part["value"]
+        part["name"], part["value"] = b"", b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        if disposition.get(b"name") == field.encode() and not state["seen_file"]:
+            mime, _ = parse_options_header(part["headers"].get(b"content-type", b""))
+            if mime.decode() not in content_types:
+                raise HTTPException(400, "Unsupported audio format")
+            state["in_file"] = state["seen_file"] = True
+
+    def on_part_data(data, start, end):
+        if state["in_file"]:
+            pending.append(bytes(data[start:end]))
+
+    def on_part_end():
+        if state["in_file"]:
+            state["in_file"], state["done_file"] = False, True
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    received = 0
+    async for body in request.stream():
+        received += len(body)
+        if received > limit:
+            raise HTTPException(413, "Audio upload too large")
+        parser.write(body)
+        for chunk in pending:
+            yield chunk
+        pending.clear()
+        if state["done_file"]:
+            return  # the rest of the form isn't needed
+    parser.finalize()
+    if not state["seen_file"]:
+        raise HTTPException(400, f"Missing '{field}' file")
+
+
+async def bytes_chunks(data: bytes) -> AsyncIterator[bytes]:
+    for offset in range(0, len(data), CHUNK_SIZE):
+        yield data[offset:offset + CHUNK_SIZE]
+
+
+async def to_pcm16k(chunks: AsyncIterator[bytes]) -> bytes:
+    """
+    Decode + resample an encoded audio stream to 16 kHz mono s16le PCM.
+    Raises 413 past the size/duration caps and 400 if ffmpeg can't decode it.
+    """
+    max_pcm = int(STT_MAX_SECONDS * BYTES_PER_SECOND)
+    async with _transcode_slots:
+        proc = await asyncio.create_subprocess_exec(
+            *FFMPEG_ARGS,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+        async def feed() -> None:
+            received = 0
+            try:
+                async for chunk in chunks:
+                    received += len(chunk)
+                    if received > STT_MAX_UPLOAD_BYTES:
+                        raise HTTPException(413, "Audio upload too large")
+                    proc.stdin.write(chunk)
+                    await proc.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # ffmpeg stopped reading; its exit status tells us why
+            finally:
+                if not proc.stdin.is_closing():
+                    proc.stdin.close()
+
+        async def drain_pcm() -> bytes:
+            pcm = bytearray()
+            while chunk := await proc.stdout.read(CHUNK_SIZE):
+                pcm += chunk
+                if len(pcm) > max_pcm:
+                    raise HTTPException(413, f"Audio longer than {STT_MAX_SECONDS:g} seconds")
+            return bytes(pcm)
+
+        feeder = asyncio.create_task(feed())
+        reader = asyncio.create_task(drain_pcm())
+        try:
+            # whichever side trips a cap first aborts the whole transcode
+            await asyncio.wait({feeder, reader}, return_when=asyncio.FIRST_EXCEPTION)
+            for task in (feeder, reader):
+                if task.done() and task.exception():
+                    raise task.exception()
+            pcm = await reader
+            await feeder
+            stderr = await proc.stderr.read()
+            if await proc.wait() != 0:
+                raise HTTPException(400, f"Could not decode audio: {stderr.decode(errors='replace')[:200]}")
+            return pcm
+        finally:
+            for task in (feeder, reader):
+                task.cancel()
+            await asyncio.gather(feeder, reader, return_exceptions=True)
+            if proc.returncode is None:
+                proc.kill()
+                # drain what's left in the pipes so the exit can be reaped
+                await proc.communicate()
+
+
+def _pcm_to_flac(pcm: bytes) -> bytes:
+    buf = io.BytesIO()
+    with soundfile.SoundFile(
+        buf, mode="w", samplerate=SAMPLE_RATE, channels=1, format="FLAC", subtype="PCM_16"
+    ) as out:
+        out.buffer_write(pcm, dtype="int16")
+    return buf.getvalue()
+
+
+async def pcm_to_flac(pcm: bytes) -> bytes:
+    """Losslessly compress normalized PCM for upload (roughly half the size)."""
+    return await run_in_threadpool(_pcm_to_flac, pcm)
@@ -1,12 +1,44 @@
-# backend/app/db.py
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from typing import AsyncGenerator
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import DeclarativeBase
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_async_engine(DATABASE_URL, echo=True)
-AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+# ---- pool tuning (per worker process) ----
+DB_POOL_SIZE            = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW         = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT         = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE         = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING        = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 500))  # 0 behind pgbouncer
+DB_ECHO                 = os.getenv("DB_ECHO", "false").lower() == "true"
+
+
+def _connect_args(url: str) -> dict:
+    if make_url(url).get_driver_name() == "asyncpg":
+        return {"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+    return {}
+
+
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=DB_ECHO,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args=_connect_args(DATABASE_URL),
+)
+AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    """The one request-scoped session dependency used by every router."""
+    async with AsyncSessionLocal() as session:
+        yield session
 
 
 class Base(DeclarativeBase):
@@ -0,0 +1,171 @@
+# backend/app/history.py
+"""
+Token-budgeted conversation history for the tutor prompt.
+
+Only the last HISTORY_MAX_MESSAGES rows are fetched (served by the
+(conversation_id, created_at) index), trimmed from the oldest end to
+HISTORY_TOKEN_BUDGET tokens, and cached per conversation so the next turn
+just appends the new user/assistant pair instead of re-querying.
+"""
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from .models import Message
+
+HISTORY_MAX_MESSAGES = int(os.getenv("HISTORY_MAX_MESSAGES", 20))
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", 2000))
+HISTORY_CACHE_SIZE   = int(os.getenv("HISTORY_CACHE_SIZE", 1000))
+HISTORY_CACHE_TTL    = float(os.getenv("HISTORY_CACHE_TTL", 300))
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to a character estimate
+    tiktoken = None
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+async def load_tokenizer() -> None:
+    """
+    Load the encoding at startup, off the event loop: the first get_encoding()
+    may download it, which would otherwise block whichever turn counts first.
+    """
+    await run_in_threadpool(_encoding)
+
+
+def count_tokens(text: str) -> int:
+    enc = _encoding()
+    if enc is None:
+        return len(text) // 4 + 1
+    return len(enc.encode_ordinary(text))
+
+
+def _role(sender: str) -> str:
+    return "user" if sender == "user" else "assistant"
+
+
+class HistoryWindow:
+    __slots__ = ("entries", "tokens", "loaded_at")
+
+    def __init__(self):
+        self.entries: list[tuple[str, str, int]] = []  # (role, content, tokens)
+        self.tokens = 0
+        self.loaded_at = time.monotonic()
+
+    def append(self, role: str, content: str) -> None:
+        n = count_tokens(content)
+        self.entries.append((role, content, n))
+        self.tokens += n
+        self._trim()
+
+    def _trim(self) -> None:
+        while self.entries and (
+            len(self.entries) > HISTORY_MAX_MESSAGES or self.tokens > HISTORY_TOKEN_BUDGET
+        ):
+            _, _, n = self.entries.pop(0)
+            self.tokens -= n
+
+    def copy(self) -> "HistoryWindow":
+        clone = HistoryWindow()
+        clone.entries = list(self.entries)
+        clone.tokens = self.tokens
+        return clone
+
+    def as_messages(self) -> list[dict]:
+        return [{"role": role, "content": content} for role, content, _ in self.entries]
+
+
+_cache: "OrderedDict[UUID, HistoryWindow]" = OrderedDict()
+
+
+def _get_cached(conversation_id: UUID) -> HistoryWindow | None:
+    window = _cache.get(conversation_id)
+    if window is None:
+        return None
+    if time.monotonic() - window.loaded_at > HISTORY_CACHE_TTL:
+        # another worker may have written to this conversation meanwhile
+        del _cache[conversation_id]
+        return None
+    _cache.move_to_end(conversation_id)
+    return window
+
+
+def _put(conversation_id: UUID, window: HistoryWindow) -> None:
+    _cache[conversation_id] = window
+    _cache.move_to_end(conversation_id)
+    while len(_cache) > HISTORY_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+async def load_window(
+    db: AsyncSession,
+    conversation_id: UUID,
+    since: datetime | None = None,
+    exclude: UUID | None = None,
+) -> HistoryWindow:
+    """
+    History window for a conversation, from the cache or loaded on a miss.
+    Messages at or before `since` (already folded into the conversation
+    summary) are skipped. Call this before persisting the current user message,
+    or pass that message's id as `exclude`. Returns a copy, so concurrent turns
+    in one conversation can't change each other's prompt; the cached window is
+    only extended through append_turn().
+    """
+    window = _get_cached(conversation_id)
+    if window is None:
+        stmt = (
+            select(Message.sender, Message.content)
+            .where(Message.conversation_id == conversation_id)
+            .where(Message.status != "streaming")  # replies still being generated
+            .order_by(Message.created_at.desc())
+            .limit(HISTORY_MAX_MESSAGES)
+        )
+        if since is not None:
+            stmt = stmt.where(Message.created_at > since)
+        if exclude is not None:
+            stmt = stmt.where(Message.id != exclude)
+        rows = (await db.execute(stmt)).all()
+        window = HistoryWindow()
+        for sender, content in reversed(rows):
+            window.append(_role(sender), content)
+        _put(conversation_id, window)
+    return window.copy()
+
+
+def start_history(conversation_id: UUID) -> None:
+    """Seed an empty window for a conversation created on this turn."""
+    _put(conversation_id, HistoryWindow())
+
+
+def append_turn(conversation_id: UUID, user_text: str, assistant_text: str) -> None:
+    """Extend a cached window with the turn that was just persisted."""
+    window = _cache.get(conversation_id)
+    if window is None:
+        return
+    window.append("user", user_text)
+    window.append("assistant", assistant_text)
+
+
+def has_history(conversation_id: UUID) -> bool:
+    """Whether a fresh window is cached; a miss means summary and window may have moved on."""
+    return _get_cached(conversation_id) is not None
+
+
+def forget_history(conversation_id: UUID) -> None:
+    _cache.pop(conversation_id, None)
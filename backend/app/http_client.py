@@ -0,0 +1,80 @@
+# backend/app/http_client.py
+"""
+Shared HTTP client for Google upstreams (Translate, language list, reCAPTCHA).
+
+One pooled httpx.AsyncClient per worker process instead of a new client per
+call: keep-alive connections, HTTP/2 when the `h2` package is installed and a
+bounded pool, so googleapis.com is dialled once rather than on every request.
+Call sites pass their own per-upstream timeout built with google_timeout(),
+which keeps the shared connect/pool timeouts (a bare float would replace the
+whole httpx.Timeout). Closed from the app lifespan.
+"""
+import os
+
+import httpx
+
+from .llm import HTTP2_ENABLED
+from .upstreams import GOOGLE, TrackedTransport
+
+GOOGLE_POOL_SIZE        = int(os.getenv("GOOGLE_POOL_SIZE", 50))
+GOOGLE_KEEPALIVE_SIZE   = int(os.getenv("GOOGLE_KEEPALIVE_SIZE", 20))
+GOOGLE_KEEPALIVE_EXPIRY = float(os.getenv("GOOGLE_KEEPALIVE_EXPIRY", 60))
+GOOGLE_CONNECT_TIMEOUT  = float(os.getenv("GOOGLE_CONNECT_TIMEOUT", 3))
+GOOGLE_POOL_TIMEOUT     = float(os.getenv("GOOGLE_POOL_TIMEOUT", 5))
+GOOGLE_TIMEOUT          = float(os.getenv("GOOGLE_TIMEOUT", 10))
+
+
+google_client = httpx.AsyncClient(
+    transport=TrackedTransport(
+        GOOGLE,
+        http2=HTTP2_ENABLED,
+        limits=httpx.Limits(
+            max_connections=GOOGLE_POOL_SIZE,
+            max_keepalive_connections=GOOGLE_KEEPALIVE_SIZE,
+            keepalive_expiry=GOOGLE_KEEPALIVE_EXPIRY,
+        ),
+    ),
+    timeout=httpx.Timeout(GOOGLE_TIMEOUT, connect=GOOGLE_CONNECT_TIMEOUT, pool=GOOGLE_POOL_TIMEOUT),
+)
+
+
+def google_timeout(seconds: float) -> httpx.Timeout:
+    """Per-call read/write timeout with the client's connect and pool timeouts."""
+    return httpx.Timeout(seconds, connect=GOOGLE_CONNECT_TIMEOUT, pool=GOOGLE_POOL_TIMEOUT)
+
+
+def get_http() -> httpx.AsyncClient:
+    """FastAPI dependency: the shared Google HTTP client."""
+    return google_client
+
+
+async def close_http() -> None:
+    await google_client.aclose()
+
+
+def pool_stats(client: httpx.AsyncClient | None) -> dict:
+    """
+    Connection counts of a client's pool. Best effort: this reads private
+    httpx/httpcore state, so any change there yields an "unavailable" entry
+    instead of failing the health check.
+    """
+    try:
+        return _pool_stats(client)
+    except Exception as e:
+        return {"unavailable": f"{e.__class__.__name__}: {e}"}
+
+
+def _pool_stats(client: httpx.AsyncClient | None) -> dict:
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    if pool is None:
+        return {}
+    connections = list(pool.connections)
+    idle = sum(1 for c in connections if c.is_idle())
+    return {
+        "connections": len(connections),
+        "active": len(connections) - idle,
+        "idle": idle,
+        "http2": sum(1 for c in connections if "HTTP/2" in c.info()),
+        "queued": sum(1 for r in getattr(pool, "_requests", ()) if r.is_queued()),
+        "max_connections": getattr(pool, "_max_connections", None),
+    }
@@ -0,0 +1,119 @@
+# backend/app/language_catalog.py
+"""
+Google Translate language list, cached per display locale (`target`).
+
+LANGUAGES_WARM_TARGETS are fetched at startup and every cached locale is
+refreshed in the background every LANGUAGES_TTL seconds, so GET /languages
+answers from memory. Each copy carries a pre-serialized body and an ETag for
+cheap revalidation. A failed or slow refresh keeps the last good copy
+serving; only a locale that has never loaded waits on Google.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+
+from fastapi import HTTPException
+
+from .http_client import google_client, google_timeout
+from .translation import GOOGLE_API_KEY
+
+LANGUAGES_URL           = "https://translation.googleapis.com/language/translate/v2/languages"
+LANGUAGES_TTL           = float(os.getenv("LANGUAGES_TTL", 24 * 3600))
+LANGUAGES_TIMEOUT       = float(os.getenv("LANGUAGES_TIMEOUT", 10))
+LANGUAGES_WARM_TARGETS  = [t.strip() for t in os.getenv("LANGUAGES_WARM_TARGETS", "en").split(",") if t.strip()]
+LANGUAGES_MAX_TARGETS   = int(os.getenv("LANGUAGES_MAX_TARGETS", 200))
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    body: bytes  # JSON array, serialized once
+    etag: str
+    loaded_at: float
+
+
+async def _fetch_languages(target: str) -> list[dict]:
+    resp = await google_client.get(
+        LANGUAGES_URL,
+        params={"key": GOOGLE_API_KEY, "target": target},
+        timeout=google_timeout(LANGUAGES_TIMEOUT),
+    )
+    if resp.status_code != 200:
+        raise HTTPException(resp.status_code, detail=resp.text)
+    return resp.json().get("data", {}).get("languages", [])
+
+
+class LanguageCatalog:
+    def __init__(self):
+        self._entries: dict[str, CatalogEntry] = {}
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self._task: asyncio.Task | None = None
+
+    async def _load(self, target: str) -> CatalogEntry:
+        languages = await _fetch_languages(target)
+        body = json.dumps(languages, ensure_ascii=False, separators=(",", ":")).encode()
+        entry = CatalogEntry(
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            loaded_at=time.monotonic(),
+        )
+        if target in self._entries or len(self._entries) < LANGUAGES_MAX_TARGETS:
+            self._entries[target] = entry
+        return entry
+
+    def refresh(self, target: str) -> asyncio.Task:
+        """Start (or join) a reload of one locale; concurrent callers share it."""
+        task = self._refreshing.get(target)
+        if task is None:
+            task = asyncio.create_task(self._load(target))
+            self._refreshing[target] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(target, None))
+        return task
+
+    async def get(self, target: str) -> CatalogEntry:
+        entry = self._entries.get(target)
+        if entry is None:
+            # never loaded: this request has to wait (shielded so a dropped
+            # client doesn't cancel the fetch for everyone else)
+            return await asyncio.shield(self.refresh(target))
+        if time.monotonic() - entry.loaded_at > LANGUAGES_TTL:
+            self.refresh(target).add_done_callback(_log_refresh_failure)
+        return entry
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(LANGUAGES_TTL)
+            for target in list(self._entries):
+                try:
+                    await self.refresh(target)
+                except Exception:
+                    logger.exception("language catalog refresh for %r failed; keeping last good copy", target)
+
+    async def start(self) -> None:
+        """Pre-warm the common locales and begin background refresh (app startup)."""
+        results = await asyncio.gather(
+            *(self.refresh(t) for t in LANGUAGES_WARM_TARGETS), return_exceptions=True
+        )
+        for target, result in zip(LANGUAGES_WARM_TARGETS, results):
+            if isinstance(result, BaseException):
+                logger.error("language catalog warm-up for %r failed: %s", target, result)
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        tasks = [t for t in (self._task, *self._refreshing.values()) if t]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _log_refresh_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("language catalog refresh failed; serving stale copy: %s", task.exception())
+
+
+language_catalog = LanguageCatalog()
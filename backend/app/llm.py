@@ -0,0 +1,87 @@
+# backend/app/llm.py
+"""
+Single OpenAI gateway shared by every router.
+
+One pooled AsyncOpenAI client per worker process: keep-alive connections,
+HTTP/2 when the `h2` package is installed, bounded pool size, explicit timeouts
+and the SDK's jittered exponential retries on 408/409/429/5xx.
+"""
+import importlib.util
+import os
+from typing import AsyncIterator
+
+import httpx
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+
+from .upstreams import OPENAI, TrackedTransport
+
+load_dotenv()
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+CHAT_MODEL     = os.getenv("OPENAI_CHAT_MODEL", "gpt-4.1")
+STT_MODEL      = os.getenv("OPENAI_STT_MODEL", "whisper-1")
+SUMMARY_MODEL  = os.getenv("OPENAI_SUMMARY_MODEL", CHAT_MODEL)
+
+POOL_SIZE       = int(os.getenv("LLM_POOL_SIZE", 50))
+KEEPALIVE_SIZE  = int(os.getenv("LLM_KEEPALIVE_SIZE", 20))
+KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", 60))
+CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", 5))
+REQUEST_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 60))
+MAX_RETRIES     = int(os.getenv("LLM_MAX_RETRIES", 3))
+
+# per-call timeouts (seconds) for the slower endpoints
+STT_TIMEOUT = float(os.getenv("LLM_STT_TIMEOUT", 120))
+
+HTTP2_ENABLED = importlib.util.find_spec("h2") is not None
+
+
+def _build_client() -> AsyncOpenAI:
+    http_client = httpx.AsyncClient(
+        transport=TrackedTransport(
+            OPENAI,
+            http2=HTTP2_ENABLED,
+            limits=httpx.Limits(
+                max_connections=POOL_SIZE,
+                max_keepalive_connections=KEEPALIVE_SIZE,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+        ),
+        timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+    )
+    return AsyncOpenAI(
+        api_key=OPENAI_API_KEY,
+        http_client=http_client,
+        max_retries=MAX_RETRIES,
+        timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+    )
+
+
+llm_client = _build_client()
+
+
+def get_llm() -> AsyncOpenAI:
+    """FastAPI dependency: the shared OpenAI client."""
+    return llm_client
+
+
+async def close_llm() -> None:
+    await llm_client.close()
+
+
+async def stream_text(llm: AsyncOpenAI, messages: list[dict]) -> AsyncIterator[str]:
+    """Text deltas of a streamed chat completion; closes the upstream stream on exit."""
+    stream = await llm.chat.completions.create(
+        model=CHAT_MODEL,
+        messages=messages,
+        stream=True,
+    )
+    try:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    finally:
+        await stream.close()
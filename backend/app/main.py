@@ -1,16 +1,53 @@
 # backend/app/main.py
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .routers import chat, languages, conversations, stt, tts, voice_turn, auth, health
+from .db import engine
+from .llm import close_llm
+from .http_client import close_http
+from .passwords import password_hasher
+from .outbox import email_outbox
+from .speech import voice_catalog
+from .language_catalog import language_catalog
+from .transcription import stt_backend
+from .summarizer import cancel_summaries
+from .history import load_tokenizer
+from .turns import message_writer
+from .replies import reply_streams
+from .routers import chat, languages, conversations, stt, tts, voice_turn, voice_ws, auth, health
 from .users import (
     auth_router,
     reset_router,
     users_router,
 )
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # ---- startup: warm caches ----
+    await voice_catalog.start()
+    await language_catalog.start()
+    await stt_backend.start()
+    await email_outbox.start()
+    await load_tokenizer()
+    yield
+    # ---- shutdown: stop background work, release pooled upstream connections ----
+    await voice_catalog.stop()
+    await language_catalog.stop()
+    await stt_backend.stop()
+    await email_outbox.stop()
+    await reply_streams.stop()
+    await cancel_summaries()
+    await message_writer.drain()
+    await close_llm()
+    await close_http()
+    password_hasher.shutdown()
+    await engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # ---- CORS: read from env (comma-separated origins) ----
 # Example value: "http://localhost:3000,http://your-alb-dns.amazonaws.com,https://yourdomain.com"
@@ -27,6 +64,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Conversation-Id", "X-Message-Id"],
 )
 
 # ---- Routers ----
@@ -48,3 +86,4 @@ app.include_router(users_router, prefix="/users",    tags=["users"])
 app.include_router(stt.router)
 app.include_router(tts.router)
 app.include_router(voice_turn.router, prefix="", tags=["voice"])
+app.include_router(voice_ws.router, tags=["voice"])
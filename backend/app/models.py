@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime, Text, Boolean
+from sqlalchemy import Column, String, ForeignKey, DateTime, Text, Boolean, Index, Integer, text
 from fastapi_users.db import SQLAlchemyBaseUserTableUUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
@@ -23,25 +23,67 @@ class UserTable(SQLAlchemyBaseUserTableUUID, Base):
 
 class Conversation(Base):
     __tablename__ = "conversation"
+    __table_args__ = (
+        Index("ix_conversation_user_id_created_at", "user_id", "created_at"),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("user.id"), nullable=False)
     source_language = Column(String, nullable=False)
     target_language = Column(String, nullable=False)
     prompt = Column(Text, nullable=True)
+    summary = Column(Text, nullable=True)  # rolling summary of older turns
+    summarized_until = Column(DateTime(timezone=True), nullable=True)  # created_at of last summarized message
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     user = relationship("UserTable", back_populates="conversations")
-    messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
+    messages = relationship(
+        "Message",
+        back_populates="conversation",
+        cascade="all, delete-orphan",
+        order_by="Message.created_at",
+    )
 
 
 class Message(Base):
     __tablename__ = "message"
+    __table_args__ = (
+        Index("ix_message_conversation_id_created_at", "conversation_id", "created_at"),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     conversation_id = Column(UUID(as_uuid=True), ForeignKey("conversation.id"), nullable=False)
     sender = Column(String, nullable=False)
     content = Column(String, nullable=False)
+    # "streaming" while an assistant reply is still being generated (content is
+    # the latest snapshot), then "complete" or "failed"
+    status = Column(String, nullable=False, server_default="complete")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     conversation = relationship("Conversation", back_populates="messages")
 
 
+class EmailOutbox(Base):
+    """Outgoing email, written in the request's transaction and sent by app.outbox."""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # the worker's "what is due" scan only ever looks at pending rows
+        Index("ix_email_outbox_due", "next_attempt_at", postgresql_where=text("status = 'pending'")),
+        # at most one pending message per recipient/template
+        Index(
+            "ux_email_outbox_pending_dedupe",
+            "dedupe_key",
+            unique=True,
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    recipient = Column(String, nullable=False)
+    template = Column(String, nullable=False)
+    dedupe_key = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(String, nullable=False, default="pending", server_default="pending")  # pending | sent | failed
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
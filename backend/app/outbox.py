@@ -0,0 +1,292 @@
+# backend/app/outbox.py
+"""
+Transactional email outbox.
+
+Routes call enqueue_email() inside their own transaction, so the email is
+stored atomically with whatever caused it (e.g. the new user row). The
+request returns as soon as that commits; SMTP latency and outages never reach
+it. A background worker per process claims due rows (FOR UPDATE SKIP LOCKED
+plus a short lease, so several workers/instances never send the same row),
+sends them over one reused, authenticated SMTP connection, and records the
+outcomes in one transaction per batch. Transient failures are retried with
+jittered exponential backoff up to EMAIL_MAX_ATTEMPTS; 5xx rejections fail
+immediately. A refused recipient only affects its own message; when the server
+itself is unreachable the rest of the batch is deferred without using up an
+attempt.
+
+Dedupe: one pending row per (template, recipient) — enqueueing again refreshes
+its content — and nothing is enqueued if the same template went to the same
+recipient within EMAIL_DEDUPE_SECONDS.
+
+Offline testing: point SMTP_HOST/SMTP_PORT at a local stand-in such as
+`python -m aiosmtpd -n -l localhost:1025 -c aiosmtpd.handlers.Debugging`
+with SMTP_STARTTLS=false and no SMTP_USER (the dev compose file runs one).
+"""
+import asyncio
+import logging
+import os
+import random
+from datetime import timedelta
+from email.message import EmailMessage
+from uuid import UUID
+
+import aiosmtplib
+from sqlalchemy import select, update, func, exists, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db import AsyncSessionLocal
+from .models import EmailOutbox
+
+SMTP_HOST      = os.getenv("SMTP_HOST", "smtp.example.com")
+SMTP_PORT      = int(os.getenv("SMTP_PORT", 587))
+SMTP_USER      = os.getenv("SMTP_USER", "")
+SMTP_PASS      = os.getenv("SMTP_PASS", "")
+SMTP_STARTTLS  = os.getenv("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes")
+SMTP_TIMEOUT   = float(os.getenv("SMTP_TIMEOUT", 15))
+EMAIL_FROM     = os.getenv("EMAIL_FROM", "no-reply@example.com")
+
+EMAIL_BATCH_SIZE      = int(os.getenv("EMAIL_BATCH_SIZE", 20))
+EMAIL_POLL_SECONDS    = float(os.getenv("EMAIL_POLL_SECONDS", 5))
+# worst case a claimed batch takes: every message connects and sends twice
+EMAIL_BATCH_WORST_SECONDS = EMAIL_BATCH_SIZE * 2 * SMTP_TIMEOUT
+# must outlast a batch, or a slow batch is claimed (and sent) again
+EMAIL_LEASE_SECONDS   = float(os.getenv("EMAIL_LEASE_SECONDS", EMAIL_BATCH_WORST_SECONDS + 60))
+EMAIL_MAX_ATTEMPTS    = int(os.getenv("EMAIL_MAX_ATTEMPTS", 8))
+EMAIL_RETRY_BASE      = float(os.getenv("EMAIL_RETRY_BASE", 10))
+EMAIL_RETRY_MAX       = float(os.getenv("EMAIL_RETRY_MAX", 3600))
+EMAIL_DEDUPE_SECONDS  = float(os.getenv("EMAIL_DEDUPE_SECONDS", 60))
+# close the SMTP session after this long without anything to send
+EMAIL_SMTP_IDLE_SECONDS = float(os.getenv("EMAIL_SMTP_IDLE_SECONDS", 60))
+
+logger = logging.getLogger(__name__)
+
+
+async def enqueue_email(
+    db: AsyncSession,
+    recipient: str,
+    template: str,
+    subject: str,
+    body: str,
+) -> bool:
+    """
+    Add an email to the caller's transaction (the caller commits, then calls
+    email_outbox.wake()). Returns False if it was deduplicated away.
+    """
+    dedupe_key = f"{template}:{recipient.lower()}"
+    recently_sent = await db.scalar(
+        select(
+            exists().where(
+                EmailOutbox.dedupe_key == dedupe_key,
+                EmailOutbox.status == "sent",
+                EmailOutbox.sent_at > func.now() - timedelta(seconds=EMAIL_DEDUPE_SECONDS),
+            )
+        )
+    )
+    if recently_sent:
+        return False
+
+    stmt = pg_insert(EmailOutbox).values(
+        recipient=recipient,
+        template=template,
+        dedupe_key=dedupe_key,
+        subject=subject,
+        body=body,
+    )
+    # already queued for this recipient/template: keep one row, newest content
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[EmailOutbox.dedupe_key],
+        index_where=text("status = 'pending'"),  # literal, to match the partial index
+        set_={"subject": stmt.excluded.subject, "body": stmt.excluded.body},
+    )
+    await db.execute(stmt)
+    return True
+
+
+def _backoff(attempts: int) -> float:
+    delay = min(EMAIL_RETRY_BASE * 2 ** (attempts - 1), EMAIL_RETRY_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+
+# the server can't be talked to at all: the rest of the batch would fail the same way
+_CONNECTION_ERRORS = (
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPTimeoutError,
+    asyncio.TimeoutError,
+    OSError,
+)
+
+
+def _is_connection_error(exc: Exception) -> bool:
+    return isinstance(exc, _CONNECTION_ERRORS)
+
+
+def _is_permanent(exc: Exception) -> bool:
+    """5xx rejections; a refusal is permanent only if every recipient got a 5xx."""
+    if isinstance(exc, aiosmtplib.SMTPRecipientsRefused):
+        codes = [r.code for r in exc.recipients]
+        return bool(codes) and all(500 <= c < 600 for c in codes)
+    code = getattr(exc, "code", None)
+    return isinstance(code, int) and 500 <= code < 600
+
+
+class _SmtpSession:
+    """One SMTP connection, opened lazily and reused across sends."""
+
+    def __init__(self):
+        self._smtp: aiosmtplib.SMTP | None = None
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=SMTP_HOST,
+            port=SMTP_PORT,
+            start_tls=SMTP_STARTTLS,
+            timeout=SMTP_TIMEOUT,
+        )
+        await smtp.connect()
+        if SMTP_USER:
+            await smtp.login(SMTP_USER, SMTP_PASS)
+        return smtp
+
+    async def send(self, message: EmailMessage) -> None:
+        if self._smtp is None or not self._smtp.is_connected:
+            self._smtp = await self._connect()
+        try:
+            await self._smtp.send_message(message)
+        except (aiosmtplib.SMTPServerDisconnected, ConnectionError):
+            # server dropped an idle connection: reconnect once and retry
+            self._smtp = await self._connect()
+            await self._smtp.send_message(message)
+
+    async def close(self) -> None:
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None and smtp.is_connected:
+            try:
+                await smtp.quit()
+            except aiosmtplib.SMTPException:
+                smtp.close()
+
+
+class EmailOutboxWorker:
+    def __init__(self):
+        self._smtp = _SmtpSession()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._last_send: float | None = None
+
+    def wake(self) -> None:
+        """Nudge the worker after committing new rows (otherwise it polls)."""
+        self._wake.set()
+
+    async def start(self) -> None:
+        if EMAIL_LEASE_SECONDS <= EMAIL_BATCH_WORST_SECONDS:
+            logger.warning(
+                "EMAIL_LEASE_SECONDS=%s is shorter than a worst-case batch (%ss); "
+                "slow batches may be sent twice",
+                EMAIL_LEASE_SECONDS, EMAIL_BATCH_WORST_SECONDS,
+            )
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        await self._smtp.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                full_batch = await self._drain_once()
+            except Exception:
+                logger.exception("email outbox pass failed")
+                full_batch = False
+            if full_batch:
+                continue  # more may be due right away
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=EMAIL_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def _claim(self) -> list[tuple[UUID, str, str, str, int]]:
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(EmailOutbox)
+                .where(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= func.now())
+                .order_by(EmailOutbox.next_attempt_at)
+                .limit(EMAIL_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+            )).scalars().all()
+            claimed = [(r.id, r.recipient, r.subject, r.body, r.attempts) for r in rows]
+            if claimed:
+                # lease: if this process dies mid-send the rows become due again
+                await db.execute(
+                    update(EmailOutbox)
+                    .where(EmailOutbox.id.in_([c[0] for c in claimed]))
+                    .values(next_attempt_at=func.now() + timedelta(seconds=EMAIL_LEASE_SECONDS))
+                )
+            await db.commit()
+        return claimed
+
+    async def _drain_once(self) -> bool:
+        claimed = await self._claim()
+        if not claimed:
+            await self._idle()
+            return False
+
+        outcomes: list[tuple[UUID, dict]] = []
+        unreachable: Exception | None = None
+        for msg_id, recipient, subject, body, attempts in claimed:
+            message = EmailMessage()
+            message["From"] = EMAIL_FROM
+            message["To"] = recipient
+            message["Subject"] = subject
+            message.set_content(body)
+            if unreachable is not None:
+                # don't dial a dead server once per message; not an attempt of this one
+                outcomes.append((msg_id, {
+                    "last_error": str(unreachable)[:1000],
+                    "next_attempt_at": func.now() + timedelta(seconds=_backoff(attempts + 1)),
+                }))
+                continue
+            try:
+                await self._smtp.send(message)
+            except Exception as e:
+                if _is_connection_error(e):
+                    # connection-level trouble: drop the session, defer the rest
+                    unreachable = e
+                    await self._smtp.close()
+                attempts += 1
+                permanent = _is_permanent(e) or attempts >= EMAIL_MAX_ATTEMPTS
+                logger.warning(
+                    "email %s to %s failed (attempt %d%s): %s",
+                    msg_id, recipient, attempts, ", giving up" if permanent else "", e,
+                )
+                values = {"attempts": attempts, "last_error": str(e)[:1000]}
+                if permanent:
+                    values["status"] = "failed"
+                else:
+                    values["next_attempt_at"] = func.now() + timedelta(seconds=_backoff(attempts))
+                outcomes.append((msg_id, values))
+                continue
+            outcomes.append((msg_id, {"status": "sent", "sent_at": func.now(), "attempts": attempts + 1}))
+
+        await self._record(outcomes)
+        self._last_send = asyncio.get_running_loop().time()
+        return len(claimed) == EMAIL_BATCH_SIZE
+
+    async def _record(self, outcomes: list[tuple[UUID, dict]]) -> None:
+        async with AsyncSessionLocal() as db:
+            for msg_id, values in outcomes:
+                await db.execute(update(EmailOutbox).where(EmailOutbox.id == msg_id).values(**values))
+            await db.commit()
+
+    async def _idle(self) -> None:
+        last = self._last_send
+        if last is not None and asyncio.get_running_loop().time() - last > EMAIL_SMTP_IDLE_SECONDS:
+            await self._smtp.close()
+            self._last_send = None
+
+
+email_outbox = EmailOutboxWorker()
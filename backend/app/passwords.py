@@ -0,0 +1,89 @@
+# backend/app/passwords.py
+"""
+Password hashing off the event loop.
+
+bcrypt is deliberately slow (hundreds of ms at the default cost), so every
+hash and verify runs in a small dedicated thread pool (the bcrypt and argon2
+bindings release the GIL) instead of blocking the worker. New hashes use
+bcrypt at PASSWORD_BCRYPT_ROUNDS. Existing hashes at another cost, or the
+argon2 ones fastapi-users wrote before, still verify and are re-hashed on
+the next successful login. Time spent waiting for a pool thread is tracked
+and reported by /api/ready?deep=true.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from fastapi_users.password import PasswordHelper
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from pwdlib.hashers.bcrypt import BcryptHasher
+
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS  = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+
+T = TypeVar("T")
+
+# first hasher is used for new hashes; the rest only verify (and trigger a rehash)
+password_hash = PasswordHash((BcryptHasher(rounds=PASSWORD_BCRYPT_ROUNDS), Argon2Hasher()))
+
+
+class PasswordHasher:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._calls = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        submitted = time.perf_counter()
+
+        def timed() -> T:
+            waited = time.perf_counter() - submitted
+            with self._lock:
+                self._calls += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            return fn(*args)
+
+        self._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            self._in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(password_hash.hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> tuple[bool, str | None]:
+        """(matches, new hash if the stored one should be upgraded)."""
+        return await self._run(password_hash.verify_and_update, password, hashed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls, total, worst = self._calls, self._wait_total, self._wait_max
+        return {
+            "workers": self.workers,
+            "in_flight": self._in_flight,
+            "queued": max(self._in_flight - self.workers, 0),
+            "calls": calls,
+            "queue_wait_avg_ms": round(total / calls * 1000, 2) if calls else 0.0,
+            "queue_wait_max_ms": round(worst * 1000, 2),
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS)
+
+# required by fastapi-users; UserManager overrides every method that would
+# call it on the event loop (create, authenticate, _update, reset tokens);
+# the OAuth paths, which would too, aren't mounted
+password_helper = PasswordHelper(password_hash)
@@ -0,0 +1,88 @@
+# backend/app/prompts.py
+"""
+Tutor system-prompt templates shared by /chat, /voice-turn and conversation seeding.
+
+Templates are parsed once at import and rendered once per
+(native_language, target_language, persona, prompt) key into an LRU cache, so
+every request for the same key gets the byte-identical string. The static
+tutor block comes first and per-turn extras (turn prompt, summary) are
+appended after it, which keeps the prefix stable for provider prompt caching.
+"""
+import os
+from functools import lru_cache
+from string import Template
+
+PROMPT_CACHE_SIZE = int(os.getenv("PROMPT_CACHE_SIZE", 1024))
+
+DEFAULT_PERSONA = "patty"
+
+PERSONAS = {
+    "patty": "Your name is Chatty Patty (Patty for short).\n",
+}
+
+TUTOR_TEMPLATE = Template("""
+You are a friendly $target tutor.
+${persona}The user’s native language is $native,
+and they want to practice $target.
+
+**Rules:**
+1. Only ever use $target in your conversation—unless you are correcting a mistake.
+2. When you correct, **first** present the correction _in ${native}_, with a heading "Correction",
+   then leave a blank line, then continue your reply _in ${target}_
+   with a heading "Conversational response".
+3. The correction must **never** be in $target.
+4. The correction should explain why the user's attempt was wrong and why the correction is right.
+5. Always include exactly one blank line between the correction and the reply.
+6. If the user says everything correctly, no correction is needed.
+7. Consider the fact the user may not have a keyboard in the target language so may not be able to always use the correct accents and punctuation when spelling a word.
+
+**Example:**
+User: “Yo comí manzanas ayer.”
+Assistant:
+“Correction (in $native (use the full verbose name for the language (for example "English" rather than "ES"))):
+It looks like you were trying to say ‘I ate apples yesterday.’
+The correct Spanish is 'Ayer comí manzanas', because...”
+
+Conversational response:
+Cuéntame más sobre otras frutas que te gusten.
+""".strip())
+
+
+@lru_cache(maxsize=PROMPT_CACHE_SIZE)
+def system_prompt(
+    native_language: str,
+    target_language: str,
+    persona: str = DEFAULT_PERSONA,
+    prompt: str | None = None,
+) -> str:
+    """Tutor instructions plus the conversation-level scenario prompt."""
+    tutor = TUTOR_TEMPLATE.substitute(
+        native=native_language,
+        target=target_language,
+        persona=PERSONAS.get(persona, ""),
+    )
+    if prompt and prompt.strip():
+        return f"{tutor}\n\nContext: {prompt.strip()}"
+    return tutor
+
+
+def build_system_prompt(
+    native_language: str,
+    target_language: str,
+    prompt: str | None = None,
+    turn_prompt: str | None = None,
+    summary: str | None = None,
+    persona: str = DEFAULT_PERSONA,
+) -> str:
+    """Cached prefix + the parts that change from turn to turn."""
+    parts = [system_prompt(native_language, target_language, persona, prompt)]
+
+    # turn-level context (avoid duplicating the saved prompt)
+    if turn_prompt and turn_prompt.strip() and (not prompt or turn_prompt.strip() != prompt.strip()):
+        parts.append(f"Additional context: {turn_prompt.strip()}")
+
+    # rolling summary of turns no longer sent verbatim
+    if summary:
+        parts.append(f"Summary of the conversation so far: {summary.strip()}")
+
+    return "\n\n".join(parts)
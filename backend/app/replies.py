@@ -0,0 +1,190 @@
+# backend/app/replies.py
+"""
+Assistant replies generated independently of the HTTP response.
+
+A chat turn starts a background task that consumes the LLM stream into a
+ReplyStream buffer. The reply is persisted under a message id chosen up front,
+with status "streaming": a placeholder row immediately, a snapshot every
+REPLY_PERSIST_MS while it grows, and the final text as "complete" (or "failed"
+if the upstream fails or the app shuts down). The response only tails the
+buffer. A client that disconnects doesn't stop or lose the reply. It can
+resume from a character offset with GET /chat/replies/{message_id}, for up to
+REPLY_BUFFER_TTL seconds after the reply finished; after that the stored
+message is served instead, once it is no longer "streaming".
+
+The buffer also keeps every delta in order, so the SSE mode of /chat can number
+its events and replay everything after a client's Last-Event-ID. The buffer is
+per worker process: a reconnect that lands on another worker (or comes after
+REPLY_BUFFER_TTL) gets the stored message in one final event instead, or is
+told to retry while it is still streaming.
+"""
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from typing import AsyncIterator
+from uuid import UUID, uuid4
+
+from openai import AsyncOpenAI
+
+from .history import append_turn, forget_history
+from .llm import stream_text
+from .summarizer import schedule_summary
+from .turns import message_writer
+
+# Max simultaneous OpenAI streams per worker process; extra turns wait for a slot
+MAX_CONCURRENT_STREAMS = int(os.getenv("CHAT_MAX_CONCURRENT_STREAMS", 32))
+REPLY_PERSIST_MS       = float(os.getenv("REPLY_PERSIST_MS", 1000))
+REPLY_BUFFER_TTL       = float(os.getenv("REPLY_BUFFER_TTL", 300))
+
+logger = logging.getLogger(__name__)
+
+
+class ReplyFailed(Exception):
+    pass
+
+
+class ReplyStream:
+    """One assistant reply: text so far, completion state, and waiters."""
+
+    def __init__(self, user_id: UUID, conversation_id: UUID, message_id: UUID):
+        self.user_id = user_id
+        self.conversation_id = conversation_id
+        self.message_id = message_id
+        self.text = ""
+        self.deltas: list[str] = []  # replay buffer: SSE event n is deltas[n - 1]
+        self.done = False
+        self.error: str | None = None
+        self.started_at = time.monotonic()
+        self.first_delta_at: float | None = None
+        self.finished_at: float | None = None
+        self._changed = asyncio.Event()
+
+    def append(self, delta: str) -> None:
+        if self.first_delta_at is None:
+            self.first_delta_at = time.monotonic()
+        self.text += delta
+        self.deltas.append(delta)
+        self._notify()
+
+    def finish(self, error: str | None = None) -> None:
+        self.done = True
+        self.error = error
+        self.finished_at = time.monotonic()
+        self._notify()
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def tail(self, offset: int = 0) -> AsyncIterator[str]:
+        """
+        Text from `offset` on, as it arrives, until the reply is complete.
+        Raises ReplyFailed if generation failed, so a plain-text response is
+        aborted instead of ending like a complete (but truncated) reply.
+        """
+        while True:
+            if offset < len(self.text):
+                chunk = self.text[offset:]
+                offset += len(chunk)
+                yield chunk
+                continue
+            if self.done:
+                if self.error:
+                    raise ReplyFailed(self.error)
+                return
+            await self._changed.wait()
+
+    async def wait(self, timeout: float) -> None:
+        """Block until the reply grows or completes, or `timeout` passes."""
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def timing(self) -> dict:
+        def ms(at: float | None) -> int | None:
+            return None if at is None else round((at - self.started_at) * 1000)
+        return {"first_delta_ms": ms(self.first_delta_at), "total_ms": ms(self.finished_at)}
+
+
+class ReplyRegistry:
+    def __init__(self, max_streams: int):
+        self._slots = asyncio.Semaphore(max_streams)
+        self._streams: dict[UUID, ReplyStream] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def get(self, message_id: UUID) -> ReplyStream | None:
+        return self._streams.get(message_id)
+
+    def start(
+        self,
+        llm: AsyncOpenAI,
+        messages: list[dict],
+        user_id: UUID,
+        conversation_id: UUID,
+        user_text: str,
+    ) -> ReplyStream:
+        """Start generating a reply in the background; returns its buffer."""
+        reply = ReplyStream(user_id, conversation_id, uuid4())
+        self._streams[reply.message_id] = reply
+        task = asyncio.create_task(self._generate(llm, messages, reply, user_text))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return reply
+
+    async def _generate(self, llm: AsyncOpenAI, messages: list[dict], reply: ReplyStream, user_text: str) -> None:
+        persisted_at = time.monotonic()
+
+        def persist(status: str = "streaming") -> asyncio.Future:
+            return message_writer.submit(
+                reply.conversation_id, "assistant", reply.text.strip(), reply.message_id, status
+            )
+
+        # placeholder row right away, so a resume on another worker finds the reply
+        persist()
+        try:
+            async with self._slots:
+                async for delta in stream_text(llm, messages):
+                    reply.append(delta)
+                    now = time.monotonic()
+                    if (now - persisted_at) * 1000 >= REPLY_PERSIST_MS:
+                        persist()
+                        persisted_at = now
+        except asyncio.CancelledError:
+            # shutting down: keep what was generated, message_writer.drain() stores it
+            persist("failed")
+            forget_history(reply.conversation_id)
+            reply.finish("interrupted")
+            raise
+        except Exception as e:
+            # the upstream's message stays in the log; clients get a generic error
+            logger.warning("reply %s failed after %d chars: %r", reply.message_id, len(reply.text), e)
+            with contextlib.suppress(Exception):  # message_writer logs it
+                await asyncio.shield(persist("failed"))
+            forget_history(reply.conversation_id)
+            reply.finish("reply generation failed")
+        else:
+            try:
+                await asyncio.shield(persist("complete"))
+            except Exception:
+                forget_history(reply.conversation_id)
+                reply.finish("reply could not be saved")
+                return
+            append_turn(reply.conversation_id, user_text, reply.text.strip())
+            schedule_summary(reply.conversation_id)
+            reply.finish()
+        finally:
+            asyncio.get_running_loop().call_later(
+                REPLY_BUFFER_TTL, self._streams.pop, reply.message_id, None
+            )
+
+    async def stop(self) -> None:
+        """Interrupt generation on shutdown (partial replies are still persisted)."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+reply_streams = ReplyRegistry(MAX_CONCURRENT_STREAMS)
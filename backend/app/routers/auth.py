@@ -6,10 +6,12 @@ from pydantic import BaseModel, EmailStr
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
 
-from ..db import AsyncSessionLocal
+from ..db import get_db
 from ..models import UserTable
+from ..outbox import enqueue_email, email_outbox
+from ..passwords import password_hasher
+from ..users import principal_cache
 
 # ── ENV VARS ────────────────────────────────────────────────────────────
 SECRET_KEY     = os.getenv("SECRET_KEY", "CHANGE_THIS_IN_PROD")
@@ -17,30 +19,8 @@ TOKEN_SALT     = "email-confirm"
 TOKEN_EXPIRE   = int(os.getenv("VERIFY_EXPIRE_SECONDS", 3600))
 FRONTEND_URL   = os.getenv("FRONTEND_URL", "http://localhost:3000")
 
-MAIL_USERNAME = os.getenv("SMTP_USER", "")
-MAIL_PASSWORD = os.getenv("SMTP_PASS", "")
-MAIL_FROM     = os.getenv("EMAIL_FROM", "no-reply@example.com")
-MAIL_PORT     = int(os.getenv("SMTP_PORT", 587))
-MAIL_SERVER   = os.getenv("SMTP_HOST", "smtp.example.com")
-MAIL_STARTTLS = True
-MAIL_SSL_TLS  = False
-
-conf = ConnectionConfig(
-    MAIL_USERNAME=MAIL_USERNAME,
-    MAIL_PASSWORD=MAIL_PASSWORD,
-    MAIL_FROM=MAIL_FROM,
-    MAIL_PORT=MAIL_PORT,
-    MAIL_SERVER=MAIL_SERVER,
-    MAIL_STARTTLS=MAIL_STARTTLS,
-    MAIL_SSL_TLS=MAIL_SSL_TLS,
-    USE_CREDENTIALS=True,
-)
 serializer = URLSafeTimedSerializer(SECRET_KEY)
 
-async def get_db() -> AsyncSession:
-    async with AsyncSessionLocal() as session:
-        yield session
-
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
@@ -61,10 +41,8 @@ async def register(data: RegisterIn, db: AsyncSession = Depends(get_db)):
     if q.scalars().first():
         raise HTTPException(400, "Email already registered")
 
-    # 2) Create inactive user
-    from passlib.context import CryptContext
-    PWD_CTX = CryptContext(schemes=["bcrypt"], deprecated="auto")
-    hashed = PWD_CTX.hash(data.password)
+    # 2) Create inactive user (hashed in the password pool, off the event loop)
+    hashed = await password_hasher.hash(data.password)
     user = UserTable(
         full_name=data.full_name,
         email=data.email,
@@ -73,22 +51,23 @@ async def register(data: RegisterIn, db: AsyncSession = Depends(get_db)):
         is_verified=False,
     )
     db.add(user)
-    await db.commit()
 
-    # 3) Send verification email
+    # 3) Queue the verification email in the same transaction as the user
     token = serializer.dumps(data.email, salt=TOKEN_SALT)
     link = f"{FRONTEND_URL}/auth/verify?token={token}"
-    message = MessageSchema(
+    await enqueue_email(
+        db,
+        data.email,
+        template="verify",
         subject="Please verify your email",
-        recipients=[data.email],
         body=(
             f"Hi {data.full_name or data.email},\n\n"
             f"Click here to verify your email:\n\n{link}\n\n"
             "If you didn't sign up you can ignore this."
         ),
-        subtype="plain",
     )
-    await FastMail(conf).send_message(message)
+    await db.commit()
+    email_outbox.wake()
     return {"msg": "User created; verification email sent."}
 
 
@@ -109,6 +88,7 @@ async def verify(token: str, db: AsyncSession = Depends(get_db)):
     user.is_active = True
     user.is_verified = True
     await db.commit()
+    principal_cache.invalidate_user(user.id)
     return {"msg": "Email verified successfully."}
 
 
@@ -121,11 +101,14 @@ async def resend_verification(data: ResendIn, db: AsyncSession = Depends(get_db)
 
     token = serializer.dumps(data.email, salt=TOKEN_SALT)
     link = f"{FRONTEND_URL}/auth/verify?token={token}"
-    message = MessageSchema(
+    # repeated clicks collapse into one pending email
+    await enqueue_email(
+        db,
+        data.email,
+        template="verify-resend",
         subject="Your verification link",
-        recipients=[data.email],
         body=f"Click to verify:\n\n{link}",
-        subtype="plain",
     )
-    await FastMail(conf).send_message(message)
+    await db.commit()
+    email_outbox.wake()
     return {"msg": "Verification email resent."}
@@ -1,18 +1,26 @@
 # backend/app/routers/chat.py
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+import json
 import os
-from dotenv import load_dotenv
-from openai import OpenAI
-from fastapi.responses import StreamingResponse
+from typing import AsyncIterator
+from uuid import UUID
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from pydantic import BaseModel
+from openai import AsyncOpenAI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..users import fastapi_users, UserRead
-from ..routers.conversations import get_db
-from ..models import Message as MessageModel, Conversation as ConvModel
+from ..users import current_user, UserRead
+from ..db import get_db
+from ..llm import get_llm
+from ..models import Conversation, Message
+from ..turns import begin_turn
+from ..replies import ReplyStream, reply_streams
+from ..prompts import build_system_prompt
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# SSE mode: reconnect delay suggested to the client, and idle keep-alive interval
+SSE_RETRY_MS     = int(os.getenv("CHAT_SSE_RETRY_MS", 1000))
+SSE_PING_SECONDS = float(os.getenv("CHAT_SSE_PING_SECONDS", 15))
 
 router = APIRouter()
 
@@ -28,120 +36,166 @@ class MessageIn(BaseModel):
 @router.post("/chat")
 async def chat(
     msg: MessageIn,
-    user: UserRead = Depends(fastapi_users.current_user()),
+    request: Request,
+    user: UserRead = Depends(current_user),
     db: AsyncSession = Depends(get_db),
+    llm: AsyncOpenAI = Depends(get_llm),
 ):
     """
     Stream a reply. If conversation_id is missing, create a new conversation on the fly.
     Merge (1) saved conversation.prompt, (2) per-message prompt, and (3) tutor instructions.
+    X-Message-Id names the reply, for resuming it with GET /chat/replies/{id}.
+    With `Accept: text/event-stream` the reply is sent as numbered SSE delta
+    events between a `meta` and a `done`/`error` event.
     """
 
-    # ── 0) Ensure conversation
-    if msg.conversation_id:
-        conv = await db.get(ConvModel, msg.conversation_id)
-        if not conv or conv.user_id != user.id:
-            raise HTTPException(404, "Conversation not found")
-        # update convo prompt if this turn provides a new one and none saved yet
-        if msg.prompt and not conv.prompt:
-            conv.prompt = msg.prompt.strip()
-            db.add(conv)
-            await db.commit()
-            await db.refresh(conv)
-    else:
-        # Auto-create
-        conv = ConvModel(
-            user_id=user.id,
-            source_language=msg.native_language,
-            target_language=msg.target_language,
-            prompt=msg.prompt.strip() if msg.prompt else None,
-        )
-        db.add(conv)
-        await db.commit()
-        await db.refresh(conv)
-
-    # ── 1) Persist user's message
-    db.add(
-        MessageModel(
-            conversation_id=conv.id,
-            sender="user",
-            content=msg.text,
-        )
+    # ── 0+1) Ensure conversation and persist the user's message (one statement)
+    turn = await begin_turn(
+        db,
+        user.id,
+        msg.conversation_id,
+        msg.native_language,
+        msg.target_language,
+        msg.prompt,
+        msg.text,
     )
-    await db.commit()
-
-    assistant_reply = ""
-
-    async def streamer():
-        nonlocal assistant_reply
-
-        parts: list[str] = []
-
-        # convo-level context
-        if conv.prompt:
-            parts.append(f"Context: {conv.prompt.strip()}")
-
-        # turn-level context (avoid duplicating same text)
-        if msg.prompt and (not conv.prompt or msg.prompt.strip() != conv.prompt.strip()):
-            parts.append(f"Additional context: {msg.prompt.strip()}")
-
-        # tutor block (kept as you wrote, with Patty persona)
-        tutor = f"""
-You are a friendly {msg.target_language} tutor.
-Your name is Chatty Patty (Patty for short).
-The user’s native language is {msg.native_language},
-and they want to practice {msg.target_language}.
-
-**Rules:**
-1. Only ever use {msg.target_language} in your conversation—unless you are correcting a mistake.
-2. When you correct, **first** present the correction _in {msg.native_language}_, with a heading "Correction",
-   then leave a blank line, then continue your reply _in {msg.target_language}_
-   with a heading "Conversational response".
-3. The correction must **never** be in {msg.target_language}.
-4. The correction should explain why the user's attempt was wrong and why the correction is right.
-5. Always include exactly one blank line between the correction and the reply.
-6. If the user says everything correctly, no correction is needed.
-7. Consider the fact the user may not have a keyboard in the target language so may not be able to always use the correct accents and punctuation when spelling a word.
-
-**Example:**
-User: “Yo comí manzanas ayer.”
-Assistant:
-“Correction (in {msg.native_language} (use the full verbose name for the language (for example "English" rather than "ES"))):
-It looks like you were trying to say ‘I ate apples yesterday.’
-The correct Spanish is 'Ayer comí manzanas', because...”
-
-Conversational response:
-Cuéntame más sobre otras frutas que te gusten.
-""".strip()
-
-        parts.append(tutor)
-        system_content = "\n\n".join(parts)
-
-        chat_payload = [
-            {"role": "system", "content": system_content},
-            {"role": "user", "content": msg.text},
-        ]
-
-        # ── 2) OpenAI stream (sync iterator)
-        stream = client.chat.completions.create(
-            model="gpt-4.1",
-            messages=chat_payload,
-            stream=True,
-        )
+    conv_id = turn.conversation_id
+
+    # prior turns (token-budgeted, cached per conversation)
+    history = turn.window.as_messages()
+
+    system_content = build_system_prompt(
+        msg.native_language,
+        msg.target_language,
+        prompt=turn.prompt,
+        turn_prompt=msg.prompt,
+        summary=turn.summary,
+    )
+    chat_payload = [
+        {"role": "system", "content": system_content},
+        *history,
+        {"role": "user", "content": msg.text},
+    ]
+
+    # ── 2) Generate in the background; it is persisted even if this client goes away
+    reply = reply_streams.start(llm, chat_payload, user.id, conv_id, msg.text)
+
+    # ── 3) The response only tails the reply buffer. No per-chunk
+    #    request.is_disconnected() polling: Starlette cancels the body iterator
+    #    when the client disconnects, and generation doesn't depend on it.
+    if _wants_sse(request):
+        meta = {"user_message_id": str(turn.user_message_id)}
+        return _sse_response(_sse_events(reply, 0, meta), reply.conversation_id, reply.message_id)
+    return StreamingResponse(
+        reply.tail(),
+        media_type="text/plain",
+        headers=_reply_headers(reply.conversation_id, reply.message_id),
+    )
+
+
+def _reply_headers(conversation_id: UUID, message_id: UUID) -> dict:
+    return {"X-Conversation-Id": str(conversation_id), "X-Message-Id": str(message_id)}
+
+
+def _wants_sse(request: Request) -> bool:
+    return "text/event-stream" in request.headers.get("accept", "")
+
+
+def _sse(event: str, data: dict, event_id: int | None = None) -> bytes:
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False))
+    return ("\n".join(lines) + "\n\n").encode()
 
-        for chunk in stream:
-            delta = chunk.choices[0].delta.content
-            if delta:
-                assistant_reply += delta
-                yield delta
-
-        # ── 3) Save assistant reply
-        db.add(
-            MessageModel(
-                conversation_id=conv.id,
-                sender="assistant",
-                content=assistant_reply.strip(),
-            )
+
+def _sse_response(events: AsyncIterator[bytes], conversation_id: UUID, message_id: UUID) -> StreamingResponse:
+    headers = _reply_headers(conversation_id, message_id)
+    headers["Cache-Control"] = "no-cache"
+    headers["X-Accel-Buffering"] = "no"  # don't let a proxy hold deltas back
+    return StreamingResponse(events, media_type="text/event-stream", headers=headers)
+
+
+async def _sse_events(reply: ReplyStream, after: int, meta: dict | None = None) -> AsyncIterator[bytes]:
+    """
+    `meta`, then delta events numbered 1..n (skipping those up to `after`), then
+    `done` (or `error`). Only deltas carry an id, so Last-Event-ID always names
+    the last delta the client has.
+    """
+    yield f"retry: {SSE_RETRY_MS}\n\n".encode()
+    yield _sse("meta", {
+        "conversation_id": str(reply.conversation_id),
+        "message_id": str(reply.message_id),
+        **(meta or {}),
+    })
+    sent = after
+    while True:
+        while sent < len(reply.deltas):
+            sent += 1
+            yield _sse("delta", {"text": reply.deltas[sent - 1]}, event_id=sent)
+        if reply.done:
+            break
+        before = len(reply.deltas)
+        await reply.wait(SSE_PING_SECONDS)
+        if len(reply.deltas) == before and not reply.done:
+            yield b": ping\n\n"  # keep idle mobile/proxy connections open
+    if reply.error:
+        yield _sse("error", {"message_id": str(reply.message_id), "detail": reply.error, "text": reply.text.strip()})
+    else:
+        yield _sse("done", {"message_id": str(reply.message_id), "text": reply.text.strip(), **reply.timing()})
+
+
+async def _sse_stored(conversation_id: UUID, message_id: UUID, content: str, status: str) -> AsyncIterator[bytes]:
+    yield _sse("meta", {"conversation_id": str(conversation_id), "message_id": str(message_id), "stored": True})
+    if status == "failed":
+        yield _sse("error", {"message_id": str(message_id), "detail": "reply generation failed", "text": content})
+    else:
+        yield _sse("done", {"message_id": str(message_id), "text": content})
+
+
+@router.get("/chat/replies/{message_id}")
+async def resume_reply(
+    message_id: UUID,
+    request: Request,
+    offset: int = Query(0, ge=0, description="characters of the reply already received"),
+    last_event_id: int = Header(0, ge=0, description="SSE: last delta event received"),
+    user: UserRead = Depends(current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Continue a reply: tails it while this worker still buffers it, otherwise
+    returns the stored message (409 while that is still being generated
+    elsewhere). Plain text resumes from `offset`; with
+    `Accept: text/event-stream` the deltas after Last-Event-ID are replayed.
+    """
+    sse = _wants_sse(request)
+    reply = reply_streams.get(message_id)
+    if reply is not None and reply.user_id == user.id:
+        if sse:
+            return _sse_response(_sse_events(reply, last_event_id), reply.conversation_id, reply.message_id)
+        return StreamingResponse(
+            reply.tail(offset),
+            media_type="text/plain",
+            headers=_reply_headers(reply.conversation_id, reply.message_id),
         )
-        await db.commit()
 
-    return StreamingResponse(streamer(), media_type="text/plain")
+    row = (await db.execute(
+        select(Message.conversation_id, Message.content, Message.status)
+        .join(Conversation, Conversation.id == Message.conversation_id)
+        .where(Message.id == message_id, Conversation.user_id == user.id)
+    )).one_or_none()
+    if row is None:
+        raise HTTPException(404, "Reply not found")
+    if row.status == "streaming":
+        # generated elsewhere (another worker): the stored text is only a snapshot
+        raise HTTPException(409, "Reply is still being generated", headers={"Retry-After": "1"})
+    if sse:
+        # no numbered deltas to replay here: send the stored text whole
+        events = _sse_stored(row.conversation_id, message_id, row.content, row.status)
+        return _sse_response(events, row.conversation_id, message_id)
+    if row.status == "failed":
+        raise HTTPException(502, "Reply generation failed")
+    return PlainTextResponse(
+        row.content[offset:],
+        headers=_reply_headers(row.conversation_id, message_id),
+    )
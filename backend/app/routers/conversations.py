@@ -1,162 +1,218 @@
 # backend/app/routers/conversations.py
 
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+import base64
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
-import os
-from dotenv import load_dotenv
-from openai import OpenAI
+from sqlalchemy import select, func, true, tuple_
+from openai import AsyncOpenAI
 
-from ..db import AsyncSessionLocal
+from ..db import get_db
 from ..models import Conversation, Message
-from ..schemas import ConversationCreate, ConversationRead
-from ..users import fastapi_users, UserRead
-
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from ..schemas import (
+    ConversationCreate,
+    ConversationRead,
+    ConversationSummary,
+    ConversationPage,
+    MessageRead,
+    MessagePage,
+)
+from ..users import current_user, UserRead
+from ..llm import get_llm, CHAT_MODEL
+from ..history import forget_history
+from ..prompts import system_prompt
+from ..turns import create_conversation as insert_conversation
 
 router = APIRouter(prefix="/conversations", tags=["conversations"])
 
-
-async def get_db():
-    async with AsyncSessionLocal() as session:
-        yield session
+PREVIEW_CHARS = 120
 
 
 @router.post("", response_model=ConversationRead)
 async def create_conversation(
     payload: ConversationCreate,
     db: AsyncSession = Depends(get_db),
-    user: UserRead = Depends(fastapi_users.current_user()),
+    user: UserRead = Depends(current_user),
+    llm: AsyncOpenAI = Depends(get_llm),
 ):
     """ Start a new conversation, optionally seed it with an initial OpenAI response. """
-    # 1) create the conversation record
-    conv = Conversation(
-        user_id=user.id,
-        source_language=payload.source_language,
-        target_language=payload.target_language,
-        prompt=payload.prompt,
-    )
-    db.add(conv)
-    await db.commit()
-    await db.refresh(conv)
-
-    # 2) if the user supplied a prompt, fire off an assistant reply
+    # 1) if the user supplied a prompt, get the opening assistant reply first
+    opening = None
     if payload.prompt:
-        pieces: List[str] = []
-        pieces.append(f"Context: {payload.prompt.strip()}")
-        tutor_prompt = f"""
-You are a friendly {payload.target_language} tutor.  
-The user’s native language is {payload.source_language},  
-and they want to practice {payload.target_language}.
-
-**Rules:**
-1. Only ever use {payload.target_language} in your conversation—unless you are correcting a mistake.
-2. When you correct, **first** present the correction _in {payload.source_language}_, with a heading "Correction",
-   then leave a blank line, then continue your reply _in {payload.target_language}_
-   with a heading "Conversational response".
-3. The correction must **never** be in {payload.target_language}.
-4. The correction should explain why the user's attempt was wrong and why the correction is right.
-5. Always include exactly one blank line between correction and reply.
-6. If the user says everything correctly, no correction is needed.
-7. Consider the fact the user may not have a keyboard in the target language so may not be able to always use the correct accents and punctuation when spelling a word.
-
-
-**Example:**
-User: “Yo comí manzanas ayer.”
-Assistant:
-“Correction (in {payload.source_language}):
-It looks like you were trying to say ‘I ate apples yesterday.’
-The correct Spanish is 'Ayer comí manzanas', because...”
-
-Conversational response:
-Cuéntame más sobre otras frutas que te gusten.
-""".strip()
-        pieces.append(tutor_prompt)
-
-        full_system = "\n\n".join(pieces)
-        resp = client.chat.completions.create(
-            model="gpt-4.1",
+        full_system = system_prompt(
+            payload.source_language,
+            payload.target_language,
+            prompt=payload.prompt,
+        )
+        resp = await llm.chat.completions.create(
+            model=CHAT_MODEL,
             messages=[{"role": "system", "content": full_system}],
             stream=False,
         )
-        assistant_text = resp.choices[0].message.content or ""
-        db.add(
-            Message(
-                conversation_id=conv.id,
-                sender="bot",
-                content=assistant_text.strip(),
-            )
+        opening = (resp.choices[0].message.content or "").strip()
+
+    # 2) conversation (+ opening message) in one statement, no refresh/re-load
+    row = await insert_conversation(
+        db,
+        user.id,
+        payload.source_language,
+        payload.target_language,
+        payload.prompt,
+        opening=opening,
+    )
+    messages = []
+    if opening is not None:
+        messages.append(
+            MessageRead(id=row.message_id, sender="bot", content=opening, created_at=row.message_created_at)
         )
-        await db.commit()
-
-    # 3) re‐load with messages eager-loaded
-    stmt = (
-        select(Conversation)
-        .options(selectinload(Conversation.messages))
-        .where(Conversation.id == conv.id)
+    return ConversationRead(
+        id=row.id,
+        source_language=row.source_language,
+        target_language=row.target_language,
+        prompt=row.prompt,
+        created_at=row.created_at,
+        messages=messages,
     )
-    result = await db.execute(stmt)
-    conv_with_msgs = result.scalar_one()
 
-    # sort messages chronologically
-    conv_with_msgs.messages.sort(key=lambda m: m.created_at)
-    return conv_with_msgs
+
+def _encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
-@router.get("", response_model=List[ConversationRead])
+@router.get("", response_model=ConversationPage)
 async def list_conversations(
+    limit: int = Query(30, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     db: AsyncSession = Depends(get_db),
-    user: UserRead = Depends(fastapi_users.current_user()),
+    user: UserRead = Depends(current_user),
 ):
-    """ Show the user's past conversations (with their messages). """
+    """ Page through the user's conversations, newest first, without their messages. """
+    last_msg = (
+        select(
+            func.left(Message.content, PREVIEW_CHARS).label("preview"),
+            Message.created_at.label("created_at"),
+        )
+        .where(Message.conversation_id == Conversation.id)
+        .where(Message.status == "complete")
+        .order_by(Message.created_at.desc())
+        .limit(1)
+        .correlate(Conversation)
+        .lateral("last_msg")
+    )
+    msg_count = (
+        select(func.count())
+        .where(Message.conversation_id == Conversation.id)
+        .where(Message.status == "complete")  # not placeholders or failed replies
+        .correlate(Conversation)
+        .scalar_subquery()
+    )
     stmt = (
-        select(Conversation)
-        .options(selectinload(Conversation.messages))
+        select(
+            Conversation.id,
+            Conversation.source_language,
+            Conversation.target_language,
+            Conversation.prompt,
+            Conversation.created_at,
+            msg_count.label("message_count"),
+            last_msg.c.created_at.label("last_message_at"),
+            last_msg.c.preview.label("last_message_preview"),
+        )
+        .outerjoin(last_msg, true())
         .where(Conversation.user_id == user.id)
-        .order_by(Conversation.created_at)
+        .order_by(Conversation.created_at.desc(), Conversation.id.desc())
+        .limit(limit + 1)
     )
-    result = await db.execute(stmt)
-    convs = result.scalars().all()
-
-    # sort each conversation's messages oldest→newest
-    for conv in convs:
-        conv.messages.sort(key=lambda m: m.created_at)
+    if cursor:
+        created_at, conv_id = _decode_cursor(cursor)
+        stmt = stmt.where(tuple_(Conversation.created_at, Conversation.id) < (created_at, conv_id))
 
-    return convs
+    rows = (await db.execute(stmt)).mappings().all()
+    items = [ConversationSummary(**row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = _encode_cursor(items[-1].created_at, items[-1].id)
+    return ConversationPage(items=items, next_cursor=next_cursor)
 
 
 @router.get("/{conversation_id}", response_model=ConversationRead)
 async def get_conversation(
     conversation_id: UUID,
     db: AsyncSession = Depends(get_db),
-    user: UserRead = Depends(fastapi_users.current_user())
+    user: UserRead = Depends(current_user)
 ):
-    """ Fetch one conversation (including its history). """
+    """ Fetch one conversation's details; its messages are paged by /messages. """
     stmt = (
-        select(Conversation)
-        .options(selectinload(Conversation.messages))
+        select(
+            Conversation.id,
+            Conversation.source_language,
+            Conversation.target_language,
+            Conversation.prompt,
+            Conversation.created_at,
+        )
         .where(Conversation.id == conversation_id)
         .where(Conversation.user_id == user.id)
     )
-    result = await db.execute(stmt)
-    conv = result.scalars().first()
-    if not conv:
+    row = (await db.execute(stmt)).mappings().first()
+    if not row:
         raise HTTPException(status_code=404, detail="Not found")
+    return ConversationRead(**row)
+
 
-    # ensure chronological order
-    conv.messages.sort(key=lambda m: m.created_at)
-    return conv
+@router.get("/{conversation_id}/messages", response_model=MessagePage)
+async def list_messages(
+    conversation_id: UUID,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: AsyncSession = Depends(get_db),
+    user: UserRead = Depends(current_user),
+):
+    """ Page backwards through a conversation: newest page first, each page oldest→newest. """
+    owned = await db.execute(
+        select(Conversation.id)
+        .where(Conversation.id == conversation_id)
+        .where(Conversation.user_id == user.id)
+    )
+    if owned.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    stmt = (
+        select(Message)
+        .where(Message.conversation_id == conversation_id)
+        .order_by(Message.created_at.desc(), Message.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        created_at, msg_id = _decode_cursor(cursor)
+        stmt = stmt.where(tuple_(Message.created_at, Message.id) < (created_at, msg_id))
+
+    rows = (await db.execute(stmt)).scalars().all()
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = _encode_cursor(page[-1].created_at, page[-1].id)
+    page.reverse()
+    return MessagePage(
+        items=[MessageRead.model_validate(m, from_attributes=True) for m in page],
+        next_cursor=next_cursor,
+    )
 
 
 @router.delete("/{conversation_id}")
 async def delete_conversation(
     conversation_id: UUID,
     db: AsyncSession = Depends(get_db),
-    user: UserRead = Depends(fastapi_users.current_user())
+    user: UserRead = Depends(current_user)
 ):
     """ Delete a conversation. """
     conv = await db.get(Conversation, conversation_id)
@@ -164,4 +220,5 @@ async def delete_conversation(
         raise HTTPException(status_code=404, detail="Not Found")
     await db.delete(conv)
     await db.commit()
+    forget_history(conversation_id)
     return {"detail": "deleted"}
@@ -1,27 +1,59 @@
 # backend/app/routers/health.py
+import asyncio
 import os
+import time
 from sqlalchemy import text
-from sqlalchemy.ext.asyncio import create_async_engine
-from fastapi import HTTPException, APIRouter
+from fastapi import HTTPException, APIRouter, Query
+
+from ..db import engine
+from ..http_client import google_client, pool_stats
+from ..llm import llm_client
+from ..passwords import password_hasher
+from ..upstreams import snapshot
 
 router = APIRouter()
 
+# a probe every few seconds from each LB target should not each hit Postgres
+READY_CACHE_SECONDS = float(os.getenv("READY_CACHE_SECONDS", 2))
+
+_ready_lock = asyncio.Lock()
+_ready_checked_at = 0.0
+_ready_error: str | None = None
+
+
 @router.get("/api/health", tags=["health"])
 async def health():
     return {"ok": True}
 
 
+async def _check_db() -> str | None:
+    """SELECT 1 through the shared pool; returns an error string or None."""
+    global _ready_checked_at, _ready_error
+    async with _ready_lock:
+        if time.monotonic() - _ready_checked_at < READY_CACHE_SECONDS:
+            return _ready_error
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            _ready_error = None
+        except Exception as e:
+            _ready_error = str(e)
+        _ready_checked_at = time.monotonic()
+        return _ready_error
+
+
 @router.get("/api/ready", tags=["health"])
-async def ready():
-    url = os.getenv("DATABASE_URL")
-    if not url:
-        return {"ok": True, "db": "unknown"}  # don't fail just for missing env
-    engine = create_async_engine(url, pool_pre_ping=True, future=True)
-    try:
-        async with engine.connect() as conn:
-            await conn.execute(text("SELECT 1"))
-        return {"ok": True, "db": "up"}
-    except Exception as e:
-        raise HTTPException(status_code=503, detail=f"db not ready: {e}")
-    finally:
-        await engine.dispose()
+async def ready(deep: bool = Query(False, description="Include cached upstream status and pool stats")):
+    error = await _check_db()
+    if error:
+        raise HTTPException(status_code=503, detail=f"db not ready: {error}")
+    body = {"ok": True, "db": "up"}
+    if deep:
+        # last-known state only; never calls the upstreams from the probe
+        body["upstreams"] = snapshot()
+        body["pools"] = {
+            "google": pool_stats(google_client),
+            "openai": pool_stats(getattr(llm_client, "_client", None)),
+        }
+        body["password_hashing"] = password_hasher.stats()
+    return body
@@ -1,31 +1,51 @@
-from fastapi import APIRouter, HTTPException, Body, Query
+from fastapi import APIRouter, HTTPException, Body, Query, Request, Response
 import os
-import httpx
+
+from ..language_catalog import language_catalog
+from ..translation import translation_cache
 
 router = APIRouter(
     prefix="/languages",
     tags=["languages"],
 )
 
-GOOGLE_API_KEY = os.getenv("GOOGLE_TRANSLATE_API_KEY")
+TRANSLATE_BATCH_MAX = int(os.getenv("TRANSLATE_BATCH_MAX", 128))
+LANGUAGES_MAX_AGE   = int(os.getenv("LANGUAGES_MAX_AGE", 3600))
+LANGUAGES_STALE_WHILE_REVALIDATE = int(os.getenv("LANGUAGES_STALE_WHILE_REVALIDATE", 86400))
 
 
 @router.get("", summary="List supported languages")
 async def get_languages(
+    request: Request,
     target: str = Query("en", description="Locale to translate languages into"),
 ):
     """
     Returns a list of languages supported by Google Translate.
     Data is returned as a JSON payload, for example:
     [{ language: 'es', name: 'Spanish' }, …]
+
+    Served from a cached catalog; supports If-None-Match revalidation.
     """
-    url = "https://translation.googleapis.com/language/translate/v2/languages"
-    params = {"key": GOOGLE_API_KEY, "target": target}
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url, params=params, timeout=10.0)
-    if resp.status_code != 200:
-        raise HTTPException(resp.status_code, detail=resp.text)
-    return resp.json().get("data", {}).get("languages", [])
+    entry = await language_catalog.get(target)
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": (
+            f"public, max-age={LANGUAGES_MAX_AGE}, "
+            f"stale-while-revalidate={LANGUAGES_STALE_WHILE_REVALIDATE}"
+        ),
+        "Vary": "Accept-Encoding",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # weak comparison: proxies that compress the body downgrade ETags to W/"…"
+    candidates = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
 
 
 @router.post(
@@ -39,20 +59,28 @@ async def translate_text(
     target: str = Body(..., description="Target language code"),
 ):
     """
-    Translate arbitrary text via Google Translate API.
+    Translate arbitrary text via Google Translate API (cached).
     Returns: { "translation": "…translated text…" }
     """
-    url = "https://translation.googleapis.com/language/translate/v2"
-    params = {
-        "key": GOOGLE_API_KEY,
-        "q": text,
-        "source": source,
-        "target": target,
-        "format": "text",
-    }
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(url, params=params, timeout=10.0)
-    if resp.status_code != 200:
-        raise HTTPException(resp.status_code, detail=resp.text)
-    translated = resp.json()["data"]["translations"][0]["translatedText"]
+    [translated] = await translation_cache.translate_many([text], source, target)
     return {"translation": translated}
+
+
+@router.post(
+    "/translate/batch",
+    summary="Translate many strings at once",
+    response_model=dict,
+)
+async def translate_batch(
+    texts: list[str] = Body(..., description="Texts to translate"),
+    source: str = Body(..., description="Source language code"),
+    target: str = Body(..., description="Target language code"),
+):
+    """
+    Translate several strings with at most one upstream call for the misses.
+    Returns: { "translations": ["…", …] } in the same order as `texts`.
+    """
+    if len(texts) > TRANSLATE_BATCH_MAX:
+        raise HTTPException(400, f"At most {TRANSLATE_BATCH_MAX} texts per batch")
+    translations = await translation_cache.translate_many(texts, source, target)
+    return {"translations": translations}
@@ -4,12 +4,15 @@ import httpx, os
 from dotenv import load_dotenv
 load_dotenv()
 
+from ..http_client import get_http, google_timeout
+
 
 RECAPTCHA_SECRET = os.getenv("RECAPTCHA_SECRET_KEY")
 if not RECAPTCHA_SECRET:
     raise RuntimeError("RECAPTCHA_SECRET_KEY must be set")
+RECAPTCHA_TIMEOUT = float(os.getenv("RECAPTCHA_TIMEOUT", 5))
 
-async def verify_recaptcha(request: Request):
+async def verify_recaptcha(request: Request, http: httpx.AsyncClient = Depends(get_http)):
     """
     Extracts a reCAPTCHA token from either JSON body (key: 'recaptcha_token')
     or form-encoded body (key: 'token'), then calls Google's verify API.
@@ -29,12 +32,11 @@ async def verify_recaptcha(request: Request):
         raise HTTPException(status_code=400, detail="reCAPTCHA token missing")
 
     # 2) verify with Google
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            "https://www.google.com/recaptcha/api/siteverify",
-            data={"secret": RECAPTCHA_SECRET, "response": token},
-            timeout=5.0,
-        )
+    resp = await http.post(
+        "https://www.google.com/recaptcha/api/siteverify",
+        data={"secret": RECAPTCHA_SECRET, "response": token},
+        timeout=google_timeout(RECAPTCHA_TIMEOUT),
+    )
     data = resp.json()
     if not data.get("success"):
         raise HTTPException(status_code=400, detail="Invalid reCAPTCHA")
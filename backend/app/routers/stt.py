@@ -1,34 +1,41 @@
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Query
-import io
-import os
-from dotenv import load_dotenv
-from openai import OpenAI
-from ..users import fastapi_users, UserRead
+from fastapi import APIRouter, Depends, Query, Request
+from ..users import current_user, UserRead
+from ..transcription import transcribe_speech
+from ..audio_ingest import to_pcm16k, multipart_file_chunks
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+AUDIO_TYPES = {
+    "audio/wav", "audio/mpeg", "audio/mp3",
+    "audio/webm", "audio/x-wav", "audio/flac", "audio/ogg",
+}
+
+# the body is parsed by hand (see multipart_file_chunks), so document it here
+_UPLOAD_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": ["file"],
+            "properties": {"file": {"type": "string", "format": "binary"}},
+        }}},
+    },
+}
 
 router = APIRouter(prefix="/stt", tags=["stt"])
 
 
-@router.post("", summary="Transcribe uploaded audio via Whisper API")
+@router.post(
+    "",
+    summary="Transcribe uploaded audio via the configured Whisper backend",
+    openapi_extra=_UPLOAD_SCHEMA,
+)
 async def transcribe_audio(
-    file: UploadFile = File(...),
-    user: UserRead = Depends(fastapi_users.current_user()),
+    request: Request,
+    user: UserRead = Depends(current_user),
     language: str = Query(..., description="ISO code (e.g. 'es') – Whisper will use this language"),
 ):
-    # only accept common audio types
-    if file.content_type not in {
-        "audio/wav", "audio/mpeg", "audio/mp3",
-        "audio/webm", "audio/x-wav", "audio/flac", "audio/ogg"
-    }:
-        raise HTTPException(400, "Unsupported audio format")
-
-    audio_bytes = await file.read()
-    resp = client.audio.transcriptions.create(
-        file=io.BytesIO(audio_bytes),
-        model="whisper-1",
-        language=language,
-        response_format="text"
-    )
-    return {"text": resp.text}
+    # stream the `file` part (common audio types only) through ffmpeg →
+    # 16 kHz mono PCM; size caps are enforced before and while reading
+    pcm = await to_pcm16k(multipart_file_chunks(request, "file", AUDIO_TYPES))
+    # silence trimmed; a silent clip comes back as "" without a model call
+    text = await transcribe_speech(pcm, language)
+    return {"text": text}
@@ -1,64 +1,104 @@
 # backend/app/routers/tts.py
 
-import os
-from fastapi import APIRouter, HTTPException, Depends
+from typing import BinaryIO, Iterator
+from fastapi import APIRouter, HTTPException, Depends, Request
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from dotenv import load_dotenv
 
-from elevenlabs.client import ElevenLabs
-from ..users import fastapi_users, UserRead
-
-load_dotenv()
-
-ELEVEN_API_KEY = os.getenv("ELEVEN_API_KEY")
-if not ELEVEN_API_KEY:
-    raise RuntimeError("ELEVEN_API_KEY environment variable is required for TTS")
-
-# Instantiate the ElevenLabs client
-client = ElevenLabs(api_key=ELEVEN_API_KEY)
+from ..users import current_user, UserRead
+from ..upstreams import ELEVENLABS, record_success, record_error
+from ..audio_cache import audio_cache, cache_key, parse_range
+from ..speech import voice_catalog, open_stream, TTS_MODEL_ID, TTS_OUTPUT_FORMAT
 
 router = APIRouter(prefix="/tts", tags=["tts"])
 
 
 class TTSRequest(BaseModel):
     text: str
+    language: str | None = None  # target language code, picks a matching voice
 
 
 @router.post("", response_class=StreamingResponse)
 async def tts(
     body: TTSRequest,
-    user: UserRead = Depends(fastapi_users.current_user()),
+    request: Request,
+    user: UserRead = Depends(current_user),
 ):
     text = body.text.strip()
     if not text:
         raise HTTPException(status_code=400, detail="text required")
 
-    # 1) fetch available voices
+    # 1) pick a voice from the cached catalog (no extra round-trip)
     try:
-        resp = client.voices.search()      # use the new .voices.search() endpoint
-        voices_list = resp.voices
+        voice_id = await voice_catalog.voice_for(body.language)
     except Exception as e:
         raise HTTPException(status_code=502, detail=f"Failed to fetch TTS voices: {e}")
 
-    if not voices_list:
+    if not voice_id:
         raise HTTPException(status_code=500, detail="No TTS voices available")
-    voice_id = voices_list[0].voice_id
 
-    # 2) generate the audio as a streaming generator
+    # 2) serve from the content-addressed cache when we've said this before
+    key = cache_key(text, voice_id, TTS_MODEL_ID, TTS_OUTPUT_FORMAT)
+    cached = await run_in_threadpool(audio_cache.lookup, key)
+    if cached:
+        return _cached_response(*cached, key, request.headers.get("range"))
+
+    # 3) generate the audio as a streaming generator. convert() is lazy and only
+    #    calls ElevenLabs on the first next(), so pull the first chunk here: an
+    #    upstream error becomes a 502 and is recorded as such.
     try:
-        audio_stream = client.text_to_speech.convert(
-            text=text,
-            voice_id=voice_id,
-            model_id="eleven_multilingual_v2",  # recommended default
-            output_format="mp3_44100_128",       # you can adjust bitrate/sample rate here
-        )
+        audio_stream = open_stream(text, voice_id)
+        first = await run_in_threadpool(next, audio_stream, b"")
     except Exception as e:
+        record_error(ELEVENLABS, e)
         raise HTTPException(status_code=502, detail=f"TTS API error: {e}")
+    record_success(ELEVENLABS)
+
+    # 4) stream it back directly while writing it to the cache
+    return StreamingResponse(
+        audio_cache.tee(key, _tracked(first, audio_stream)),
+        media_type="audio/mpeg",
+        headers={"Cache-Control": "no-transform", "ETag": f'"{key}"'},
+    )
+
+
+def _tracked(first: bytes, rest: Iterator[bytes]) -> Iterator[bytes]:
+    """The upstream audio, recording ElevenLabs errors that happen mid-stream."""
+    yield first
+    try:
+        yield from rest
+    except Exception as e:
+        record_error(ELEVENLABS, e)
+        raise
+
+
+def _cached_response(f: BinaryIO, size: int, key: str, range_header: str | None) -> StreamingResponse:
+    headers = {
+        "Cache-Control": "no-transform",
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{key}"',
+    }
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        f.close()
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(audio_cache.read(f), media_type="audio/mpeg", headers=headers)
 
-    # 3) stream it back directly—FastAPI will chunk it out and CORS will apply
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
     return StreamingResponse(
-        audio_stream,
+        audio_cache.read(f, start, end),
+        status_code=206,
         media_type="audio/mpeg",
-        headers={"Cache-Control": "no-transform"}
+        headers=headers,
     )
@@ -1,20 +1,24 @@
 # backend/app/routers/voice_turn.py
 
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+import contextlib
+import json
+import uuid
+
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from fastapi.responses import JSONResponse
-import os
-from dotenv import load_dotenv
-from openai import OpenAI
+from fastapi.responses import JSONResponse, StreamingResponse
+from openai import AsyncOpenAI
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-
-from ..users import fastapi_users, UserRead
-from ..routers.conversations import get_db
-from ..models import Conversation as ConvModel, Message as MessageModel
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from ..users import current_user, UserRead
+from ..db import get_db
+from ..llm import get_llm, stream_text, CHAT_MODEL
+from ..history import append_turn, forget_history
+from ..turns import begin_turn, message_writer
+from ..summarizer import schedule_summary
+from ..prompts import build_system_prompt
+from ..speech import sentences_from, speak_in_order
 
 router = APIRouter()
 
@@ -27,99 +31,130 @@ class VoiceTurnIn(BaseModel):
     prompt: str | None = None
 
 
+async def _begin_turn(msg: VoiceTurnIn, user: UserRead, db: AsyncSession):
+    """Ensure the conversation, persist the user's words, build the chat payload."""
+    # ── 0+1) Conversation + user's “spoken” message in one statement (same as /chat)
+    turn = await begin_turn(
+        db,
+        user.id,
+        msg.conversation_id,
+        msg.native_language,
+        msg.target_language,
+        msg.prompt,
+        msg.text,
+    )
+
+    # ── 2) Build system instructions (same as /chat)
+    system_content = build_system_prompt(
+        msg.native_language,
+        msg.target_language,
+        prompt=turn.prompt,
+        summary=turn.summary,
+    )
+
+    messages = [
+        {"role": "system", "content": system_content},
+        *turn.window.as_messages(),
+        {"role": "user",   "content": msg.text},
+    ]
+    return turn.conversation_id, messages
+
+
 @router.post("/voice-turn")
 async def voice_turn(
     msg: VoiceTurnIn,
-    user: UserRead = Depends(fastapi_users.current_user()),
+    user: UserRead = Depends(current_user),
     db: AsyncSession = Depends(get_db),
+    llm: AsyncOpenAI = Depends(get_llm),
 ):
-    # ── 0) Ensure conversation (same as /chat)
-    if msg.conversation_id:
-        conv = await db.get(ConvModel, msg.conversation_id)
-        if not conv or conv.user_id != user.id:
-            raise HTTPException(404, "Conversation not found")
-        # if a prompt came in and none was saved, persist it
-        if msg.prompt and not conv.prompt:
-            conv.prompt = msg.prompt.strip()
-            db.add(conv)
-            await db.commit()
-            await db.refresh(conv)
-    else:
-        conv = ConvModel(
-            user_id=user.id,
-            source_language=msg.native_language,
-            target_language=msg.target_language,
-            prompt=msg.prompt.strip() if msg.prompt else None,
-        )
-        db.add(conv)
-        await db.commit()
-        await db.refresh(conv)
-
-    # ── 1) Persist the user’s “spoken” message
-    db.add(
-        MessageModel(
-            conversation_id=conv.id,
-            sender="user",
-            content=msg.text,
-        )
-    )
-    await db.commit()
-
-    # ── 2) Build system instructions (same as /chat)
-    parts: list[str] = []
-    if conv.prompt:
-        parts.append(f"Context: {conv.prompt.strip()}")
-
-    tutor = f"""
-You are a friendly {msg.target_language} tutor.
-Your name is Chatty Patty (Patty for short).
-The user’s native language is {msg.native_language},
-and they want to practice {msg.target_language}.
-
-**Rules:**
-1. Only ever use {msg.target_language} in your conversation—unless you are correcting a mistake.
-2. When you correct, **first** present the correction _in {msg.native_language}_, with a heading "Correction",
-   then leave a blank line, then continue your reply _in {msg.target_language}_
-   with a heading "Conversational response".
-3. The correction must **never** be in {msg.target_language}.
-4. The correction should explain why the user's attempt was wrong and why the correction is right.
-5. Always include exactly one blank line between the correction and the reply.
-6. If the user says everything correctly, no correction is needed.
-
-**Example:**
-User: “Yo comí manzanas ayer.”
-Assistant:
-“Correction (in {msg.native_language} (use the full verbose name for the language (for example "English" rather than "ES")):
-It looks like you were trying to say ‘I ate apples yesterday.’
-The correct way to say this in Spanish would be 'Ayer comí manzanas', because...”
-
-Conversational response:
-Cuéntame más sobre otras frutas que te gusten.
-""".strip()
-    parts.append(tutor)
-
-    system_content = "\n\n".join(parts)
+    conv_id, messages = await _begin_turn(msg, user, db)
 
     # ── 3) Call OpenAI (non‑streaming)
-    resp = client.chat.completions.create(
-        model="gpt-4.1",
-        messages=[
-            {"role": "system", "content": system_content},
-            {"role": "user",   "content": msg.text},
-        ],
+    resp = await llm.chat.completions.create(
+        model=CHAT_MODEL,
+        messages=messages,
         stream=False,
     )
     assistant_text = resp.choices[0].message.content or ""
 
-    # ── 4) Persist assistant reply
-    db.add(
-        MessageModel(
-            conversation_id=conv.id,
-            sender="assistant",
-            content=assistant_text.strip(),
-        )
-    )
-    await db.commit()
+    # ── 4) Persist assistant reply (write-behind, group-committed)
+    await message_writer.write(conv_id, "assistant", assistant_text.strip())
+    append_turn(conv_id, msg.text, assistant_text.strip())
+    schedule_summary(conv_id)
 
     # ── 5) Return assistant text for TTS
     return JSONResponse({"assistant_text": assistant_text})
+
+
+def _event(payload: dict) -> bytes:
+    return (json.dumps(payload, ensure_ascii=False) + "\n").encode()
+
+
+@router.post("/voice-turn/stream")
+async def voice_turn_stream(
+    msg: VoiceTurnIn,
+    user: UserRead = Depends(current_user),
+    db: AsyncSession = Depends(get_db),
+    llm: AsyncOpenAI = Depends(get_llm),
+):
+    """
+    Voice turn with audio that starts before the reply is finished.
+
+    The LLM reply is streamed, cut into sentences as they complete, and
+    sentences are synthesized concurrently. The response is NDJSON, in order:
+      {"type": "meta", "conversation_id"}
+      {"type": "sentence", "index", "text"} then {"type": "audio", "index", "audio": <base64 mp3>}
+      ...
+      {"type": "done", "assistant_text"}
+    or, if synthesis fails, {"type": "error", "detail", "assistant_text"}; the
+    text generated so far is stored either way.
+    """
+    conv_id, messages = await _begin_turn(msg, user, db)
+    reply_id = uuid.uuid4()  # same row whether the turn ends in done or error
+    reply_parts: list[str] = []
+    generated = False
+
+    async def deltas():
+        nonlocal generated
+        async for delta in stream_text(llm, messages):
+            reply_parts.append(delta)
+            yield delta
+        generated = True
+
+    async def persist(assistant_text: str):
+        await message_writer.write(conv_id, "assistant", assistant_text, reply_id)
+        append_turn(conv_id, msg.text, assistant_text)
+        schedule_summary(conv_id)
+
+    async def events():
+        yield _event({"type": "meta", "conversation_id": str(conv_id)})
+        try:
+            spoken = speak_in_order(sentences_from(deltas()), msg.target_language)
+            async for index, sentence, audio in spoken:
+                yield _event({"type": "sentence", "index": index, "text": sentence})
+                yield _event({
+                    "type": "audio",
+                    "index": index,
+                    "audio": base64.b64encode(audio).decode(),
+                })
+
+            assistant_text = "".join(reply_parts).strip()
+            await persist(assistant_text)
+            yield _event({"type": "done", "assistant_text": assistant_text})
+        except Exception as e:
+            # e.g. a sentence failed to synthesize: the text is already paid for, keep it
+            assistant_text = "".join(reply_parts).strip()
+            if assistant_text:
+                with contextlib.suppress(Exception):  # message_writer logs it
+                    await message_writer.write(
+                        conv_id, "assistant", assistant_text, reply_id,
+                        status="complete" if generated else "failed",
+                    )
+            forget_history(conv_id)
+            yield _event({"type": "error", "detail": str(e), "assistant_text": assistant_text})
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"},  # let nginx pass events through unbuffered
+    )
@@ -0,0 +1,245 @@
+# backend/app/routers/voice_ws.py
+"""
+Full-duplex voice session over one WebSocket: STT → tutor turn → TTS.
+
+Protocol (JSON text frames unless noted):
+  client → {"type": "start", "token", "native_language", "target_language",
+            "conversation_id"?, "prompt"?}          first frame, authenticates once
+  client → <binary audio frames>                     one utterance, e.g. MediaRecorder chunks
+  client → {"type": "end_utterance"}                 utterance complete, run the turn
+  client → {"type": "stop"}                          end the session
+  server → {"type": "ready", "conversation_id"}
+  server → {"type": "transcript", "text"}
+  server → {"type": "sentence", "index", "text"} followed by one binary mp3 frame
+  server → {"type": "turn_done", "assistant_text"}
+  server → {"type": "error", "detail"}
+
+Each stage (receive → transcribe → reply+synthesize → send) runs as its own
+task joined by bounded queues, so a slow stage pushes back on the one before
+it instead of buffering without limit. The conversation is authenticated once
+per session; each turn reads its history from the shared window cache and
+reloads the summary whenever that cache was dropped (e.g. a summary just
+absorbed older turns). A reply cut short by an LLM or TTS error is still
+stored, marked "failed".
+"""
+import asyncio
+import contextlib
+import json
+import os
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
+from openai import AsyncOpenAI
+
+from ..db import AsyncSessionLocal
+from ..history import load_window, append_turn, forget_history, has_history
+from ..llm import get_llm, stream_text
+from ..models import Conversation
+from ..prompts import build_system_prompt
+from ..speech import sentences_from, speak_in_order
+from ..summarizer import schedule_summary
+from ..turns import message_writer, open_conversation
+from ..transcription import transcribe_speech
+from ..audio_ingest import to_pcm16k, bytes_chunks
+from ..users import authenticate_token
+
+WS_AUTH_TIMEOUT         = float(os.getenv("WS_AUTH_TIMEOUT", 10))
+WS_MAX_UTTERANCE_BYTES  = int(os.getenv("WS_MAX_UTTERANCE_BYTES", 10 * 1024 * 1024))
+WS_UTTERANCE_QUEUE      = int(os.getenv("WS_UTTERANCE_QUEUE", 2))
+WS_OUTBOUND_QUEUE       = int(os.getenv("WS_OUTBOUND_QUEUE", 16))
+
+router = APIRouter()
+
+class _Session:
+    def __init__(self, ws: WebSocket, llm: AsyncOpenAI, conv, start: dict):
+        self.ws = ws
+        self.llm = llm
+        self.conv_id = conv.id
+        self.prompt = conv.prompt
+        self.summary = conv.summary
+        self.summarized_until = conv.summarized_until
+        self.native = start["native_language"]
+        self.target = start["target_language"]
+        self.utterances: asyncio.Queue = asyncio.Queue(maxsize=WS_UTTERANCE_QUEUE)
+        self.transcripts: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self.outbound: asyncio.Queue = asyncio.Queue(maxsize=WS_OUTBOUND_QUEUE)
+
+    async def send_json(self, payload: dict) -> None:
+        await self.outbound.put(("json", payload))
+
+    # ── stage 1: socket → utterances
+    async def receive(self) -> None:
+        chunks: list[bytes] = []
+        size = 0
+        while True:
+            frame = await self.ws.receive()
+            if frame["type"] == "websocket.disconnect":
+                # nobody left to speak to: cancel every stage
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            if frame.get("bytes") is not None:
+                size += len(frame["bytes"])
+                if size > WS_MAX_UTTERANCE_BYTES:
+                    await self.send_json({"type": "error", "detail": "utterance too large"})
+                    chunks, size = [], 0
+                    continue
+                chunks.append(frame["bytes"])
+                continue
+
+            try:
+                event = json.loads(frame.get("text") or "{}")
+            except ValueError:  # JSONDecodeError, or undecodable text
+                event = None
+            if not isinstance(event, dict):
+                # a bad frame is the client's problem, not a reason to drop the session
+                await self.send_json({"type": "error", "detail": "invalid control message"})
+                continue
+            if event.get("type") == "end_utterance":
+                if chunks:
+                    # blocks while earlier turns are still being processed
+                    await self.utterances.put(b"".join(chunks))
+                chunks, size = [], 0
+            elif event.get("type") == "stop":
+                break
+        # graceful stop: let queued turns finish, then wind down each stage
+        await self.utterances.put(None)
+
+    # ── stage 2: utterances → transcripts
+    async def transcribe(self) -> None:
+        while (audio := await self.utterances.get()) is not None:
+            try:
+                pcm = await to_pcm16k(bytes_chunks(audio))
+                text = await transcribe_speech(pcm, self.target)
+            except Exception as e:
+                await self.send_json({"type": "error", "detail": f"transcription failed: {e}"})
+                continue
+            await self.send_json({"type": "transcript", "text": text})
+            if text:
+                await self.transcripts.put(text)
+        await self.transcripts.put(None)
+
+    # ── stage 3: transcripts → reply sentences + audio
+    async def reply(self) -> None:
+        while (text := await self.transcripts.get()) is not None:
+            try:
+                await self._turn(text)
+            except Exception as e:
+                forget_history(self.conv_id)
+                await self.send_json({"type": "error", "detail": str(e)})
+        await self.outbound.put(None)
+
+    async def _history(self, exclude: uuid.UUID) -> list[dict]:
+        """Prior turns for the prompt, reloading the summary on a cache miss."""
+        async with AsyncSessionLocal() as db:
+            if not has_history(self.conv_id):
+                conv = await db.get(Conversation, self.conv_id)
+                if conv is None:
+                    raise RuntimeError("conversation not found")
+                self.summary, self.summarized_until = conv.summary, conv.summarized_until
+            window = await load_window(db, self.conv_id, since=self.summarized_until, exclude=exclude)
+            return window.as_messages()
+
+    async def _turn(self, text: str) -> None:
+        user_id, reply_id = uuid.uuid4(), uuid.uuid4()
+        persisted = asyncio.create_task(self._persist("user", text, user_id))
+        history = await self._history(exclude=user_id)
+        messages = [
+            {
+                "role": "system",
+                "content": build_system_prompt(
+                    self.native, self.target, prompt=self.prompt, summary=self.summary
+                ),
+            },
+            *history,
+            {"role": "user", "content": text},
+        ]
+        reply_parts: list[str] = []
+        generated = stored = False
+
+        async def deltas():
+            nonlocal generated
+            async for delta in stream_text(self.llm, messages):
+                reply_parts.append(delta)
+                yield delta
+            generated = True
+
+        try:
+            async for index, sentence, audio in speak_in_order(sentences_from(deltas()), self.target):
+                await self.send_json({"type": "sentence", "index": index, "text": sentence})
+                await self.outbound.put(("bytes", audio))
+
+            assistant_text = "".join(reply_parts).strip()
+            await persisted
+            await self._persist("assistant", assistant_text, reply_id)
+            stored = True
+        finally:
+            partial = "".join(reply_parts).strip()
+            if not stored and partial:
+                # cut short by the LLM, TTS or a disconnect: keep what was generated
+                with contextlib.suppress(Exception):  # message_writer logs it
+                    await asyncio.shield(self._persist(
+                        "assistant", partial, reply_id, "complete" if generated else "failed"
+                    ))
+        append_turn(self.conv_id, text, assistant_text)
+        schedule_summary(self.conv_id)
+        await self.send_json({"type": "turn_done", "assistant_text": assistant_text})
+
+    async def _persist(self, sender: str, content: str, message_id: uuid.UUID, status: str = "complete") -> None:
+        await message_writer.write(self.conv_id, sender, content, message_id, status)
+
+    # ── stage 4: outbound queue → socket
+    async def send(self) -> None:
+        while (item := await self.outbound.get()) is not None:
+            kind, payload = item
+            if kind == "bytes":
+                await self.ws.send_bytes(payload)
+            else:
+                await self.ws.send_json(payload)
+
+
+async def _open_session(ws: WebSocket, llm: AsyncOpenAI) -> _Session | None:
+    """Authenticate the first frame and load conversation state once."""
+    try:
+        start = await asyncio.wait_for(ws.receive_json(), timeout=WS_AUTH_TIMEOUT)
+    except (asyncio.TimeoutError, ValueError):
+        return None
+    if not isinstance(start, dict) or start.get("type") != "start" or not start.get("native_language") or not start.get("target_language"):
+        return None
+
+    user = await authenticate_token(start.get("token"))
+    if not user:
+        return None
+
+    async with AsyncSessionLocal() as db:
+        try:
+            conv = await open_conversation(
+                db,
+                user.id,
+                start.get("conversation_id"),
+                start["native_language"],
+                start["target_language"],
+                start.get("prompt"),
+            )
+        except HTTPException:
+            return None
+    return _Session(ws, llm, conv, start)
+
+
+@router.websocket("/ws/voice")
+async def voice_session(ws: WebSocket, llm: AsyncOpenAI = Depends(get_llm)):
+    await ws.accept()
+    session = await _open_session(ws, llm)
+    if session is None:
+        await ws.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await ws.send_json({"type": "ready", "conversation_id": str(session.conv_id)})
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(session.receive())
+            tg.create_task(session.transcribe())
+            tg.create_task(session.reply())
+            tg.create_task(session.send())
+    except* WebSocketDisconnect:
+        pass  # client went away; every stage has been cancelled
+    else:
+        await ws.close()
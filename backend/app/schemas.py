@@ -27,6 +27,9 @@ class MessageRead(BaseModel):
     sender: str
     content: str
     created_at: datetime
+    # "streaming": reply still being generated (content is partial);
+    # "failed": generation stopped early, content is what was produced
+    status: str = "complete"
 
 
 class ConversationRead(BaseModel):
@@ -41,6 +44,27 @@ class ConversationRead(BaseModel):
         orm_mode = True
 
 
+class ConversationSummary(BaseModel):
+    id: UUID
+    source_language: str
+    target_language: str
+    prompt: Optional[str] = None
+    created_at: datetime
+    message_count: int = 0
+    last_message_at: Optional[datetime] = None
+    last_message_preview: Optional[str] = None
+
+
+class ConversationPage(BaseModel):
+    items: List[ConversationSummary]
+    next_cursor: Optional[str] = None
+
+
+class MessagePage(BaseModel):
+    items: List[MessageRead]
+    next_cursor: Optional[str] = None
+
+
 class ConversationCreate(BaseModel):
     source_language: str
     target_language: str
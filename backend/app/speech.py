@@ -0,0 +1,140 @@
+# backend/app/speech.py
+"""
+ElevenLabs text-to-speech shared by /tts and the streaming voice endpoints.
+"""
+import asyncio
+import os
+import re
+from typing import AsyncIterator
+
+from dotenv import load_dotenv
+from elevenlabs.client import ElevenLabs
+from starlette.concurrency import run_in_threadpool
+
+from .audio_cache import audio_cache, cache_key
+from .upstreams import ELEVENLABS, record_success, record_error
+from .voices import VoiceCatalog
+
+load_dotenv()
+
+ELEVEN_API_KEY = os.getenv("ELEVEN_API_KEY")
+if not ELEVEN_API_KEY:
+    raise RuntimeError("ELEVEN_API_KEY environment variable is required for TTS")
+
+# Instantiate the ElevenLabs client
+client = ElevenLabs(api_key=ELEVEN_API_KEY)
+
+# cached voice list; pre-warmed and refreshed from the app lifespan
+voice_catalog = VoiceCatalog(lambda: client.voices.search(page_size=100).voices)
+
+TTS_MODEL_ID      = "eleven_multilingual_v2"  # recommended default
+TTS_OUTPUT_FORMAT = "mp3_44100_128"           # you can adjust bitrate/sample rate here
+
+# sentence end: terminal punctuation followed by whitespace, or a blank line
+_SENTENCE_END = re.compile(r"(?<=[.!?…。！？])\s+|\n\s*\n")
+MIN_SENTENCE_CHARS = int(os.getenv("TTS_MIN_SENTENCE_CHARS", 20))
+# sentences synthesized at once per streamed turn
+TTS_SENTENCE_CONCURRENCY = int(os.getenv("TTS_SENTENCE_CONCURRENCY", 3))
+
+
+def split_sentences(buffer: str) -> tuple[list[str], str]:
+    """
+    Cut complete sentences off the front of a growing LLM buffer.
+    Returns (sentences, remainder); very short fragments are held back and
+    merged with what follows so each synthesis call is worth its round-trip.
+    """
+    sentences: list[str] = []
+    start = 0
+    pending = ""
+    for match in _SENTENCE_END.finditer(buffer):
+        pending += buffer[start:match.start()] + " "
+        start = match.end()
+        if len(pending.strip()) >= MIN_SENTENCE_CHARS:
+            sentences.append(pending.strip())
+            pending = ""
+    return sentences, pending + buffer[start:]
+
+
+def open_stream(text: str, voice_id: str):
+    """Lazy ElevenLabs audio iterator (the request starts on first next())."""
+    return client.text_to_speech.convert(
+        text=text,
+        voice_id=voice_id,
+        model_id=TTS_MODEL_ID,
+        output_format=TTS_OUTPUT_FORMAT,
+    )
+
+
+def _synthesize_sync(text: str, voice_id: str) -> bytes:
+    key = cache_key(text, voice_id, TTS_MODEL_ID, TTS_OUTPUT_FORMAT)
+    cached = audio_cache.lookup(key)
+    if cached:
+        return b"".join(audio_cache.read(cached[0]))
+    try:
+        audio = b"".join(audio_cache.tee(key, open_stream(text, voice_id)))
+    except Exception as e:
+        record_error(ELEVENLABS, e)
+        raise
+    record_success(ELEVENLABS)
+    return audio
+
+
+async def synthesize(text: str, language: str | None = None) -> bytes:
+    """Whole-clip synthesis (through the audio cache) off the event loop."""
+    voice_id = await voice_catalog.voice_for(language)
+    if not voice_id:
+        raise RuntimeError("No TTS voices available")
+    return await run_in_threadpool(_synthesize_sync, text, voice_id)
+
+
+async def sentences_from(deltas: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Re-chunk streamed LLM text into speakable sentences."""
+    buffer = ""
+    async for delta in deltas:
+        buffer += delta
+        sentences, buffer = split_sentences(buffer)
+        for sentence in sentences:
+            yield sentence
+    if buffer.strip():
+        yield buffer.strip()
+
+
+async def speak_in_order(
+    sentences: AsyncIterator[str],
+    language: str | None = None,
+    concurrency: int = TTS_SENTENCE_CONCURRENCY,
+) -> AsyncIterator[tuple[int, str, bytes]]:
+    """
+    Synthesize sentences concurrently (at most `concurrency` at once) as they
+    arrive, yielding (index, sentence, mp3 bytes) strictly in reply order.
+    """
+    slots = asyncio.Semaphore(concurrency)
+    queue: asyncio.Queue = asyncio.Queue()
+    tasks: list[asyncio.Task] = []
+
+    async def speak(sentence: str) -> bytes:
+        async with slots:
+            return await synthesize(sentence, language)
+
+    async def produce():
+        try:
+            async for sentence in sentences:
+                task = asyncio.create_task(speak(sentence))
+                tasks.append(task)
+                await queue.put((sentence, task))
+        finally:
+            await queue.put(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        index = 0
+        while (item := await queue.get()) is not None:
+            sentence, task = item
+            yield index, sentence, await task
+            index += 1
+        await producer  # surface LLM errors
+    finally:
+        producer.cancel()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(producer, *tasks, return_exceptions=True)
@@ -0,0 +1,163 @@
+# backend/app/summarizer.py
+"""
+Rolling conversation summaries.
+
+The history window keeps at most HISTORY_MAX_MESSAGES messages and
+HISTORY_TOKEN_BUDGET tokens, so messages not yet covered by
+`Conversation.summary` must be folded into it before they outgrow either
+limit. Once there are more than SUMMARY_THRESHOLD such messages, or more than
+SUMMARY_TOKEN_THRESHOLD tokens of them, everything except the newest few
+(at most SUMMARY_KEEP_RECENT messages and half the token threshold) is folded
+into the stored summary and `Conversation.summarized_until` is advanced. The
+prompt then carries summary + recent turns instead of the whole history.
+Failed replies are left out, and nothing from a reply still being generated
+onward is folded.
+
+Runs as a fire-and-forget task after the turn, never on the request path.
+"""
+import asyncio
+import logging
+import os
+from uuid import UUID
+
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+from .db import AsyncSessionLocal
+from .history import HISTORY_MAX_MESSAGES, HISTORY_TOKEN_BUDGET, count_tokens, forget_history
+from .llm import llm_client, SUMMARY_MODEL
+from .models import Conversation, Message
+
+SUMMARY_THRESHOLD       = int(os.getenv("SUMMARY_THRESHOLD", HISTORY_MAX_MESSAGES))
+SUMMARY_TOKEN_THRESHOLD = int(os.getenv("SUMMARY_TOKEN_THRESHOLD", HISTORY_TOKEN_BUDGET * 3 // 4))
+SUMMARY_KEEP_RECENT     = int(os.getenv("SUMMARY_KEEP_RECENT", 10))
+
+logger = logging.getLogger(__name__)
+
+# Messages after summarized_until reach the prompt only through the history
+# window, so summarizing must start before they outgrow it; otherwise turns
+# between the two limits are in neither the window nor the summary.
+if SUMMARY_THRESHOLD > HISTORY_MAX_MESSAGES:
+    logger.warning(
+        "SUMMARY_THRESHOLD=%d exceeds HISTORY_MAX_MESSAGES=%d; using %d",
+        SUMMARY_THRESHOLD, HISTORY_MAX_MESSAGES, HISTORY_MAX_MESSAGES,
+    )
+    SUMMARY_THRESHOLD = HISTORY_MAX_MESSAGES
+if SUMMARY_TOKEN_THRESHOLD > HISTORY_TOKEN_BUDGET:
+    logger.warning(
+        "SUMMARY_TOKEN_THRESHOLD=%d exceeds HISTORY_TOKEN_BUDGET=%d; using %d",
+        SUMMARY_TOKEN_THRESHOLD, HISTORY_TOKEN_BUDGET, HISTORY_TOKEN_BUDGET,
+    )
+    SUMMARY_TOKEN_THRESHOLD = HISTORY_TOKEN_BUDGET
+# keeping as many messages as trigger a summary would leave nothing to fold
+if SUMMARY_KEEP_RECENT >= SUMMARY_THRESHOLD:
+    logger.warning(
+        "SUMMARY_KEEP_RECENT=%d must be below SUMMARY_THRESHOLD=%d; using %d",
+        SUMMARY_KEEP_RECENT, SUMMARY_THRESHOLD, max(SUMMARY_THRESHOLD - 1, 0),
+    )
+    SUMMARY_KEEP_RECENT = max(SUMMARY_THRESHOLD - 1, 0)
+
+_running: dict[UUID, asyncio.Task] = {}
+
+SUMMARY_INSTRUCTIONS = """
+You maintain the running memory of a language-tutoring conversation.
+Merge the previous summary (if any) with the new turns into one concise summary
+written in English, at most 200 words. Keep: facts the learner shared about
+themselves, topics and scenario details, vocabulary introduced, and recurring
+mistakes the learner makes. Drop greetings and filler.
+""".strip()
+
+
+def schedule_summary(conversation_id: UUID) -> None:
+    """Queue a summary check for this conversation unless one is already running."""
+    if conversation_id in _running:
+        return
+    task = asyncio.create_task(_summarize(conversation_id))
+    _running[conversation_id] = task
+    task.add_done_callback(lambda _t: _running.pop(conversation_id, None))
+
+
+async def cancel_summaries() -> None:
+    tasks = list(_running.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _unsummarized(conv: Conversation):
+    stmt = (
+        select(Message)
+        .where(Message.conversation_id == conv.id)
+        .where(Message.status != "failed")
+        .order_by(Message.created_at)
+    )
+    if conv.summarized_until is not None:
+        stmt = stmt.where(Message.created_at > conv.summarized_until)
+    return stmt
+
+
+def _to_fold(messages: list[Message]) -> list[Message]:
+    """
+    The oldest of the unsummarized `messages` (oldest first) to fold into the
+    summary, or [] while they are still well within the history window.
+    """
+    complete = [m for m in messages if m.status == "complete"]
+    tokens = [count_tokens(m.content) for m in complete]
+    if len(complete) <= SUMMARY_THRESHOLD and sum(tokens) <= SUMMARY_TOKEN_THRESHOLD:
+        return []
+
+    # keep a recent tail that leaves the window room for the next turns
+    keep = kept_tokens = 0
+    for n in reversed(tokens):
+        if keep >= SUMMARY_KEEP_RECENT or kept_tokens + n > SUMMARY_TOKEN_THRESHOLD // 2:
+            break
+        keep += 1
+        kept_tokens += n
+    older = complete[:len(complete) - keep]
+
+    # summarized_until must not pass a reply that is still being generated
+    streaming = [m.created_at for m in messages if m.status == "streaming"]
+    if streaming:
+        older = [m for m in older if m.created_at < min(streaming)]
+    return older
+
+
+async def _summarize(conversation_id: UUID) -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            conv = await db.get(Conversation, conversation_id)
+            if not conv:
+                return
+
+            pending = (await db.execute(_unsummarized(conv))).scalars().all()
+            older = await run_in_threadpool(_to_fold, pending)
+            if not older:
+                return
+
+            transcript = "\n".join(f"{m.sender}: {m.content}" for m in older)
+            user_block = (
+                f"Previous summary:\n{conv.summary or '(none)'}\n\n"
+                f"New turns:\n{transcript}"
+            )
+            resp = await llm_client.chat.completions.create(
+                model=SUMMARY_MODEL,
+                messages=[
+                    {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+                    {"role": "user", "content": user_block},
+                ],
+                stream=False,
+            )
+            summary = (resp.choices[0].message.content or "").strip()
+            if not summary:
+                return
+
+            conv.summary = summary
+            conv.summarized_until = older[-1].created_at
+            await db.commit()
+
+        # the cached window may still hold turns that are now in the summary
+        forget_history(conversation_id)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logger.exception("summarizing conversation %s failed", conversation_id)
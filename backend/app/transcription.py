@@ -0,0 +1,229 @@
+# backend/app/transcription.py
+"""
+Speech-to-text shared by /stt and the voice WebSocket.
+
+STT_BACKEND picks the engine:
+  - "openai" (default): hosted Whisper through the shared LLM gateway
+  - "faster-whisper": local CTranslate2 Whisper on CPU (int8), run in a
+    process pool whose workers load their models once at startup. Concurrent
+    requests are grouped by a micro-batching scheduler, and each flushed
+    batch is split into one pool call per worker (ceil(n / STT_WORKERS)
+    clips each): faster-whisper decodes one clip at a time, so the clips run
+    in parallel across processes while a call still amortizes IPC over a
+    few of them. If a worker dies
+    (e.g. killed for memory), the broken pool is dropped and the next request
+    starts a fresh one.
+
+Both take audio already normalized to 16 kHz mono s16le PCM by audio_ingest.
+"""
+import asyncio
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .audio_ingest import pcm_to_flac
+from .vad import speech_clips
+from .llm import llm_client, STT_MODEL, STT_TIMEOUT
+
+STT_BACKEND = os.getenv("STT_BACKEND", "openai")
+
+# faster-whisper settings
+STT_LOCAL_MODEL      = os.getenv("STT_LOCAL_MODEL", "small")
+# per-language overrides, e.g. "en:base.en,es:small"
+STT_LANGUAGE_MODELS  = os.getenv("STT_LANGUAGE_MODELS", "")
+STT_COMPUTE_TYPE     = os.getenv("STT_COMPUTE_TYPE", "int8")
+STT_WORKERS          = int(os.getenv("STT_WORKERS", 2))
+STT_CPU_THREADS      = int(os.getenv("STT_CPU_THREADS", 2))
+STT_BEAM_SIZE        = int(os.getenv("STT_BEAM_SIZE", 1))
+STT_BATCH_WINDOW_MS  = float(os.getenv("STT_BATCH_WINDOW_MS", 25))
+STT_MAX_BATCH        = int(os.getenv("STT_MAX_BATCH", 8))
+
+logger = logging.getLogger(__name__)
+
+
+class OpenAIWhisperBackend:
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def transcribe(self, pcm: bytes, language: str) -> str:
+        flac = await pcm_to_flac(pcm)
+        # default JSON response format → a Transcription object with .text
+        resp = await llm_client.with_options(timeout=STT_TIMEOUT).audio.transcriptions.create(
+            file=("audio.flac", flac, "audio/flac"),
+            model=STT_MODEL,
+            language=language,
+        )
+        return resp.text
+
+
+# ── faster-whisper: everything below `_worker_*` runs inside pool processes
+
+_worker_models: dict = {}
+
+
+def _worker_init(model_sizes: list[str], compute_type: str, cpu_threads: int) -> None:
+    from faster_whisper import WhisperModel
+
+    for size in model_sizes:
+        _worker_models[size] = WhisperModel(
+            size,
+            device="cpu",
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+        )
+
+
+def _worker_ping() -> int:
+    return len(_worker_models)
+
+
+def _worker_transcribe_batch(jobs: list[tuple[str, bytes, str]]) -> list[tuple[bool, str]]:
+    import numpy as np
+
+    results = []
+    for model_size, pcm, language in jobs:
+        try:
+            samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+            segments, _info = _worker_models[model_size].transcribe(
+                samples,
+                language=language,
+                beam_size=STT_BEAM_SIZE,
+            )
+            results.append((True, " ".join(s.text.strip() for s in segments).strip()))
+        except Exception as e:  # keep the rest of the batch alive
+            results.append((False, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def _parse_language_models(raw: str) -> dict[str, str]:
+    pairs = (item.split(":", 1) for item in raw.split(",") if ":" in item)
+    return {lang.strip().lower(): size.strip() for lang, size in pairs}
+
+
+class FasterWhisperBackend:
+    def __init__(self):
+        self._language_models = _parse_language_models(STT_LANGUAGE_MODELS)
+        self._model_sizes = sorted({STT_LOCAL_MODEL, *self._language_models.values()})
+        self._pool: ProcessPoolExecutor | None = None
+        self._pending: list[tuple[tuple[str, bytes, str], asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._running: set[asyncio.Task] = set()
+        self._start_lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        """
+        Spawn the pool and block until every worker has its models loaded.
+        Concurrent callers share one start; a pool that fails to warm up is
+        shut down so the next call tries again.
+        """
+        async with self._start_lock:
+            if self._pool is not None:
+                return
+            pool = ProcessPoolExecutor(
+                max_workers=STT_WORKERS,
+                initializer=_worker_init,
+                initargs=(self._model_sizes, STT_COMPUTE_TYPE, STT_CPU_THREADS),
+            )
+            loop = asyncio.get_running_loop()
+            try:
+                await asyncio.gather(*(
+                    loop.run_in_executor(pool, _worker_ping) for _ in range(STT_WORKERS)
+                ))
+            except BaseException:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+            self._pool = pool
+        logger.info("faster-whisper warm: %s x %d workers", self._model_sizes, STT_WORKERS)
+
+    async def stop(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _discard(self, pool: ProcessPoolExecutor) -> None:
+        """Drop a broken pool (unless a new one already replaced it)."""
+        if self._pool is pool:
+            self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _model_for(self, language: str) -> str:
+        return self._language_models.get(language.split("-")[0].lower(), STT_LOCAL_MODEL)
+
+    async def transcribe(self, pcm: bytes, language: str) -> str:
+        if self._pool is None:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append(((self._model_for(language), pcm, language), fut))
+        if len(self._pending) >= STT_MAX_BATCH:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(STT_BATCH_WINDOW_MS / 1000, self._flush)
+        ok, text = await fut
+        if not ok:
+            raise RuntimeError(f"local transcription failed: {text}")
+        return text
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        size = math.ceil(len(batch) / STT_WORKERS)
+        for i in range(0, len(batch), size or 1):
+            task = asyncio.create_task(self._run_batch(batch[i:i + size]))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, batch) -> None:
+        jobs = [job for job, _ in batch]
+        loop = asyncio.get_running_loop()
+        pool = self._pool
+        try:
+            if pool is None:  # the previous pool broke after these were queued
+                await self.start()
+                pool = self._pool
+            results = await loop.run_in_executor(pool, _worker_transcribe_batch, jobs)
+        except BrokenProcessPool as e:
+            logger.warning("faster-whisper pool broke, restarting on next request: %s", e)
+            if pool is not None:
+                self._discard(pool)
+            results = [(False, str(e) or "worker process died")] * len(batch)
+        except Exception as e:
+            results = [(False, str(e))] * len(batch)
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
+
+
+_BACKENDS = {
+    "openai": OpenAIWhisperBackend,
+    "faster-whisper": FasterWhisperBackend,
+}
+
+stt_backend = _BACKENDS[STT_BACKEND]()
+
+
+async def transcribe(pcm: bytes, language: str) -> str:
+    """Transcribe one normalized (16 kHz mono s16le) clip with the configured backend."""
+    return await stt_backend.transcribe(pcm, language)
+
+
+async def transcribe_speech(pcm: bytes, language: str) -> str:
+    """
+    Transcribe only the speech in a clip: silence is trimmed first, a silent
+    clip returns "" without touching the model, and long clips split at
+    pauses are transcribed concurrently and joined back in order. On the
+    local backend the segments land in one flush, which spreads them over
+    the worker processes.
+    """
+    clips = await speech_clips(pcm)
+    if not clips:
+        return ""
+    texts = await asyncio.gather(*(stt_backend.transcribe(clip, language) for clip in clips))
+    return " ".join(t.strip() for t in texts if t.strip())
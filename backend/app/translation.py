@@ -0,0 +1,204 @@
+# backend/app/translation.py
+"""
+Cached Google Translate lookups for /languages/translate.
+
+Translations are keyed on (text, source, target) and kept in an in-memory
+LRU with a TTL. TRANSLATE_CACHE_DB optionally names a SQLite file used as a
+second, persistent tier that survives restarts. Misses are batched into a
+single multi-`q` upstream call (chunked to Google's per-request limit), and
+concurrent lookups of the same key share one in-flight request instead of
+each calling Google.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from .http_client import google_client, google_timeout
+
+GOOGLE_API_KEY = os.getenv("GOOGLE_TRANSLATE_API_KEY")
+TRANSLATE_URL  = "https://translation.googleapis.com/language/translate/v2"
+
+TRANSLATE_CACHE_SIZE        = int(os.getenv("TRANSLATE_CACHE_SIZE", 10_000))
+TRANSLATE_CACHE_TTL         = float(os.getenv("TRANSLATE_CACHE_TTL", 24 * 3600))
+TRANSLATE_CACHE_DB          = os.getenv("TRANSLATE_CACHE_DB", "")
+TRANSLATE_CACHE_PERSIST_TTL = float(os.getenv("TRANSLATE_CACHE_PERSIST_TTL", 30 * 24 * 3600))
+TRANSLATE_TIMEOUT           = float(os.getenv("TRANSLATE_TIMEOUT", 10))
+# Google Translate v2 accepts at most 128 `q` segments per request
+TRANSLATE_UPSTREAM_BATCH    = 128
+
+Key = tuple[str, str, str]  # (text, source, target)
+
+logger = logging.getLogger(__name__)
+
+
+class _SqliteTier:
+    """Persistent second tier; blocking, so always called from a worker thread."""
+
+    def __init__(self, path: str, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " key TEXT PRIMARY KEY, translation TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+
+    @staticmethod
+    def _digest(key: Key) -> str:
+        return hashlib.sha256(json.dumps(key, ensure_ascii=False).encode()).hexdigest()
+
+    def get_many(self, keys: list[Key]) -> dict[Key, str]:
+        digests = {self._digest(k): k for k in keys}
+        placeholders = ",".join("?" * len(digests))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, translation FROM translations"
+                f" WHERE key IN ({placeholders}) AND stored_at > ?",
+                (*digests, time.time() - self.ttl),
+            ).fetchall()
+        return {digests[d]: translation for d, translation in rows}
+
+    def put_many(self, items: dict[Key, str]) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations (key, translation, stored_at) VALUES (?, ?, ?)",
+                [(self._digest(k), v, now) for k, v in items.items()],
+            )
+
+
+class TranslationCache:
+    def __init__(self, max_entries: int, ttl: float, persistent: _SqliteTier | None = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persistent = persistent
+        self._entries: "OrderedDict[Key, tuple[str, float]]" = OrderedDict()
+        self._inflight: dict[Key, asyncio.Future] = {}
+        self._fills: set[asyncio.Task] = set()
+
+    def _get(self, key: Key) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        translation, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return translation
+
+    def _put(self, key: Key, translation: str) -> None:
+        self._entries[key] = (translation, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def translate_many(self, texts: list[str], source: str, target: str) -> list[str]:
+        """Translations for `texts`, in order, from cache where possible."""
+        found: dict[Key, str] = {}
+        waiting: dict[Key, asyncio.Future] = {}
+        missing: list[Key] = []
+
+        def classify(keys) -> None:
+            for key in keys:
+                if key in self._inflight:
+                    waiting[key] = self._inflight[key]
+                else:
+                    missing.append(key)
+
+        candidates = []
+        for text in dict.fromkeys(texts):
+            key = (text, source, target)
+            if not text.strip():
+                found[key] = text
+            elif (hit := self._get(key)) is not None:
+                found[key] = hit
+            else:
+                candidates.append(key)
+        classify(candidates)
+
+        if missing and self.persistent is not None:
+            stored = await run_in_threadpool(self.persistent.get_many, missing)
+            for key, translation in stored.items():
+                self._put(key, translation)
+                found[key] = translation
+            # someone else may have started fetching these while we were reading
+            candidates, missing = [k for k in missing if k not in stored], []
+            classify(candidates)
+
+        if missing:
+            loop = asyncio.get_running_loop()
+            for key in missing:
+                self._inflight[key] = waiting[key] = loop.create_future()
+            # run detached so a cancelled caller can't strand other waiters
+            fill = asyncio.create_task(self._fill(missing, source, target))
+            self._fills.add(fill)
+            fill.add_done_callback(self._fills.discard)
+
+        for key, fut in waiting.items():
+            found[key] = await asyncio.shield(fut)
+        return [found[(text, source, target)] for text in texts]
+
+    async def _fill(self, keys: list[Key], source: str, target: str) -> None:
+        try:
+            chunks = [
+                keys[i:i + TRANSLATE_UPSTREAM_BATCH]
+                for i in range(0, len(keys), TRANSLATE_UPSTREAM_BATCH)
+            ]
+            results = await asyncio.gather(*(
+                _google_translate([k[0] for k in chunk], source, target) for chunk in chunks
+            ))
+        except asyncio.CancelledError:
+            for key in keys:
+                self._inflight.pop(key).cancel()
+            raise
+        except Exception as e:
+            for key in keys:
+                fut = self._inflight.pop(key)
+                fut.set_exception(e)
+                fut.exception()  # mark retrieved when nobody is waiting
+            return
+
+        translated = dict(zip(keys, (t for chunk in results for t in chunk)))
+        for key, translation in translated.items():
+            self._put(key, translation)
+            self._inflight.pop(key).set_result(translation)
+        if self.persistent is not None:
+            try:
+                await run_in_threadpool(self.persistent.put_many, translated)
+            except Exception:
+                logger.exception("persisting %d translations failed", len(translated))
+
+
+async def _google_translate(texts: list[str], source: str, target: str) -> list[str]:
+    """One multi-`q` Google Translate call; results come back in request order."""
+    payload = {"q": texts, "source": source, "target": target, "format": "text"}
+    resp = await google_client.post(
+        TRANSLATE_URL,
+        params={"key": GOOGLE_API_KEY},
+        json=payload,
+        timeout=google_timeout(TRANSLATE_TIMEOUT),
+    )
+    if resp.status_code != 200:
+        raise HTTPException(resp.status_code, detail=resp.text)
+    return [t["translatedText"] for t in resp.json()["data"]["translations"]]
+
+
+translation_cache = TranslationCache(
+    TRANSLATE_CACHE_SIZE,
+    TRANSLATE_CACHE_TTL,
+    persistent=(
+        _SqliteTier(TRANSLATE_CACHE_DB, TRANSLATE_CACHE_PERSIST_TTL) if TRANSLATE_CACHE_DB else None
+    ),
+)
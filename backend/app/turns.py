@@ -0,0 +1,365 @@
+# backend/app/turns.py
+"""
+Write path for chat and voice turns.
+
+begin_turn() resolves (or creates) the conversation and inserts the user's
+message in a single statement, using data-modifying CTEs with RETURNING. No
+separate SELECT, commit per step or refresh is needed. Assistant replies go
+through message_writer, a write-behind buffer. Replies that finish within
+MESSAGE_FLUSH_MS of each other are group-committed as one multi-row INSERT.
+Rows carry ids generated here, so a retried flush cannot duplicate them, and
+writing an id again updates that message (replies persisted while streaming).
+Callers await their row's flush, so a turn is only reported done once its
+reply is stored.
+"""
+import asyncio
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import and_, func, insert, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db import AsyncSessionLocal
+from .history import HistoryWindow, load_window, start_history
+from .models import Conversation, Message
+
+MESSAGE_FLUSH_MS      = float(os.getenv("MESSAGE_FLUSH_MS", 20))
+MESSAGE_FLUSH_BATCH   = int(os.getenv("MESSAGE_FLUSH_BATCH", 100))
+MESSAGE_FLUSH_RETRIES = int(os.getenv("MESSAGE_FLUSH_RETRIES", 3))
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Turn:
+    conversation_id: UUID
+    prompt: str | None
+    summary: str | None
+    summarized_until: datetime | None
+    user_message_id: UUID
+    window: HistoryWindow  # prior turns, without the message just inserted
+
+
+def _parse_id(raw: str) -> UUID:
+    try:
+        return UUID(str(raw))
+    except ValueError:
+        raise HTTPException(404, "Conversation not found")
+
+
+_RETURNED = (
+    Conversation.id,
+    Conversation.prompt,
+    Conversation.summary,
+    Conversation.summarized_until,
+)
+
+
+def _conversation_cte(
+    user_id: UUID,
+    conversation_id: str | None,
+    native_language: str,
+    target_language: str,
+    prompt: str | None,
+):
+    """
+    CTE "conv" yielding the user's conversation (saving a first prompt), or a
+    newly inserted one when no id is given. Empty if the id isn't the user's.
+    """
+    prompt = prompt.strip() if prompt else None
+    if conversation_id:
+        owned = (Conversation.id == _parse_id(conversation_id), Conversation.user_id == user_id)
+        if prompt:
+            return (
+                update(Conversation)
+                .where(*owned)
+                .values(prompt=func.coalesce(func.nullif(Conversation.prompt, ""), prompt))
+                .returning(*_RETURNED)
+                .cte("conv")
+            )
+        return select(*_RETURNED).where(*owned).cte("conv")
+    return (
+        insert(Conversation)
+        .values(
+            id=uuid.uuid4(),
+            user_id=user_id,
+            source_language=native_language,
+            target_language=target_language,
+            prompt=prompt,
+        )
+        .returning(*_RETURNED)
+        .cte("conv")
+    )
+
+
+async def open_conversation(
+    db: AsyncSession,
+    user_id: UUID,
+    conversation_id: str | None,
+    native_language: str,
+    target_language: str,
+    prompt: str | None,
+):
+    """
+    Resolve or create the conversation without adding a message (a voice
+    session opening), in one statement. Returns a row of id, prompt, summary
+    and summarized_until; raises 404 for an unknown or malformed id.
+    """
+    conv = _conversation_cte(user_id, conversation_id, native_language, target_language, prompt)
+    row = (await db.execute(select(conv))).one_or_none()
+    if row is None:
+        await db.rollback()
+        raise HTTPException(404, "Conversation not found")
+    await db.commit()
+    if not conversation_id:
+        start_history(row.id)
+    return row
+
+
+async def begin_turn(
+    db: AsyncSession,
+    user_id: UUID,
+    conversation_id: str | None,
+    native_language: str,
+    target_language: str,
+    prompt: str | None,
+    text: str,
+) -> Turn:
+    """
+    Ensure the conversation and persist the user's message in one statement.
+    A prompt sent with the turn is saved only if the conversation has none yet.
+    """
+    conv = _conversation_cte(user_id, conversation_id, native_language, target_language, prompt)
+
+    message_id = uuid.uuid4()
+    user_message = (
+        insert(Message)
+        .from_select(
+            ["id", "conversation_id", "sender", "content"],
+            select(
+                literal(message_id, Message.id.type),
+                conv.c.id,
+                literal("user"),
+                literal(text),
+            ),
+        )
+        .returning(Message.id)
+        .cte("user_message")
+    )
+    stmt = select(conv.c.id, conv.c.prompt, conv.c.summary, conv.c.summarized_until).add_cte(user_message)
+    row = (await db.execute(stmt)).one_or_none()
+    if row is None:
+        await db.rollback()
+        raise HTTPException(404, "Conversation not found")
+    await db.commit()
+
+    if conversation_id:
+        window = await load_window(db, row.id, since=row.summarized_until, exclude=message_id)
+    else:
+        start_history(row.id)
+        window = HistoryWindow()
+    return Turn(
+        conversation_id=row.id,
+        prompt=row.prompt,
+        summary=row.summary,
+        summarized_until=row.summarized_until,
+        user_message_id=message_id,
+        window=window,
+    )
+
+
+async def create_conversation(
+    db: AsyncSession,
+    user_id: UUID,
+    source_language: str,
+    target_language: str,
+    prompt: str | None,
+    opening: str | None = None,
+):
+    """
+    Insert a conversation and, optionally, its opening assistant ("bot")
+    message in one statement. The returned row has the conversation's columns
+    plus message_id/message_created_at when an opening message was stored.
+    """
+    conv = (
+        insert(Conversation)
+        .values(
+            id=uuid.uuid4(),
+            user_id=user_id,
+            source_language=source_language,
+            target_language=target_language,
+            prompt=prompt,
+        )
+        .returning(
+            Conversation.id,
+            Conversation.source_language,
+            Conversation.target_language,
+            Conversation.prompt,
+            Conversation.created_at,
+        )
+        .cte("conv")
+    )
+    stmt = select(conv)
+    if opening is not None:
+        first = (
+            insert(Message)
+            .from_select(
+                ["id", "conversation_id", "sender", "content"],
+                select(literal(uuid.uuid4(), Message.id.type), conv.c.id, literal("bot"), literal(opening)),
+            )
+            .returning(Message.id, Message.conversation_id, Message.created_at)
+            .cte("first_message")
+        )
+        stmt = (
+            select(
+                conv,
+                first.c.id.label("message_id"),
+                first.c.created_at.label("message_created_at"),
+            )
+            .join_from(conv, first, first.c.conversation_id == conv.c.id)
+        )
+    row = (await db.execute(stmt)).one()
+    await db.commit()
+    if opening is None:
+        start_history(row.id)
+    return row
+
+
+class MessageWriter:
+    """Write-behind buffer for messages, group-committed in small batches."""
+
+    def __init__(self, flush_ms: float, max_batch: int):
+        self.flush_ms = flush_ms
+        self.max_batch = max_batch
+        # keyed by message id: a newer write of the same message replaces the
+        # buffered content instead of adding a second row to the batch
+        self._pending: dict[UUID, tuple[dict, list[asyncio.Future]]] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._running: set[asyncio.Task] = set()
+
+    def submit(
+        self,
+        conversation_id: UUID,
+        sender: str,
+        content: str,
+        message_id: UUID,
+        status: str = "complete",
+    ) -> asyncio.Future:
+        """
+        Queue a write without waiting for it. Writing the same message id again
+        updates its content and status while it is still "streaming": a
+        snapshot only replaces a shorter one, and once the final version
+        ("complete"/"failed") is stored, late snapshots can't touch it.
+        """
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        row = {
+            "id": message_id,
+            "conversation_id": conversation_id,
+            "sender": sender,
+            "content": content,
+            "status": status,
+        }
+        pending = self._pending.get(message_id)
+        if pending is not None:
+            pending[1].append(fut)
+            if not (status == "streaming" and pending[0]["status"] != "streaming"):
+                self._pending[message_id] = (row, pending[1])
+        else:
+            self._pending[message_id] = (row, [fut])
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_ms / 1000, self._flush)
+        return fut
+
+    async def write(
+        self,
+        conversation_id: UUID,
+        sender: str,
+        content: str,
+        message_id: UUID | None = None,
+        status: str = "complete",
+    ) -> UUID:
+        """Queue one message; returns its id once the batch holding it is committed."""
+        message_id = message_id or uuid.uuid4()
+        fut = self.submit(conversation_id, sender, content, message_id, status)
+        # a caller that goes away must not take the write with it
+        await asyncio.shield(fut)
+        return message_id
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = list(self._pending.values()), {}
+        if batch:
+            task = asyncio.create_task(self._write_batch(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    @staticmethod
+    def _statement(rows: list[dict]):
+        # clock_timestamp() per row keeps queue order in created_at
+        stmt = pg_insert(Message).values([{**row, "created_at": func.clock_timestamp()} for row in rows])
+        return stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={"content": stmt.excluded.content, "status": stmt.excluded.status},
+            where=and_(
+                Message.status == "streaming",
+                or_(
+                    stmt.excluded.status != "streaming",
+                    func.length(stmt.excluded.content) >= func.length(Message.content),
+                ),
+            ),
+        )
+
+    async def _execute(self, rows: list[dict]) -> Exception | None:
+        """Insert/update `rows` in one transaction; returns the error if it never succeeded."""
+        error: Exception | None = None
+        for attempt in range(MESSAGE_FLUSH_RETRIES):
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(self._statement(rows))
+                    await db.commit()
+                return None
+            except IntegrityError as e:
+                return e  # e.g. the conversation was deleted meanwhile; retrying won't help
+            except Exception as e:
+                error = e
+                await asyncio.sleep(0.05 * 2 ** attempt)
+        return error
+
+    async def _write_batch(self, batch) -> None:
+        error = await self._execute([row for row, _ in batch])
+        if isinstance(error, IntegrityError) and len(batch) > 1:
+            # one bad row must not sink the other conversations' messages
+            for item in batch:
+                await self._write_batch([item])
+            return
+        if error is not None:
+            logger.error("writing %d messages failed: %s", len(batch), error)
+        for _, futs in batch:
+            for fut in futs:
+                if fut.done():
+                    continue
+                if error is None:
+                    fut.set_result(None)
+                else:
+                    fut.set_exception(error)
+                    fut.exception()  # the caller may be gone; don't warn about it
+
+    async def drain(self) -> None:
+        """Flush everything still buffered (app shutdown)."""
+        self._flush()
+        await asyncio.gather(*self._running, return_exceptions=True)
+
+
+message_writer = MessageWriter(MESSAGE_FLUSH_MS, MESSAGE_FLUSH_BATCH)
@@ -0,0 +1,112 @@
+# backend/app/upstreams.py
+"""
+Passive health of third-party upstreams (OpenAI, ElevenLabs, Google).
+
+Call sites record the outcome of calls they make anyway; the readiness probe
+only reads these timestamps, so it never makes a network call itself. The
+httpx clients record through TrackedTransport, which also sees connect errors
+and timeouts (no response, so response hooks never fire). A 429 marks the
+upstream "degraded" rather than up.
+"""
+import os
+import time
+
+import httpx
+
+UPSTREAM_STALE_SECONDS = float(os.getenv("UPSTREAM_STALE_SECONDS", 300))
+
+OPENAI     = "openai"
+ELEVENLABS = "elevenlabs"
+GOOGLE     = "google"
+
+_last_ok: dict[str, float] = {}
+_last_error: dict[str, float] = {}
+_last_limited: dict[str, float] = {}
+
+
+def record_success(name: str) -> None:
+    _last_ok[name] = time.time()
+
+
+def record_failure(name: str) -> None:
+    _last_error[name] = time.time()
+
+
+def record_degraded(name: str) -> None:
+    """The upstream answered but is rate limiting us (429)."""
+    _last_limited[name] = time.time()
+
+
+def record_status(name: str, status_code: int) -> None:
+    if status_code >= 500:
+        record_failure(name)
+    elif status_code == 429:
+        record_degraded(name)
+    else:
+        record_success(name)
+
+
+def record_error(name: str, exc: BaseException) -> None:
+    """A call raised: SDK errors that carry an HTTP status are classified by it."""
+    status_code = getattr(exc, "status_code", None)
+    if isinstance(status_code, int):
+        record_status(name, status_code)
+    else:
+        record_failure(name)
+
+
+def upstream_status(name: str) -> dict:
+    ok_at = _last_ok.get(name)
+    err_at = _last_error.get(name)
+    limited_at = _last_limited.get(name)
+    seen = [
+        (at, state)
+        for at, state in ((ok_at, "up"), (limited_at, "degraded"), (err_at, "failing"))
+        if at is not None
+    ]
+    if not seen:
+        state = "unknown"
+    else:
+        at, state = max(seen)  # newest outcome wins; a tie favours "up" as before
+        if state != "failing" and time.time() - at > UPSTREAM_STALE_SECONDS:
+            state = "stale"
+    return {"status": state, "last_success": ok_at, "last_error": err_at, "last_rate_limited": limited_at}
+
+
+def snapshot() -> dict:
+    return {name: upstream_status(name) for name in (OPENAI, ELEVENLABS, GOOGLE)}
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, upstream: str):
+        self._stream = stream
+        self._upstream = upstream
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        except httpx.TransportError:  # e.g. a read timeout mid-stream
+            record_failure(self._upstream)
+            raise
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+
+
+class TrackedTransport(httpx.AsyncHTTPTransport):
+    """Pooled httpx transport that records every call's outcome for `upstream`."""
+
+    def __init__(self, upstream: str, **kwargs):
+        super().__init__(**kwargs)
+        self.upstream = upstream
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        try:
+            response = await super().handle_async_request(request)
+        except httpx.TransportError:  # connect errors, timeouts, pool exhaustion
+            record_failure(self.upstream)
+            raise
+        record_status(self.upstream, response.status_code)
+        response.stream = _TrackedStream(response.stream, self.upstream)
+        return response
@@ -1,38 +1,201 @@
 # backend/app/users.py
 
+import hashlib
+import hmac
 import os
+import time
+from collections import OrderedDict
 from typing import AsyncGenerator, Optional
 from uuid import UUID
-from fastapi import Depends, Request
-from fastapi_users import FastAPIUsers
+
+import jwt
+from fastapi import Depends, HTTPException, Request, status
+from fastapi_users import FastAPIUsers, exceptions
 from fastapi_users.authentication import AuthenticationBackend, BearerTransport, JWTStrategy
+from fastapi_users.jwt import decode_jwt, generate_jwt
 from fastapi_users.manager import BaseUserManager, UUIDIDMixin
 from fastapi_users.db import SQLAlchemyUserDatabase
 
-from .db import AsyncSessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db import get_db, AsyncSessionLocal
 from .models import UserTable
+from .passwords import password_hasher, password_helper
 from .schemas import UserRead, UserCreate, UserUpdate  # ← import the three Pydantic schemas you defined
 
 # ————— Database adapter & UserManager —————
 
 
-async def get_user_db() -> AsyncGenerator[SQLAlchemyUserDatabase, None]:
-    async with AsyncSessionLocal() as session:
-        yield SQLAlchemyUserDatabase(session, UserTable)
+async def get_user_db(
+    session: AsyncSession = Depends(get_db),
+) -> AsyncGenerator[SQLAlchemyUserDatabase, None]:
+    yield SQLAlchemyUserDatabase(session, UserTable)
 
 
 SECRET = os.getenv("SECRET_KEY", "CHANGE_THIS_IN_PROD")
 
+# authenticated principals cached per token, so hot routes skip the user lookup
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 10_000))
+# upper bound on staleness: other workers can't see this worker's invalidations
+AUTH_CACHE_TTL  = float(os.getenv("AUTH_CACHE_TTL", 300))
+
+
+class PrincipalCache:
+    """
+    token → UserRead snapshot, LRU-bounded. An entry lives until the token's
+    own `exp` or AUTH_CACHE_TTL, whichever comes first, and every token of a
+    user is dropped when that user is updated, deactivated or deleted.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[UserRead, float]]" = OrderedDict()
+        self._tokens_by_user: dict[UUID, set[str]] = {}
+
+    def get(self, token: str) -> Optional[UserRead]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if time.time() >= expires_at:
+            self._drop(token)
+            return None
+        self._entries.move_to_end(token)
+        return user
+
+    def put(self, token: str, user: UserRead) -> None:
+        try:
+            exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        except jwt.PyJWTError:
+            return
+        expires_at = min(exp or float("inf"), time.time() + self.ttl)
+        self._entries[token] = (user, expires_at)
+        self._entries.move_to_end(token)
+        self._tokens_by_user.setdefault(user.id, set()).add(token)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, token: str) -> None:
+        user, _ = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(user.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user.id]
+
+    def invalidate_user(self, user_id: UUID) -> None:
+        for token in list(self._tokens_by_user.get(user_id, ())):
+            self._drop(token)
+
+
+principal_cache = PrincipalCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+
 
 class UserManager(UUIDIDMixin, BaseUserManager[UserTable, UUID]):
     reset_password_token_secret = SECRET
     verification_token_secret   = SECRET
 
+    # cached principals must not outlive a change to the user
+    async def on_after_update(self, user, update_dict, request: Optional[Request] = None):
+        principal_cache.invalidate_user(user.id)
+
+    async def on_after_reset_password(self, user, request: Optional[Request] = None):
+        principal_cache.invalidate_user(user.id)
+
+    async def on_after_delete(self, user, request: Optional[Request] = None):
+        principal_cache.invalidate_user(user.id)
+
+    # hashing goes through the password pool instead of blocking the loop:
+    # every BaseUserManager method that hashes synchronously is overridden
+    async def create(self, user_create: UserCreate, safe: bool = False, request: Optional[Request] = None) -> UserTable:
+        await self.validate_password(user_create.password, user_create)
+        if await self.user_db.get_by_email(user_create.email) is not None:
+            raise exceptions.UserAlreadyExists()
+
+        user_dict = (
+            user_create.create_update_dict() if safe else user_create.create_update_dict_superuser()
+        )
+        user_dict["hashed_password"] = await password_hasher.hash(user_dict.pop("password"))
+        created_user = await self.user_db.create(user_dict)
+        await self.on_after_register(created_user, request)
+        return created_user
+
+    # Reset tokens pin the password hash they were issued for. fastapi-users
+    # bcrypts that hash into the (readable) token; a keyed HMAC is as opaque
+    # and takes microseconds.
+    def _password_fingerprint(self, hashed_password: str) -> str:
+        key = str(self.reset_password_token_secret).encode()
+        return hmac.new(key, hashed_password.encode(), hashlib.sha256).hexdigest()
+
+    async def forgot_password(self, user: UserTable, request: Optional[Request] = None) -> None:
+        if not user.is_active:
+            raise exceptions.UserInactive()
+        token = generate_jwt(
+            {
+                "sub": str(user.id),
+                "password_fgpt": self._password_fingerprint(user.hashed_password),
+                "aud": self.reset_password_token_audience,
+            },
+            self.reset_password_token_secret,
+            self.reset_password_token_lifetime_seconds,
+        )
+        await self.on_after_forgot_password(user, token, request)
+
+    async def reset_password(self, token: str, password: str, request: Optional[Request] = None) -> UserTable:
+        try:
+            data = decode_jwt(token, self.reset_password_token_secret, [self.reset_password_token_audience])
+            user_id, fingerprint = data["sub"], data["password_fgpt"]
+            parsed_id = self.parse_id(user_id)
+        except (jwt.PyJWTError, KeyError, exceptions.InvalidID):
+            raise exceptions.InvalidResetPasswordToken()
+
+        user = await self.get(parsed_id)
+        if fingerprint.startswith("$"):
+            # bcrypt fingerprint from a token issued before the HMAC one
+            valid, _ = await password_hasher.verify_and_update(user.hashed_password, fingerprint)
+        else:
+            valid = hmac.compare_digest(fingerprint, self._password_fingerprint(user.hashed_password))
+        if not valid:
+            raise exceptions.InvalidResetPasswordToken()
+        if not user.is_active:
+            raise exceptions.UserInactive()
+
+        updated_user = await self._update(user, {"password": password})
+        await self.on_after_reset_password(user, request)
+        return updated_user
+
+    async def authenticate(self, credentials) -> Optional[UserTable]:
+        try:
+            user = await self.get_by_email(credentials.username)
+        except exceptions.UserNotExists:
+            # still pay for a hash so unknown emails aren't distinguishable by timing
+            await password_hasher.hash(credentials.password)
+            return None
+
+        verified, updated_hash = await password_hasher.verify_and_update(
+            credentials.password, user.hashed_password
+        )
+        if not verified:
+            return None
+        # transparent upgrade when the configured cost (or scheme) changed
+        if updated_hash is not None:
+            await self.user_db.update(user, {"hashed_password": updated_hash})
+        return user
+
+    async def _update(self, user: UserTable, update_dict: dict) -> UserTable:
+        password = update_dict.get("password")
+        if password is not None:
+            await self.validate_password(password, user)
+            update_dict = {k: v for k, v in update_dict.items() if k != "password"}
+            update_dict["hashed_password"] = await password_hasher.hash(password)
+        return await super()._update(user, update_dict)
+
 
 async def get_user_manager(
     user_db=Depends(get_user_db),
 ) -> AsyncGenerator[UserManager, None]:
-    yield UserManager(user_db)
+    yield UserManager(user_db, password_helper)
 
 
 # ————— JWT authentication backend —————
@@ -49,6 +212,37 @@ auth_backend = AuthenticationBackend(
 )
 
 
+async def authenticate_token(token: Optional[str]) -> Optional[UserRead]:
+    """
+    Resolve a bearer token to its user, from the principal cache when possible.
+    Misses verify the JWT and load the user in their own short-lived session,
+    so no connection is held afterwards (also usable from WebSockets).
+    """
+    if not token:
+        return None
+    if (user := principal_cache.get(token)) is not None:
+        return user
+    async with AsyncSessionLocal() as session:
+        manager = UserManager(SQLAlchemyUserDatabase(session, UserTable), password_helper)
+        db_user = await get_jwt_strategy().read_token(token, manager)
+    if db_user is None:
+        return None
+    user = UserRead.model_validate(db_user)
+    principal_cache.put(token, user)
+    return user
+
+
+async def current_user(token: Optional[str] = Depends(bearer_transport.scheme)) -> UserRead:
+    """
+    Route dependency for the signed-in user (same contract as
+    fastapi_users.current_user(): 401 without a valid token).
+    """
+    user = await authenticate_token(token)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    return user
+
+
 # ————— fastapi_users instance & Routers —————
 
 fastapi_users = FastAPIUsers[UserTable, UUID](
@@ -0,0 +1,109 @@
+# backend/app/vad.py
+"""
+Energy-based voice activity detection over 16 kHz mono s16le PCM.
+
+The clip is cut into fixed frames and each frame's level (dBFS) is computed
+in one vectorized pass. A frame counts as speech when it is louder than both
+an absolute floor and the clip's own noise floor plus a margin, so quiet rooms
+and noisy ones are handled alike. Short gaps are bridged, short blips are
+dropped and each segment is padded slightly so word onsets are not clipped.
+
+speech_clips() is what /stt uses: leading/trailing silence trimmed, nothing at
+all for a silent recording, and long recordings split at pauses into pieces
+that can be transcribed in parallel.
+"""
+import os
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from .audio_ingest import SAMPLE_RATE
+
+VAD_FRAME_MS          = int(os.getenv("VAD_FRAME_MS", 30))
+VAD_MIN_DBFS          = float(os.getenv("VAD_MIN_DBFS", -50))
+VAD_NOISE_MARGIN_DB   = float(os.getenv("VAD_NOISE_MARGIN_DB", 10))
+# ceiling for the adaptive threshold, so a clip with no pauses isn't all "noise"
+VAD_MAX_DBFS          = float(os.getenv("VAD_MAX_DBFS", -35))
+VAD_MIN_SPEECH_MS     = int(os.getenv("VAD_MIN_SPEECH_MS", 150))
+VAD_MIN_SILENCE_MS    = int(os.getenv("VAD_MIN_SILENCE_MS", 300))
+VAD_PAD_MS            = int(os.getenv("VAD_PAD_MS", 150))
+# 0 disables splitting; otherwise clips longer than this are cut at pauses
+VAD_SPLIT_SECONDS     = float(os.getenv("VAD_SPLIT_SECONDS", 30))
+
+_FRAME = SAMPLE_RATE * VAD_FRAME_MS // 1000
+
+
+def _frames(ms: int) -> int:
+    return max(1, round(ms / VAD_FRAME_MS))
+
+
+def frame_levels(samples: np.ndarray) -> np.ndarray:
+    """Per-frame RMS level in dBFS (trailing partial frame dropped)."""
+    n = len(samples) // _FRAME
+    frames = samples[: n * _FRAME].reshape(n, _FRAME).astype(np.float32) / 32768.0
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-6))
+
+
+def _runs(mask: np.ndarray) -> list[tuple[int, int]]:
+    """[start, end) frame indices of each run of True."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+def speech_segments(pcm: bytes) -> list[tuple[int, int]]:
+    """[start, end) sample ranges that contain speech."""
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    if len(samples) < _FRAME:
+        return []
+    levels = frame_levels(samples)
+    noise_floor = np.percentile(levels, 10)
+    threshold = max(VAD_MIN_DBFS, min(noise_floor + VAD_NOISE_MARGIN_DB, VAD_MAX_DBFS))
+    speech = levels > threshold
+
+    runs = _runs(speech)
+    if not runs:
+        return []
+
+    # bridge short pauses inside a phrase
+    merged = [runs[0]]
+    for start, end in runs[1:]:
+        if start - merged[-1][1] < _frames(VAD_MIN_SILENCE_MS):
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+
+    pad = _frames(VAD_PAD_MS)
+    total = len(levels)
+    return [
+        (max(start - pad, 0) * _FRAME, min(end + pad, total) * _FRAME)
+        for start, end in merged
+        if end - start >= _frames(VAD_MIN_SPEECH_MS)
+    ]
+
+
+def _group(segments: list[tuple[int, int]], max_samples: int) -> list[tuple[int, int]]:
+    """Join neighbouring segments into spans no longer than max_samples where possible."""
+    spans = [segments[0]]
+    for start, end in segments[1:]:
+        if end - spans[-1][0] <= max_samples:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return spans
+
+
+def _speech_clips(pcm: bytes) -> list[bytes]:
+    segments = speech_segments(pcm)
+    if not segments:
+        return []
+    if VAD_SPLIT_SECONDS > 0:
+        spans = _group(segments, int(VAD_SPLIT_SECONDS * SAMPLE_RATE))
+    else:
+        spans = [(segments[0][0], segments[-1][1])]
+    return [pcm[start * 2:end * 2] for start, end in spans]
+
+
+async def speech_clips(pcm: bytes) -> list[bytes]:
+    """Silence-trimmed clip(s) to transcribe, in order; empty when nothing was said."""
+    return await run_in_threadpool(_speech_clips, pcm)
@@ -0,0 +1,105 @@
+# backend/app/voices.py
+"""
+ElevenLabs voice catalog, cached per worker.
+
+The catalog is fetched once at startup and refreshed in the background every
+TTS_VOICE_TTL seconds, so /tts never waits on voices.search(). If a refresh
+fails the last good copy keeps serving.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Callable
+
+from starlette.concurrency import run_in_threadpool
+
+from .upstreams import ELEVENLABS, record_success, record_error
+
+TTS_VOICE_TTL = float(os.getenv("TTS_VOICE_TTL", 3600))
+# optional pinning, e.g. "es:EXAVITQu4vr4xnSDxMaL,fr:ThT5KcBeYPX3keUQqHPh"
+TTS_VOICE_MAP = os.getenv("TTS_VOICE_MAP", "")
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_voice_map(raw: str) -> dict[str, str]:
+    pairs = (item.split(":", 1) for item in raw.split(",") if ":" in item)
+    return {lang.strip().lower(): voice.strip() for lang, voice in pairs}
+
+
+def _voice_languages(voice) -> set[str]:
+    langs = {
+        v.language.lower()
+        for v in (getattr(voice, "verified_languages", None) or [])
+        if getattr(v, "language", None)
+    }
+    label = (getattr(voice, "labels", None) or {}).get("language")
+    if label:
+        langs.add(label.lower())
+    return langs
+
+
+class VoiceCatalog:
+    def __init__(self, fetch: Callable[[], list]):
+        self._fetch = fetch  # sync: returns the list of voices
+        self._default: str | None = None
+        self._by_language: dict[str, str] = {}
+        self._pinned = _parse_voice_map(TTS_VOICE_MAP)
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    async def refresh(self) -> None:
+        async with self._lock:
+            try:
+                voices = await run_in_threadpool(self._fetch)
+            except Exception as e:
+                record_error(ELEVENLABS, e)
+                raise
+            record_success(ELEVENLABS)
+            if not voices:
+                return
+
+            by_language: dict[str, str] = {}
+            for voice in voices:
+                for lang in _voice_languages(voice):
+                    by_language.setdefault(lang, voice.voice_id)
+            self._by_language = by_language
+            self._default = voices[0].voice_id
+            self._loaded_at = time.monotonic()
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(TTS_VOICE_TTL)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("voice catalog refresh failed; keeping last good copy")
+
+    async def start(self) -> None:
+        """Pre-warm and begin background refresh (app startup)."""
+        try:
+            await self.refresh()
+        except Exception:
+            logger.exception("voice catalog warm-up failed; will load on first request")
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def voice_for(self, language: str | None = None) -> str | None:
+        """Voice id for the practiced language, falling back to the default voice."""
+        if language:
+            lang = language.split("-")[0].lower()
+            if lang in self._pinned:
+                return self._pinned[lang]
+        if self._default is None:
+            await self.refresh()
+        if language:
+            voice_id = self._by_language.get(language.split("-")[0].lower())
+            if voice_id:
+                return voice_id
+        return self._default
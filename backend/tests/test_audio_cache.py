@@ -0,0 +1,37 @@
+# backend/tests/test_audio_cache.py
+import os
+
+from app.audio_cache import AudioCache, _SharedStore
+
+
+def _cache_with_entry(tmp_path, shared=None):
+    cache = AudioCache(str(tmp_path / "local"), max_bytes=1 << 20, shared=shared)
+    assert b"".join(cache.tee("ab" * 32, iter([b"mp3", b"data"]))) == b"mp3data"
+    return cache, "ab" * 32
+
+
+def test_hit_is_opened_with_its_size(tmp_path):
+    cache, key = _cache_with_entry(tmp_path)
+    f, size = cache.lookup(key)
+    assert size == 7
+    assert b"".join(cache.read(f, 3)) == b"data"
+    assert f.closed
+
+
+def test_entry_deleted_behind_the_index_is_a_miss(tmp_path):
+    cache, key = _cache_with_entry(tmp_path)
+    os.remove(cache._path(key))  # another worker evicted it / tmp cleaner
+
+    assert cache.lookup(key) is None
+    assert key not in cache._index
+    assert cache._bytes == 0
+
+
+def test_deleted_local_entry_is_pulled_again_from_the_shared_store(tmp_path):
+    shared = _SharedStore(str(tmp_path / "shared"))
+    cache, key = _cache_with_entry(tmp_path, shared=shared)
+    os.remove(cache._path(key))
+
+    f, size = cache.lookup(key)
+    assert b"".join(cache.read(f)) == b"mp3data"
+    assert cache._index[key] == size == 7
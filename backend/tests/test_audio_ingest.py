@@ -0,0 +1,67 @@
+# backend/tests/test_audio_ingest.py
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app import audio_ingest
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(audio_ingest, "STT_MAX_UPLOAD_BYTES", 1000)
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        chunks = audio_ingest.multipart_file_chunks(request, "file", {"audio/webm"})
+        received = b"".join([chunk async for chunk in chunks])
+        return {"size": len(received), "head": received[:4].decode()}
+
+    return TestClient(app)
+
+
+def test_file_part_is_streamed_out_of_the_form(client):
+    res = client.post(
+        "/upload",
+        data={"note": "x"},
+        files={"file": ("a.webm", b"webm" + b"\0" * 96, "audio/webm")},
+    )
+    assert res.json() == {"size": 100, "head": "webm"}
+
+
+def test_unsupported_type_is_400(client):
+    res = client.post("/upload", files={"file": ("a.exe", b"MZ", "application/octet-stream")})
+    assert res.status_code == 400
+
+
+def test_missing_file_is_400(client):
+    assert client.post("/upload", files={"other": ("a.webm", b"x", "audio/webm")}).status_code == 400
+
+
+def test_declared_length_over_the_cap_is_rejected_before_reading(client, monkeypatch):
+    async def never_read(self):
+        raise AssertionError("body was read")
+        yield  # pragma: no cover
+
+    monkeypatch.setattr(Request, "stream", never_read)
+    res = client.post(
+        "/upload",
+        files={"file": ("a.webm", b"\0" * 50_000, "audio/webm")},
+    )
+    assert res.status_code == 413
+
+
+def test_undeclared_oversized_body_is_cut_off_while_streaming(client):
+    def body():
+        yield b"--b\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a\"\r\n"
+        yield b"Content-Type: audio/webm\r\n\r\n"
+        for _ in range(100):
+            yield b"\0" * 1024
+        yield b"\r\n--b--\r\n"
+
+    res = client.post(
+        "/upload",
+        content=body(),  # chunked: no Content-Length to check up front
+        headers={"Content-Type": "multipart/form-data; boundary=b"},
+    )
+    assert res.status_code == 413
@@ -0,0 +1,59 @@
+# backend/tests/test_conversations.py
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.models import Message
+from app.routers import conversations
+from app.schemas import MessageRead
+
+
+class _FakeSession:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        mappings = SimpleNamespace(all=lambda: self.rows, first=lambda: (self.rows or [None])[0])
+        return SimpleNamespace(mappings=lambda: mappings)
+
+
+def test_count_and_preview_skip_placeholders_and_failed_replies():
+    db = _FakeSession()
+    user = SimpleNamespace(id=uuid.uuid4())
+    asyncio.run(conversations.list_conversations(limit=30, cursor=None, db=db, user=user))
+
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    assert sql.count("message.status = ") == 2  # message_count and last_message
+
+
+def test_messages_carry_their_status():
+    row = Message(
+        id=uuid.uuid4(),
+        sender="assistant",
+        content="Hola, ¿qu",
+        status="streaming",
+        created_at=datetime.now(timezone.utc),
+    )
+    assert MessageRead.model_validate(row, from_attributes=True).status == "streaming"
+
+
+def test_get_conversation_does_not_load_the_messages():
+    conv = {
+        "id": uuid.uuid4(),
+        "source_language": "en",
+        "target_language": "es",
+        "prompt": None,
+        "created_at": datetime.now(timezone.utc),
+    }
+    db = _FakeSession([conv])
+    user = SimpleNamespace(id=uuid.uuid4())
+    read = asyncio.run(conversations.get_conversation(conv["id"], db=db, user=user))
+
+    assert read.id == conv["id"] and read.messages == []
+    assert len(db.statements) == 1
+    assert "message" not in str(db.statements[0].compile(dialect=postgresql.dialect()))
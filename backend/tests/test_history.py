@@ -0,0 +1,19 @@
+# backend/tests/test_history.py
+import asyncio
+import uuid
+
+from app import history
+
+
+def test_concurrent_turns_get_their_own_copy_of_the_cached_window():
+    conv_id = uuid.uuid4()
+    history.start_history(conv_id)
+    history.append_turn(conv_id, "hola", "¡Hola! ¿Qué tal?")
+
+    first = asyncio.run(history.load_window(None, conv_id))  # cache hit, no query
+    second = asyncio.run(history.load_window(None, conv_id))
+    first.append("user", "only in the first turn's prompt")
+
+    assert len(second.entries) == 2
+    assert len(asyncio.run(history.load_window(None, conv_id)).entries) == 2
+    history.forget_history(conv_id)
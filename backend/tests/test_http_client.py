@@ -0,0 +1,25 @@
+# backend/tests/test_http_client.py
+import httpx
+
+from app import http_client
+
+
+def test_per_call_timeout_keeps_connect_and_pool_timeouts():
+    timeout = http_client.google_timeout(2.5)
+    assert timeout.read == timeout.write == 2.5
+    assert timeout.connect == http_client.GOOGLE_CONNECT_TIMEOUT
+    assert timeout.pool == http_client.GOOGLE_POOL_TIMEOUT
+
+
+def test_pool_stats_of_an_unused_client():
+    stats = http_client.pool_stats(httpx.AsyncClient())
+    assert stats["connections"] == 0 and stats["queued"] == 0
+
+
+def test_pool_stats_never_raises_on_unexpected_internals():
+    class Odd:
+        class _transport:
+            _pool = object()  # no .connections
+
+    assert "unavailable" in http_client.pool_stats(Odd())
+    assert http_client.pool_stats(None) == {}
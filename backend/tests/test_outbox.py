@@ -0,0 +1,136 @@
+# backend/tests/test_outbox.py
+import asyncio
+import socket
+import uuid
+
+import aiosmtplib
+import pytest
+from aiosmtpd.controller import Controller
+
+from app import outbox
+
+
+class _Handler:
+    """Accepts everything except the recipients listed in `refuse` (address -> reply)."""
+
+    def __init__(self, refuse: dict[str, str]):
+        self.refuse = refuse
+        self.delivered: list[str] = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refuse:
+            return self.refuse[address]
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.delivered.extend(envelope.rcpt_tos)
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    handler = _Handler({
+        "gone@example.com": "550 No such user",
+        "full@example.com": "452 Mailbox full",
+    })
+    port = _free_port()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    monkeypatch.setattr(outbox, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(outbox, "SMTP_PORT", port)
+    monkeypatch.setattr(outbox, "SMTP_STARTTLS", False)
+    monkeypatch.setattr(outbox, "SMTP_USER", "")
+    yield handler
+    controller.stop()
+
+
+def _run_batch(recipients: list[str]) -> dict:
+    """One _drain_once pass over `recipients`, with the database stubbed out."""
+    rows = [(uuid.uuid4(), r, "subject", "body", 0) for r in recipients]
+    recorded: dict = {}
+
+    async def claim():
+        return rows
+
+    async def record(outcomes):
+        recorded.update(outcomes)
+
+    async def main():
+        worker = outbox.EmailOutboxWorker()
+        worker._claim = claim
+        worker._record = record
+        try:
+            await worker._drain_once()
+        finally:
+            await worker._smtp.close()
+
+    asyncio.run(main())
+    return {recipient: recorded[row[0]] for row, recipient in zip(rows, recipients)}
+
+
+def test_refused_recipient_fails_only_its_own_message(smtp_server):
+    result = _run_batch(["a@example.com", "gone@example.com", "full@example.com", "b@example.com"])
+
+    assert smtp_server.delivered == ["a@example.com", "b@example.com"]
+    assert result["a@example.com"]["status"] == "sent"
+    assert result["b@example.com"]["status"] == "sent"
+    # 5xx: permanent
+    assert result["gone@example.com"]["status"] == "failed"
+    # 4xx: retried later
+    assert "status" not in result["full@example.com"]
+    assert result["full@example.com"]["attempts"] == 1
+    assert "next_attempt_at" in result["full@example.com"]
+
+
+def test_dead_server_defers_batch_without_failing_it(monkeypatch):
+    monkeypatch.setattr(outbox, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(outbox, "SMTP_PORT", _free_port())  # nothing listens here
+    monkeypatch.setattr(outbox, "SMTP_STARTTLS", False)
+    monkeypatch.setattr(outbox, "SMTP_USER", "")
+    connects = 0
+    real_connect = outbox._SmtpSession._connect
+
+    async def counting_connect(self):
+        nonlocal connects
+        connects += 1
+        return await real_connect(self)
+
+    monkeypatch.setattr(outbox._SmtpSession, "_connect", counting_connect)
+    result = _run_batch(["a@example.com", "b@example.com", "c@example.com"])
+
+    assert connects == 1
+    assert all("status" not in v for v in result.values())
+    assert all("next_attempt_at" in v for v in result.values())
+    # only the message that actually hit the dead server used up an attempt
+    assert result["a@example.com"]["attempts"] == 1
+    assert "attempts" not in result["b@example.com"]
+
+
+@pytest.mark.parametrize("exc, permanent, connection", [
+    (aiosmtplib.SMTPRecipientsRefused([aiosmtplib.SMTPRecipientRefused(550, "no", "x")]), True, False),
+    (aiosmtplib.SMTPRecipientsRefused([aiosmtplib.SMTPRecipientRefused(452, "full", "x")]), False, False),
+    (aiosmtplib.SMTPRecipientsRefused([
+        aiosmtplib.SMTPRecipientRefused(550, "no", "x"),
+        aiosmtplib.SMTPRecipientRefused(452, "full", "y"),
+    ]), False, False),
+    (aiosmtplib.SMTPDataError(554, "rejected"), True, False),
+    (aiosmtplib.SMTPDataError(451, "try later"), False, False),
+    (aiosmtplib.SMTPConnectError("refused"), False, True),
+    (aiosmtplib.SMTPServerDisconnected("gone"), False, True),
+    (aiosmtplib.SMTPReadTimeoutError("slow"), False, True),
+    (ConnectionRefusedError(), False, True),
+])
+def test_error_classification(exc, permanent, connection):
+    assert outbox._is_permanent(exc) is permanent
+    assert outbox._is_connection_error(exc) is connection
+
+
+def test_lease_outlasts_a_worst_case_batch():
+    assert outbox.EMAIL_LEASE_SECONDS > outbox.EMAIL_BATCH_SIZE * outbox.SMTP_TIMEOUT
@@ -0,0 +1,219 @@
+# backend/tests/test_replies.py
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import replies, turns
+from app.routers import chat
+
+
+class _Writes:
+    """Stands in for the database behind message_writer: id -> (content, status)."""
+
+    def __init__(self):
+        self.rows: dict[uuid.UUID, tuple[str, str]] = {}
+
+    async def execute(self, writer, rows):
+        for row in rows:
+            self.rows[row["id"]] = (row["content"], row["status"])
+        return None
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    store = _Writes()
+    monkeypatch.setattr(turns.MessageWriter, "_execute", lambda self, rows: store.execute(self, rows))
+    monkeypatch.setattr(turns.message_writer, "flush_ms", 1)
+    monkeypatch.setattr(replies, "append_turn", lambda *a: None)
+    monkeypatch.setattr(replies, "schedule_summary", lambda conversation_id: None)
+    return store
+
+
+def _fake_llm(monkeypatch, deltas, fail_after=None):
+    async def stream_text(llm, messages):
+        for i, delta in enumerate(deltas):
+            if fail_after is not None and i == fail_after:
+                raise RuntimeError("upstream went away")
+            await asyncio.sleep(0.01)
+            yield delta
+
+    monkeypatch.setattr(replies, "stream_text", stream_text)
+
+
+def test_tail_resumes_from_an_offset(monkeypatch, writes):
+    _fake_llm(monkeypatch, ["Hola", ", ¿qué", " tal?"])
+
+    async def main():
+        registry = replies.ReplyRegistry(4)
+        reply = registry.start(None, [], uuid.uuid4(), uuid.uuid4(), "hi")
+        first = ""
+        async for chunk in reply.tail():
+            first += chunk
+            break  # client disconnects after the first chunk
+        rest = "".join([chunk async for chunk in registry.get(reply.message_id).tail(len(first))])
+        await asyncio.gather(*registry._tasks)
+        await turns.message_writer.drain()
+        return reply, first + rest
+
+    reply, text = asyncio.run(main())
+    assert text == "Hola, ¿qué tal?"
+    assert writes.rows[reply.message_id] == ("Hola, ¿qué tal?", "complete")
+
+
+def test_failed_reply_aborts_the_tail_and_is_stored_as_failed(monkeypatch, writes):
+    _fake_llm(monkeypatch, ["Hola", " y"], fail_after=1)
+
+    async def main():
+        registry = replies.ReplyRegistry(4)
+        reply = registry.start(None, [], uuid.uuid4(), uuid.uuid4(), "hi")
+        received = []
+        with pytest.raises(replies.ReplyFailed):
+            async for chunk in reply.tail():
+                received.append(chunk)
+        await asyncio.gather(*registry._tasks)
+        await turns.message_writer.drain()
+        return reply, received
+
+    reply, received = asyncio.run(main())
+    assert received == ["Hola"]
+    assert writes.rows[reply.message_id] == ("Hola", "failed")
+    assert reply.error == "reply generation failed"  # not the upstream's message
+
+
+def test_placeholder_row_is_written_before_any_delta(monkeypatch, writes):
+    async def stream_text(llm, messages):
+        await asyncio.sleep(0.2)
+        yield "late"
+
+    monkeypatch.setattr(replies, "stream_text", stream_text)
+
+    async def main():
+        registry = replies.ReplyRegistry(4)
+        reply = registry.start(None, [], uuid.uuid4(), uuid.uuid4(), "hi")
+        await asyncio.sleep(0.05)
+        early = writes.rows.get(reply.message_id)
+        await asyncio.gather(*registry._tasks)
+        await turns.message_writer.drain()
+        return early
+
+    assert asyncio.run(main()) == ("", "streaming")
+
+
+# ── GET /chat/replies/{id} when this worker has no buffer for the reply
+
+_USER_ID = uuid.uuid4()
+
+
+class _StoredSession:
+    def __init__(self, row):
+        self.row = row
+
+    async def execute(self, stmt):
+        return SimpleNamespace(one_or_none=lambda: self.row)
+
+
+def _client(row) -> TestClient:
+    app = FastAPI()
+    app.include_router(chat.router)
+    app.dependency_overrides[chat.current_user] = lambda: SimpleNamespace(id=_USER_ID)
+    app.dependency_overrides[chat.get_db] = lambda: _StoredSession(row)
+    return TestClient(app)
+
+
+def _stored(content, status):
+    return SimpleNamespace(conversation_id=uuid.uuid4(), content=content, status=status)
+
+
+def test_stored_reply_still_streaming_elsewhere_is_409():
+    res = _client(_stored("Hol", "streaming")).get(f"/chat/replies/{uuid.uuid4()}")
+    assert res.status_code == 409
+    assert res.headers["retry-after"] == "1"
+
+
+def test_stored_complete_reply_resumes_from_offset():
+    res = _client(_stored("Hola, ¿qué tal?", "complete")).get(f"/chat/replies/{uuid.uuid4()}?offset=4")
+    assert res.status_code == 200
+    assert res.text == ", ¿qué tal?"
+
+
+def test_stored_failed_reply_is_an_error():
+    res = _client(_stored("Hol", "failed")).get(f"/chat/replies/{uuid.uuid4()}")
+    assert res.status_code == 502
+
+
+def test_unknown_reply_is_404():
+    assert _client(None).get(f"/chat/replies/{uuid.uuid4()}").status_code == 404
+
+
+# ── SSE mode
+
+def _events(body: str) -> list[dict]:
+    events = []
+    for block in body.split("\n\n"):
+        event = {}
+        for line in block.splitlines():
+            if line.startswith(":") or ": " not in line:
+                continue
+            field, value = line.split(": ", 1)
+            event[field] = value
+        if "event" in event:
+            events.append(event)
+    return events
+
+
+def test_sse_replays_deltas_after_last_event_id(monkeypatch, writes):
+    _fake_llm(monkeypatch, ["Hola", ", ¿qué", " tal?"])
+
+    async def main():
+        registry = replies.ReplyRegistry(4)
+        reply = registry.start(None, [], _USER_ID, uuid.uuid4(), "hi")
+        await asyncio.gather(*registry._tasks)
+        await turns.message_writer.drain()
+        body = b"".join([chunk async for chunk in chat._sse_events(reply, 1)]).decode()
+        return reply, body
+
+    reply, body = asyncio.run(main())
+    events = _events(body)
+    assert [e["event"] for e in events] == ["meta", "delta", "delta", "done"]
+    assert [e.get("id") for e in events] == [None, "2", "3", None]
+    assert '"text": ", ¿qué"' in events[1]["data"]
+    assert '"text": "Hola, ¿qué tal?"' in events[3]["data"]
+
+
+def test_sse_resume_uses_the_last_event_id_header(monkeypatch, writes):
+    _fake_llm(monkeypatch, ["a", "b", "c"])
+    monkeypatch.setattr(chat, "reply_streams", replies.ReplyRegistry(4))
+    reply = None
+
+    async def start():
+        nonlocal reply
+        reply = chat.reply_streams.start(None, [], _USER_ID, uuid.uuid4(), "hi")
+
+    with _client(None) as client:
+        client.portal.call(start)
+        res = client.get(
+            f"/chat/replies/{reply.message_id}",
+            headers={"Accept": "text/event-stream", "Last-Event-ID": "2"},
+        )
+    assert res.headers["content-type"].startswith("text/event-stream")
+    deltas = [e for e in _events(res.text) if e["event"] == "delta"]
+    assert [(e["id"], e["data"]) for e in deltas] == [("3", '{"text": "c"}')]
+
+
+@pytest.mark.parametrize("status, final_event", [("complete", "done"), ("failed", "error")])
+def test_sse_stored_reply_is_one_final_event(status, final_event):
+    res = _client(_stored("Hola", status)).get(
+        f"/chat/replies/{uuid.uuid4()}", headers={"Accept": "text/event-stream"}
+    )
+    assert [e["event"] for e in _events(res.text)] == ["meta", final_event]
+
+
+def test_sse_stored_reply_still_streaming_elsewhere_is_409():
+    res = _client(_stored("Hol", "streaming")).get(
+        f"/chat/replies/{uuid.uuid4()}", headers={"Accept": "text/event-stream"}
+    )
+    assert res.status_code == 409
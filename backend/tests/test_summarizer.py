@@ -0,0 +1,71 @@
+# backend/tests/test_summarizer.py
+import importlib
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+from app import history, summarizer
+from app.models import Conversation, Message
+
+
+def test_summaries_start_before_messages_leave_the_history_window():
+    assert summarizer.SUMMARY_THRESHOLD <= history.HISTORY_MAX_MESSAGES
+
+
+def test_configured_threshold_above_the_window_is_clamped(monkeypatch):
+    monkeypatch.setenv("SUMMARY_THRESHOLD", str(history.HISTORY_MAX_MESSAGES + 10))
+    try:
+        assert importlib.reload(summarizer).SUMMARY_THRESHOLD == history.HISTORY_MAX_MESSAGES
+    finally:
+        monkeypatch.delenv("SUMMARY_THRESHOLD")
+        importlib.reload(summarizer)
+
+
+def _messages(*specs):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        Message(sender="user", content=content, status=status, created_at=start + timedelta(seconds=i))
+        for i, (content, status) in enumerate(specs)
+    ]
+
+
+def test_long_messages_are_summarized_before_they_outgrow_the_token_budget(monkeypatch):
+    monkeypatch.setattr(summarizer, "SUMMARY_TOKEN_THRESHOLD", 100)
+    monkeypatch.setattr(summarizer, "count_tokens", len)
+    few_but_long = _messages(*[("x" * 30, "complete")] * 4)  # far below SUMMARY_THRESHOLD
+
+    older = summarizer._to_fold(few_but_long)
+
+    # the newest message fits in half the token threshold and stays out of the summary
+    assert older == few_but_long[:3]
+
+
+def test_short_unsummarized_tail_is_left_alone(monkeypatch):
+    monkeypatch.setattr(summarizer, "count_tokens", len)
+    assert summarizer._to_fold(_messages(("hola", "complete"), ("hi", "complete"))) == []
+
+
+def test_nothing_from_a_reply_still_streaming_onward_is_folded(monkeypatch):
+    monkeypatch.setattr(summarizer, "SUMMARY_TOKEN_THRESHOLD", 10)
+    monkeypatch.setattr(summarizer, "SUMMARY_KEEP_RECENT", 0)
+    monkeypatch.setattr(summarizer, "count_tokens", len)
+    messages = _messages(("a" * 20, "complete"), ("", "streaming"), ("b" * 20, "complete"))
+
+    assert summarizer._to_fold(messages) == messages[:1]
+
+
+def test_failed_replies_are_not_summarized():
+    stmt = str(summarizer._unsummarized(Conversation(id=uuid4())).compile(dialect=postgresql.dialect()))
+    assert "message.status != " in stmt
+
+
+def test_keep_recent_is_kept_below_the_threshold(monkeypatch):
+    monkeypatch.setenv("SUMMARY_THRESHOLD", "8")
+    monkeypatch.setenv("SUMMARY_KEEP_RECENT", "8")
+    try:
+        assert importlib.reload(summarizer).SUMMARY_KEEP_RECENT == 7
+    finally:
+        monkeypatch.delenv("SUMMARY_THRESHOLD")
+        monkeypatch.delenv("SUMMARY_KEEP_RECENT")
+        importlib.reload(summarizer)
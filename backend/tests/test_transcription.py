@@ -0,0 +1,120 @@
+# backend/tests/test_transcription.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app import transcription
+from app.transcription import FasterWhisperBackend
+
+
+class _Pool(ThreadPoolExecutor):
+    """Stands in for the process pool; counts how many were spawned."""
+
+    created = 0
+
+    def __init__(self, max_workers, initializer, initargs):
+        type(self).created += 1
+        super().__init__(max_workers=max_workers)
+
+
+def _backend(monkeypatch):
+    _Pool.created = 0
+    monkeypatch.setattr(transcription, "ProcessPoolExecutor", _Pool)
+    return FasterWhisperBackend()
+
+
+def test_concurrent_first_requests_share_one_pool(monkeypatch):
+    backend = _backend(monkeypatch)
+    monkeypatch.setattr(
+        transcription, "_worker_transcribe_batch", lambda jobs: [(True, "hola")] * len(jobs)
+    )
+
+    async def run():
+        texts = await asyncio.gather(*(backend.transcribe(b"\0\0", "es") for _ in range(5)))
+        await backend.stop()
+        return texts
+
+    assert asyncio.run(run()) == ["hola"] * 5
+    assert _Pool.created == 1
+
+
+def test_broken_pool_is_replaced_on_the_next_request(monkeypatch):
+    backend = _backend(monkeypatch)
+    results = iter([BrokenProcessPool("worker died"), [(True, "again")]])
+
+    def batch(jobs):
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(transcription, "_worker_transcribe_batch", batch)
+
+    async def run():
+        try:
+            await backend.transcribe(b"\0\0", "es")
+        except RuntimeError as e:
+            failed = str(e)
+        else:
+            failed = None
+        text = await backend.transcribe(b"\0\0", "es")
+        await backend.stop()
+        return failed, text
+
+    failed, text = asyncio.run(run())
+    assert "worker died" in failed
+    assert text == "again"
+    assert _Pool.created == 2
+
+
+def _parallel_batches(monkeypatch, workers):
+    """
+    A worker stand-in that only returns once `workers` calls are in flight at
+    the same time, so clips dispatched to a single worker fail instead.
+    """
+    monkeypatch.setattr(transcription, "STT_WORKERS", workers)
+    barrier = threading.Barrier(workers, timeout=5)
+    calls: list[tuple[int, int]] = []  # (thread, clips in the call)
+
+    def batch(jobs):
+        calls.append((threading.get_ident(), len(jobs)))
+        barrier.wait()
+        return [(True, pcm.decode()) for _, pcm, _ in jobs]
+
+    monkeypatch.setattr(transcription, "_worker_transcribe_batch", batch)
+    return calls
+
+
+def test_flushed_batch_is_spread_across_workers(monkeypatch):
+    calls = _parallel_batches(monkeypatch, workers=2)
+    backend = _backend(monkeypatch)
+
+    async def run():
+        texts = await asyncio.gather(*(backend.transcribe(str(i).encode(), "es") for i in range(4)))
+        await backend.stop()
+        return texts
+
+    assert asyncio.run(run()) == ["0", "1", "2", "3"]
+    assert sorted(n for _, n in calls) == [2, 2]
+    assert len({thread for thread, _ in calls}) == 2
+
+
+def test_speech_segments_are_transcribed_on_separate_workers(monkeypatch):
+    calls = _parallel_batches(monkeypatch, workers=3)
+    backend = _backend(monkeypatch)
+    monkeypatch.setattr(transcription, "stt_backend", backend)
+
+    async def clips(pcm):
+        return [b"uno", b"dos", b"tres"]  # a long utterance split at pauses
+
+    monkeypatch.setattr(transcription, "speech_clips", clips)
+
+    async def run():
+        text = await transcription.transcribe_speech(b"", "es")
+        await backend.stop()
+        return text
+
+    assert asyncio.run(run()) == "uno dos tres"
+    assert [n for _, n in calls] == [1, 1, 1]
+    assert len({thread for thread, _ in calls}) == 3
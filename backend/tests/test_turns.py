@@ -0,0 +1,205 @@
+# backend/tests/test_turns.py
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
+from app import turns
+from app.history import HistoryWindow
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+class _FakeSession:
+    """Records executed statements; returns `row` from .one_or_none()/.one()."""
+
+    def __init__(self, row):
+        self.row = row
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return SimpleNamespace(one_or_none=lambda: self.row, one=lambda: self.row)
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+def _conv_row(conv_id):
+    return SimpleNamespace(id=conv_id, prompt="p", summary=None, summarized_until=None)
+
+
+def test_begin_turn_new_conversation_is_one_statement():
+    conv_id = uuid.uuid4()
+    db = _FakeSession(_conv_row(conv_id))
+    turn = asyncio.run(turns.begin_turn(db, uuid.uuid4(), None, "en", "es", " p ", "hola"))
+
+    assert len(db.statements) == 1 and db.commits == 1
+    sql = _sql(db.statements[0])
+    assert "WITH conv AS \n(INSERT INTO conversation" in sql
+    assert "user_message AS \n(INSERT INTO message" in sql
+    assert "FROM conv RETURNING message.id" in sql
+    assert turn.conversation_id == conv_id
+    assert turn.window.as_messages() == []
+
+
+def test_begin_turn_existing_conversation_keeps_saved_prompt(monkeypatch):
+    conv_id, loaded = uuid.uuid4(), {}
+
+    async def fake_load_window(db, cid, since=None, exclude=None):
+        loaded.update(cid=cid, exclude=exclude)
+        return HistoryWindow()
+
+    monkeypatch.setattr(turns, "load_window", fake_load_window)
+    db = _FakeSession(_conv_row(conv_id))
+    turn = asyncio.run(turns.begin_turn(db, uuid.uuid4(), str(conv_id), "en", "es", "new", "hola"))
+
+    sql = _sql(db.statements[0])
+    assert "WITH conv AS \n(UPDATE conversation SET prompt=coalesce(nullif(conversation.prompt" in sql
+    assert "conversation.user_id" in sql  # ownership is part of the statement
+    # the history window must not contain the message just inserted
+    assert loaded == {"cid": conv_id, "exclude": turn.user_message_id}
+
+
+def test_begin_turn_without_prompt_only_selects_the_conversation(monkeypatch):
+    async def fake_load_window(db, cid, since=None, exclude=None):
+        return HistoryWindow()
+
+    monkeypatch.setattr(turns, "load_window", fake_load_window)
+    conv_id = uuid.uuid4()
+    db = _FakeSession(_conv_row(conv_id))
+    asyncio.run(turns.begin_turn(db, uuid.uuid4(), str(conv_id), "en", "es", None, "hola"))
+    assert "WITH conv AS \n(SELECT conversation.id" in _sql(db.statements[0])
+
+
+@pytest.mark.parametrize("conversation_id", [str(uuid.uuid4()), "not-a-uuid"])
+def test_begin_turn_unknown_conversation_is_404(conversation_id):
+    db = _FakeSession(None)
+    with pytest.raises(HTTPException) as err:
+        asyncio.run(turns.begin_turn(db, uuid.uuid4(), conversation_id, "en", "es", None, "hola"))
+    assert err.value.status_code == 404
+    assert db.commits == 0
+
+
+def test_upsert_only_touches_streaming_rows():
+    sql = _sql(turns.MessageWriter._statement([
+        {"id": uuid.uuid4(), "conversation_id": uuid.uuid4(), "sender": "assistant",
+         "content": "x", "status": "streaming"},
+    ]))
+    assert "clock_timestamp()" in sql
+    assert "ON CONFLICT (id) DO UPDATE SET content = excluded.content, status = excluded.status" in sql
+    # snapshots only grow; a final version ends the updates
+    assert ("WHERE message.status = %(status_1)s AND (excluded.status != %(status_2)s "
+            "OR length(excluded.content) >= length(message.content))") in sql
+
+
+class _RecordingWriter(turns.MessageWriter):
+    """MessageWriter whose database writes are recorded; `bad` ids violate a constraint."""
+
+    def __init__(self, bad=()):
+        super().__init__(flush_ms=10, max_batch=100)
+        self.executed: list[list[dict]] = []
+        self.bad = set(bad)
+
+    async def _execute(self, rows):
+        self.executed.append(rows)
+        if any(row["conversation_id"] in self.bad for row in rows):
+            return IntegrityError("INSERT", {}, Exception("fk violation"))
+        return None
+
+
+def test_writes_in_one_window_are_one_batch_and_same_id_coalesces():
+    writer = _RecordingWriter()
+    conv, reply_id = uuid.uuid4(), uuid.uuid4()
+
+    async def main():
+        snapshot = writer.submit(conv, "assistant", "Hol", reply_id)
+        await asyncio.gather(
+            writer.write(conv, "assistant", "Hola", reply_id),
+            writer.write(uuid.uuid4(), "assistant", "other"),
+        )
+        assert snapshot.done() and snapshot.exception() is None
+
+    asyncio.run(main())
+    assert len(writer.executed) == 1
+    rows = writer.executed[0]
+    assert len(rows) == 2
+    assert [r["content"] for r in rows if r["id"] == reply_id] == ["Hola"]
+
+
+def test_late_snapshot_does_not_replace_a_buffered_final_version():
+    writer = _RecordingWriter()
+    conv, reply_id = uuid.uuid4(), uuid.uuid4()
+
+    async def main():
+        writer.submit(conv, "assistant", "Hola", reply_id, "complete")
+        await asyncio.shield(writer.submit(conv, "assistant", "Hol", reply_id, "streaming"))
+
+    asyncio.run(main())
+    [rows] = writer.executed
+    assert rows == [{"id": reply_id, "conversation_id": conv, "sender": "assistant",
+                     "content": "Hola", "status": "complete"}]
+
+
+def test_a_bad_row_does_not_fail_the_rest_of_the_batch():
+    deleted = uuid.uuid4()
+    writer = _RecordingWriter(bad={deleted})
+
+    async def main():
+        return await asyncio.gather(
+            writer.write(uuid.uuid4(), "assistant", "a"),
+            writer.write(deleted, "assistant", "b"),
+            writer.write(uuid.uuid4(), "assistant", "c"),
+            return_exceptions=True,
+        )
+
+    ok_a, failed, ok_c = asyncio.run(main())
+    assert isinstance(ok_a, uuid.UUID) and isinstance(ok_c, uuid.UUID)
+    assert isinstance(failed, IntegrityError)
+    # one batch attempt, then one write per row
+    assert [len(rows) for rows in writer.executed] == [3, 1, 1, 1]
+
+
+def test_drain_flushes_pending_writes():
+    writer = _RecordingWriter()
+    writer.flush_ms = 60_000
+
+    async def main():
+        fut = writer.submit(uuid.uuid4(), "assistant", "late", uuid.uuid4())
+        await writer.drain()
+        return fut
+
+    assert asyncio.run(main()).done()
+    assert len(writer.executed) == 1
+
+
+def test_open_conversation_saves_a_first_prompt_in_one_statement():
+    conv_id = uuid.uuid4()
+    db = _FakeSession(_conv_row(conv_id))
+    row = asyncio.run(turns.open_conversation(db, uuid.uuid4(), str(conv_id), "en", "es", "cafe"))
+
+    assert row.id == conv_id
+    assert len(db.statements) == 1 and db.commits == 1
+    sql = _sql(db.statements[0])
+    assert "WITH conv AS \n(UPDATE conversation SET prompt=coalesce(" in sql
+    assert "INSERT INTO message" not in sql
+
+
+@pytest.mark.parametrize("conversation_id", ["not-a-uuid", str(uuid.uuid4())])
+def test_open_conversation_rejects_malformed_or_foreign_ids_with_404(conversation_id):
+    db = _FakeSession(None)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(turns.open_conversation(db, uuid.uuid4(), conversation_id, "en", "es", None))
+    assert exc.value.status_code == 404
+    assert db.commits == 0
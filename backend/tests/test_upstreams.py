@@ -0,0 +1,77 @@
+# backend/tests/test_upstreams.py
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import http_client, upstreams
+from app.routers import tts
+
+
+def _fresh(monkeypatch):
+    for state in ("_last_ok", "_last_error", "_last_limited"):
+        monkeypatch.setattr(upstreams, state, {})
+
+
+def _get(transport, url="http://upstream.test/"):
+    async def main():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.get(url)
+    return asyncio.run(main())
+
+
+def test_unreachable_upstream_is_recorded_as_failing(monkeypatch):
+    _fresh(monkeypatch)
+
+    async def refuse(self, request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    monkeypatch.setattr(httpx.AsyncHTTPTransport, "handle_async_request", refuse)
+    try:
+        _get(upstreams.TrackedTransport("test"))
+    except httpx.ConnectError:
+        pass
+    assert upstreams.upstream_status("test")["status"] == "failing"
+
+
+def test_rate_limited_upstream_is_degraded_not_up(monkeypatch):
+    _fresh(monkeypatch)
+    upstreams.record_success("test")
+
+    async def limited(self, request):
+        return httpx.Response(429, request=request)
+
+    monkeypatch.setattr(httpx.AsyncHTTPTransport, "handle_async_request", limited)
+    assert _get(upstreams.TrackedTransport("test")).status_code == 429
+    assert upstreams.upstream_status("test")["status"] == "degraded"
+
+
+def test_tracked_transport_keeps_pool_stats_readable():
+    stats = http_client.pool_stats(http_client.google_client)
+    assert stats["connections"] == 0 and "unavailable" not in stats
+
+
+def test_tts_records_elevenlabs_failure_from_the_lazy_stream(monkeypatch):
+    _fresh(monkeypatch)
+    upstreams.record_success(upstreams.ELEVENLABS)
+
+    def open_stream(text, voice_id):
+        raise RuntimeError("elevenlabs unreachable")
+        yield  # pragma: no cover - a generator, like convert()
+
+    async def voice_for(language):
+        return "voice"
+
+    monkeypatch.setattr(tts, "open_stream", open_stream)
+    monkeypatch.setattr(tts.voice_catalog, "voice_for", voice_for)
+    monkeypatch.setattr(tts.audio_cache, "lookup", lambda key: None)
+
+    app = FastAPI()
+    app.include_router(tts.router)
+    app.dependency_overrides[tts.current_user] = lambda: SimpleNamespace(id="u")
+    res = TestClient(app).post("/tts", json={"text": "hola"})
+
+    assert res.status_code == 502
+    assert upstreams.upstream_status(upstreams.ELEVENLABS)["status"] == "failing"
@@ -0,0 +1,79 @@
+# backend/tests/test_users.py
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi_users import exceptions
+
+from app import users
+from app.schemas import UserCreate
+
+
+class _UserDb:
+    def __init__(self):
+        self.users = {}
+
+    async def get_by_email(self, email):
+        return next((u for u in self.users.values() if u.email == email), None)
+
+    async def get(self, id):
+        return self.users.get(id)
+
+    async def create(self, user_dict):
+        user = SimpleNamespace(id=uuid.uuid4(), is_active=True, is_verified=False, **user_dict)
+        self.users[user.id] = user
+        return user
+
+    async def update(self, user, update_dict):
+        for key, value in update_dict.items():
+            setattr(user, key, value)
+        return user
+
+
+class _SyncHashingForbidden:
+    def hash(self, password):
+        raise AssertionError("bcrypt on the event loop")
+
+    verify_and_update = hash
+
+    def generate(self):
+        return "unused"
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    async def fast_hash(password):
+        return f"hashed:{password}"
+
+    async def fast_verify(password, hashed):
+        return hashed == f"hashed:{password}", None
+
+    monkeypatch.setattr(users.password_hasher, "hash", fast_hash)
+    monkeypatch.setattr(users.password_hasher, "verify_and_update", fast_verify)
+    return users.UserManager(_UserDb(), _SyncHashingForbidden())
+
+
+def _register(manager, password="correct horse battery"):
+    return asyncio.run(manager.create(UserCreate(email="ana@example.com", password=password, full_name="Ana")))
+
+
+def test_create_hashes_through_the_password_pool(manager):
+    assert _register(manager).hashed_password == "hashed:correct horse battery"
+
+
+def test_reset_token_round_trip_without_hashing_on_the_loop(manager, monkeypatch):
+    user = _register(manager)
+    tokens = []
+
+    async def on_after_forgot_password(user, token, request=None):
+        tokens.append(token)
+
+    monkeypatch.setattr(manager, "on_after_forgot_password", on_after_forgot_password)
+    asyncio.run(manager.forgot_password(user))
+    asyncio.run(manager.reset_password(tokens[0], "a brand new secret"))
+
+    assert user.hashed_password == "hashed:a brand new secret"
+    # the token was bound to the old hash, so it can't be used twice
+    with pytest.raises(exceptions.InvalidResetPasswordToken):
+        asyncio.run(manager.reset_password(tokens[0], "yet another secret"))
@@ -0,0 +1,56 @@
+# backend/tests/test_voice_turn.py
+import json
+import uuid
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import turns
+from app.routers import voice_turn
+
+
+def test_tts_failure_still_stores_the_generated_reply(monkeypatch):
+    conv_id = uuid.uuid4()
+    written = []
+
+    async def begin(msg, user, db):
+        return conv_id, []
+
+    async def stream_text(llm, messages):
+        for delta in [
+            "Hola, hoy vamos a practicar el pasado simple juntos. ",
+            "Primero, cuéntame qué hiciste ayer por la tarde. ",
+            "Después ", "hablamos de tus planes para el fin de semana.",
+        ]:
+            yield delta
+
+    async def speak_in_order(sentences, language):
+        async for sentence in sentences:
+            raise RuntimeError("TTS upstream down")
+        yield  # pragma: no cover
+
+    async def write(conversation_id, sender, content, message_id=None, status="complete"):
+        written.append((conversation_id, sender, content, status))
+        return message_id
+
+    monkeypatch.setattr(voice_turn, "_begin_turn", begin)
+    monkeypatch.setattr(voice_turn, "stream_text", stream_text)
+    monkeypatch.setattr(voice_turn, "speak_in_order", speak_in_order)
+    monkeypatch.setattr(turns.message_writer, "write", write)
+
+    app = FastAPI()
+    app.include_router(voice_turn.router)
+    app.dependency_overrides[voice_turn.current_user] = lambda: SimpleNamespace(id=uuid.uuid4())
+    app.dependency_overrides[voice_turn.get_db] = lambda: None
+    app.dependency_overrides[voice_turn.get_llm] = lambda: None
+    body = {"text": "hi", "native_language": "en", "target_language": "es"}
+    res = TestClient(app).post("/voice-turn/stream", json=body)
+
+    events = [json.loads(line) for line in res.text.splitlines()]
+    assert events[-1]["type"] == "error"
+    # what the LLM produced before TTS failed is returned and stored, marked
+    # failed because the reply was cut short
+    text = events[-1]["assistant_text"]
+    assert text.startswith("Hola,") and not text.endswith("semana.")
+    assert written == [(conv_id, "assistant", text, "failed")]
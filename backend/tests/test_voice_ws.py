@@ -0,0 +1,122 @@
+# backend/tests/test_voice_ws.py
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app import history, turns
+from app.routers import voice_ws
+
+
+class _FakeSocket:
+    def __init__(self, frames):
+        self.frames = list(frames)
+
+    async def receive(self):
+        return self.frames.pop(0)
+
+
+def _session(frames):
+    conv = SimpleNamespace(id="c", prompt=None, summary=None, summarized_until=None)
+    start = {"native_language": "en", "target_language": "es"}
+    return voice_ws._Session(_FakeSocket(frames), None, conv, start)
+
+
+def test_malformed_control_frames_are_reported_and_the_session_continues():
+    session = _session([
+        {"type": "websocket.receive", "text": "{not json"},
+        {"type": "websocket.receive", "text": "[1, 2]"},
+        {"type": "websocket.receive", "bytes": b"audio"},
+        {"type": "websocket.receive", "text": json.dumps({"type": "end_utterance"})},
+        {"type": "websocket.receive", "text": json.dumps({"type": "stop"})},
+    ])
+
+    async def main():
+        await session.receive()
+        sent = []
+        while not session.outbound.empty():
+            sent.append(session.outbound.get_nowait())
+        queued = []
+        while not session.utterances.empty():
+            queued.append(session.utterances.get_nowait())
+        return sent, queued
+
+    sent, queued = asyncio.run(main())
+    assert sent == [("json", {"type": "error", "detail": "invalid control message"})] * 2
+    assert queued == [b"audio", None]
+
+
+class _FakeDb:
+    def __init__(self, conv):
+        self.conv = conv
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def get(self, model, id):
+        return self.conv
+
+
+def _fake_turn(monkeypatch, deltas, conv=None):
+    written, prompts = [], []
+
+    async def stream_text(llm, messages):
+        prompts.append(messages)
+        for delta in deltas:
+            if isinstance(delta, Exception):
+                raise delta
+            yield delta
+
+    async def speak_in_order(sentences, language):
+        i = 0
+        async for sentence in sentences:
+            yield i, sentence, b"mp3"
+            i += 1
+
+    async def write(conversation_id, sender, content, message_id=None, status="complete"):
+        written.append((sender, content, status))
+        return message_id
+
+    async def load_window(db, conversation_id, since=None, exclude=None):
+        return history.HistoryWindow()
+
+    monkeypatch.setattr(voice_ws, "stream_text", stream_text)
+    monkeypatch.setattr(voice_ws, "speak_in_order", speak_in_order)
+    monkeypatch.setattr(voice_ws, "load_window", load_window)
+    monkeypatch.setattr(voice_ws, "schedule_summary", lambda conv_id: None)
+    monkeypatch.setattr(voice_ws, "AsyncSessionLocal", lambda: _FakeDb(conv))
+    monkeypatch.setattr(turns.message_writer, "write", write)
+    return written, prompts
+
+
+def test_reply_cut_short_by_the_llm_is_stored_as_failed(monkeypatch):
+    written, _ = _fake_turn(monkeypatch, [
+        "Muy bien, hoy practicamos el pretérito indefinido con ejemplos. ",
+        "Ahora dime ",
+        RuntimeError("upstream reset"),
+    ])
+    monkeypatch.setattr(voice_ws, "has_history", lambda conv_id: True)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(_session([])._turn("hola"))
+
+    assert written[0] == ("user", "hola", "complete")
+    assert written[1][0] == "assistant" and written[1][2] == "failed"
+    assert written[1][1].startswith("Muy bien") and written[1][1].endswith("Ahora dime")
+
+
+def test_summary_is_reloaded_once_the_cached_window_was_dropped(monkeypatch):
+    conv = SimpleNamespace(summary="The learner lives in Lyon.", summarized_until=None)
+    written, prompts = _fake_turn(monkeypatch, ["Claro, hablemos de tu ciudad y de tu barrio hoy."], conv)
+    monkeypatch.setattr(voice_ws, "has_history", lambda conv_id: False)  # summarizer forgot it
+
+    session = _session([])
+    asyncio.run(session._turn("hola"))
+
+    assert session.summary == "The learner lives in Lyon."
+    assert "The learner lives in Lyon." in prompts[0][0]["content"]
+    assert [sender for sender, _, _ in written] == ["user", "assistant"]
@@ -7,12 +7,46 @@ import React, {
   useState,
   useEffect,
   useMemo,
+  useRef,
 } from "react";
 import axios from "axios";
 import { AuthContext } from "./auth/AuthContext";
 
 const ConversationContext = createContext(null);
 
+// how often sendMessage reconnects to a dropped reply stream before giving up
+const MAX_STREAM_RESUMES = 5;
+// how long to keep polling a reply another server is still generating (409)
+const MAX_PENDING_MS = 120000;
+
+// read a fetch() text/event-stream body, calling onEvent({ event, id, data })
+async function readEvents(res, onEvent) {
+  const reader = res.body.getReader();
+  const dec = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) return;
+    buffer += dec.decode(value, { stream: true });
+    let end;
+    while ((end = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+      const ev = { event: "message", id: null, data: "" };
+      for (const line of block.split("\n")) {
+        if (!line || line.startsWith(":")) continue; // comment / keep-alive
+        const colon = line.indexOf(":");
+        const field = colon === -1 ? line : line.slice(0, colon);
+        const value = colon === -1 ? "" : line.slice(colon + 1).replace(/^ /, "");
+        if (field === "event") ev.event = value;
+        else if (field === "id") ev.id = value;
+        else if (field === "data") ev.data += (ev.data ? "\n" : "") + value;
+      }
+      if (ev.data) onEvent(ev);
+    }
+  }
+}
+
 export function ConversationProvider({ children }) {
   const { token } = useContext(AuthContext);
 
@@ -20,12 +54,22 @@ export function ConversationProvider({ children }) {
   const [conversationsRaw, setConversationsRaw] = useState([]);
   const [languages, setLanguages]               = useState([]);
 
+  // — conversation list paging
+  const [nextCursor, setNextCursor]       = useState(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
+  const loadingMoreRef                    = useRef(false);
+
   // — UI state
   const [activeId, setActiveId]   = useState(null);
   const [nativeLanguage, setNativeLanguage] = useState("en");
   const [targetLanguage, setTargetLanguage] = useState("es");
   const [messages, setMessages]             = useState([]);
 
+  // — message paging: the newest page loads on select, older ones on request
+  const [olderCursor, setOlderCursor]       = useState(null);
+  const [isLoadingOlder, setIsLoadingOlder] = useState(false);
+  const activeIdRef                         = useRef(null);
+
   // — scenario state
   const [scenarioEnabled, setScenarioEnabled] = useState(false);
   const [scenarioPrompt, setScenarioPrompt]   = useState("");
@@ -33,25 +77,61 @@ export function ConversationProvider({ children }) {
   // — loading indicator for “New Conversation”
   const [isCreating, setIsCreating] = useState(false);
 
-  // normalize API messages → { from, text, streaming }
+  // normalize API messages → { id, from, text, status, streaming }
   const normalize = (msgs) =>
     msgs.map((m) => ({
+      id: m.id,
       from: m.sender === "assistant" || m.sender === "bot" ? "bot" : "user",
       text: m.content,
+      status: m.status,
       streaming: false,
     }));
 
-  // 1️⃣ fetch saved conversations
-  useEffect(() => {
-    if (!token) return;
+  // 1️⃣ fetch saved conversations (message-free summaries): the first page on
+  // mount, further pages only when the list asks for them (loadMoreConversations)
+  const fetchConversationPage = (cursor) =>
     axios
       .get(`/conversations`, {
         headers: { Authorization: `Bearer ${token}` },
+        params: cursor ? { cursor } : {},
+      })
+      .then(({ data }) => data);
+
+  useEffect(() => {
+    if (!token) return;
+    let cancelled = false;
+
+    fetchConversationPage(null)
+      .then((data) => {
+        if (cancelled) return;
+        setConversationsRaw(data.items);
+        setNextCursor(data.next_cursor);
       })
-      .then(({ data }) => setConversationsRaw(data))
       .catch(console.error);
+    return () => {
+      cancelled = true;
+    };
   }, [token]);
 
+  const loadMoreConversations = async () => {
+    if (!nextCursor || loadingMoreRef.current) return;
+    loadingMoreRef.current = true;
+    setIsLoadingMore(true);
+    try {
+      const data = await fetchConversationPage(nextCursor);
+      setConversationsRaw((prev) => {
+        const seen = new Set(prev.map((c) => c.id));
+        return [...prev, ...data.items.filter((c) => !seen.has(c.id))];
+      });
+      setNextCursor(data.next_cursor);
+    } catch (err) {
+      console.error(err);
+    } finally {
+      loadingMoreRef.current = false;
+      setIsLoadingMore(false);
+    }
+  };
+
   // 2️⃣ fetch Google‐Translate language list
   useEffect(() => {
     if (!token) return;
@@ -70,12 +150,11 @@ export function ConversationProvider({ children }) {
   // 3️⃣ decorate with title + sort by last activity
   const conversations = useMemo(() => {
     const withActivity = conversationsRaw.map((conv) => {
-      const lastMsgTs =
-        conv.messages && conv.messages.length
-          ? Math.max(
-              ...conv.messages.map((m) => new Date(m.created_at).getTime())
-            )
-          : new Date(conv.created_at).getTime();
+      // server-side last activity, plus any turns appended locally since
+      const lastMsgTs = Math.max(
+        new Date(conv.last_message_at || conv.created_at).getTime(),
+        ...(conv.messages || []).map((m) => new Date(m.created_at).getTime())
+      );
 
       const lang = languages.find((l) => l.value === conv.target_language);
       const title = conv.prompt
@@ -89,22 +168,51 @@ export function ConversationProvider({ children }) {
     return withActivity.map(({ lastActivity, ...keep }) => keep);
   }, [conversationsRaw, languages]);
 
-  // 4️⃣ load one conversation’s messages
+  // 4️⃣ load one conversation and its newest page of messages
+  const fetchMessagePage = (id, cursor) =>
+    axios
+      .get(`/conversations/${id}/messages`, {
+        headers: { Authorization: `Bearer ${token}` },
+        params: cursor ? { cursor } : {},
+      })
+      .then(({ data }) => data);
+
   const selectConversation = async (id) => {
     try {
-      const { data: conv } = await axios.get(
-        `/conversations/${id}`,
-        { headers: { Authorization: `Bearer ${token}` } }
-      );
+      const [{ data: conv }, page] = await Promise.all([
+        axios.get(`/conversations/${id}`, {
+          headers: { Authorization: `Bearer ${token}` },
+        }),
+        fetchMessagePage(id, null),
+      ]);
+      activeIdRef.current = conv.id;
       setActiveId(conv.id);
       setNativeLanguage(conv.source_language);
       setTargetLanguage(conv.target_language);
-      setMessages(normalize(conv.messages || []));
+      setMessages(normalize(page.items));
+      setOlderCursor(page.next_cursor);
     } catch (err) {
       console.error("Failed to load conversation:", err);
     }
   };
 
+  // older pages are prepended when the chat window asks for them
+  const loadOlderMessages = async () => {
+    const id = activeIdRef.current;
+    if (!id || !olderCursor || isLoadingOlder) return;
+    setIsLoadingOlder(true);
+    try {
+      const page = await fetchMessagePage(id, olderCursor);
+      if (activeIdRef.current !== id) return; // switched conversations meanwhile
+      setMessages((prev) => [...normalize(page.items), ...prev]);
+      setOlderCursor(page.next_cursor);
+    } catch (err) {
+      console.error("Failed to load older messages:", err);
+    } finally {
+      setIsLoadingOlder(false);
+    }
+  };
+
   // 5️⃣ create + select a new conversation (now returns the new ID)
   const startConversation = async () => {
     setIsCreating(true);
@@ -142,10 +250,12 @@ export function ConversationProvider({ children }) {
       });
       setConversationsRaw((prev) => prev.filter((c) => c.id !== id));
       if (activeId === id) {
+        activeIdRef.current = null;
         setActiveId(null);
         setNativeLanguage("en");
         setTargetLanguage("es");
         setMessages([]);
+        setOlderCursor(null);
       }
     } catch (err) {
       console.error(err);
@@ -182,11 +292,47 @@ export function ConversationProvider({ children }) {
     // placeholder bot bubble
     setMessages((m) => [...m, { from: "bot", text: "", streaming: true }]);
 
+    // the reply arrives as numbered SSE deltas; after a dropped connection we
+    // resume from the last delta seen instead of re-POSTing (and re-billing)
+    let messageId = null;
+    let lastEventId = 0;
+    let assistantReply = "";
+    let finished = false;
+    let failure = null;
+
+    const setBotText = (replyText) =>
+      setMessages((prev) => {
+        const last = prev[prev.length - 1];
+        if (last.from === "bot" && last.streaming) {
+          last.text = replyText;
+        }
+        return [...prev.slice(0, -1), last];
+      });
+
+    const onEvent = ({ event, id, data }) => {
+      const payload = JSON.parse(data);
+      if (event === "meta") {
+        messageId = payload.message_id;
+      } else if (event === "delta") {
+        lastEventId = Number(id);
+        assistantReply += payload.text;
+        setBotText(assistantReply);
+      } else if (event === "done") {
+        // authoritative full text (also all we get when replayed from storage)
+        assistantReply = payload.text;
+        setBotText(assistantReply);
+        finished = true;
+      } else if (event === "error") {
+        failure = payload.detail || "reply failed";
+      }
+    };
+
     try {
-      const res = await fetch(`/chat`, {
+      let res = await fetch(`/chat`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
+          Accept: "text/event-stream",
           Authorization: `Bearer ${token}`,
         },
         body: JSON.stringify({
@@ -201,27 +347,44 @@ export function ConversationProvider({ children }) {
         }),
       });
       if (!res.ok) throw new Error(res.statusText);
+      messageId = res.headers.get("X-Message-Id");
 
-      const reader = res.body.getReader();
-      const dec = new TextDecoder();
-      let assistantReply = "";
-      let done = false;
-
-      while (!done) {
-        const { value, done: dr } = await reader.read();
-        done = dr;
-        if (value) {
-          const chunk = dec.decode(value);
-          assistantReply += chunk;
-          setMessages((prev) => {
-            const last = prev[prev.length - 1];
-            if (last.from === "bot" && last.streaming) {
-              last.text += chunk;
+      let attempt = 0;
+      const pendingUntil = Date.now() + MAX_PENDING_MS;
+      for (;;) {
+        let delay = 1000 * (attempt + 1);
+        let pending = false;
+        try {
+          if (!res) {
+            res = await fetch(`/chat/replies/${messageId}`, {
+              headers: {
+                Accept: "text/event-stream",
+                "Last-Event-ID": String(lastEventId),
+                Authorization: `Bearer ${token}`,
+              },
+            });
+            if (res.status === 409 && Date.now() < pendingUntil) {
+              // still being generated on another server: wait, it's not a failure
+              delay = 1000 * Number(res.headers.get("Retry-After") || 1);
+              pending = true;
+              res = null;
+            } else if (!res.ok) {
+              throw new Error(res.statusText);
             }
-            return [...prev.slice(0, -1), last];
-          });
+          }
+          if (res) await readEvents(res, onEvent);
+        } catch (err) {
+          if (!messageId || attempt >= MAX_STREAM_RESUMES) throw err;
+        }
+        if (finished || failure) break;
+        if (!messageId || attempt >= MAX_STREAM_RESUMES) {
+          throw new Error("reply stream ended early");
         }
+        res = null;
+        if (!pending) attempt++;
+        await new Promise((r) => setTimeout(r, delay));
       }
+      if (failure) throw new Error(failure);
 
       // finish streaming
       setMessages((prev) => {
@@ -278,6 +441,10 @@ export function ConversationProvider({ children }) {
         scenarioEnabled,
         scenarioPrompt,
         isCreating,
+        hasMoreConversations: Boolean(nextCursor),
+        isLoadingMore,
+        hasOlderMessages: Boolean(olderCursor),
+        isLoadingOlder,
         // setters
         setNativeLanguage,
         setTargetLanguage,
@@ -288,6 +455,8 @@ export function ConversationProvider({ children }) {
         startConversation,
         deleteConversation,
         sendMessage,
+        loadMoreConversations,
+        loadOlderMessages,
         // raw setter for voice flows
         setConversationsRaw,
       }}
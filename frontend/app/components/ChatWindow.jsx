@@ -7,7 +7,19 @@ import { useConversations } from "../ConversationContext";
 
 export default function ChatWindow({ messages }) {
   const bottomRef = useRef(null);
-  const { nativeLanguage, targetLanguage } = useConversations();
+  const firstRef  = useRef(null);
+  const {
+    nativeLanguage,
+    targetLanguage,
+    hasOlderMessages,
+    isLoadingOlder,
+    loadOlderMessages,
+  } = useConversations();
+
+  // translation state is keyed per message: stored ones by id, ones added in
+  // this session by position after them (older pages are only ever prepended)
+  const loaded = messages.filter((m) => m.id).length;
+  const keyOf = (m, i) => m.id ?? `local-${i - loaded}`;
 
   // cache for full‑message translations:
   const [fullTranslations, setFullTranslations] = useState({});
@@ -21,10 +33,14 @@ export default function ChatWindow({ messages }) {
   const hoverTimersRef = useRef({});
 
   useEffect(() => {
-    bottomRef.current?.scrollIntoView({ behavior: "smooth" });
+    // stay put when an older page was prepended; follow the conversation otherwise
+    const prepended =
+      firstRef.current && messages[0] !== firstRef.current && messages.includes(firstRef.current);
+    firstRef.current = messages[0];
+    if (!prepended) bottomRef.current?.scrollIntoView({ behavior: "smooth" });
   }, [messages, showTranslated]);
 
-  // fetch full translation of message idx
+  // fetch full translation of the message keyed idx
   const fetchFull = async (idx, text) => {
     if (fullTranslations[idx]) return;
     try {
@@ -62,10 +78,20 @@ export default function ChatWindow({ messages }) {
 
   return (
     <div className="h-full overflow-y-auto bg-gray-800 p-4 space-y-3 rounded text-white flex flex-col">
+      {hasOlderMessages && (
+        <button
+          onClick={loadOlderMessages}
+          disabled={isLoadingOlder}
+          className="self-center text-xs text-gray-400 hover:text-gray-200"
+        >
+          {isLoadingOlder ? "Loading…" : "Load earlier messages"}
+        </button>
+      )}
       {messages.map((m, i) => {
+        const k = keyOf(m, i);
         if (m.streaming) {
           return (
-            <div key={i} className="flex justify-start">
+            <div key={k} className="flex justify-start">
               <div className="inline-block bg-gray-700 text-white px-4 py-2 rounded animate-pulse">
                 Typing...
               </div>
@@ -78,12 +104,12 @@ export default function ChatWindow({ messages }) {
           ? "bg-blue-600 text-white"
           : "bg-gray-700 text-white";
 
-        const displayText = (!isUser && showTranslated[i] && fullTranslations[i])
-          ? fullTranslations[i]
+        const displayText = (!isUser && showTranslated[k] && fullTranslations[k])
+          ? fullTranslations[k]
           : m.text;
 
         return (
-          <div key={i} className={`flex ${isUser ? "justify-end" : "justify-start"}`}>
+          <div key={k} className={`flex ${isUser ? "justify-end" : "justify-start"}`}>
             <div className={`max-w-[75%] whitespace-pre-wrap break-words px-4 py-2 rounded ${bubbleClasses}`}>
               { !isUser
                 ? displayText.split(" ").map((word, wi) => {
@@ -116,14 +142,14 @@ export default function ChatWindow({ messages }) {
             { !isUser && (
               <button
                 onClick={async () => {
-                  if (!fullTranslations[i]) {
-                    await fetchFull(i, m.text);
+                  if (!fullTranslations[k]) {
+                    await fetchFull(k, m.text);
                   }
-                  setShowTranslated(st => ({ ...st, [i]: !st[i] }));
+                  setShowTranslated(st => ({ ...st, [k]: !st[k] }));
                 }}
                 className="ml-2 self-end text-xs text-gray-400 hover:text-gray-200"
               >
-                {showTranslated[i] ? "Original" : "Translate"}
+                {showTranslated[k] ? "Original" : "Translate"}
               </button>
             )}
           </div>
@@ -2,9 +2,27 @@
 import React from "react";
 import ConversationItem from "./ConversationItem";
 
-export default function ConversationList({ conversations, activeId, onSelect, onDelete }) {
+// start fetching the next page this close (px) to the bottom of the list
+const LOAD_MORE_THRESHOLD = 200;
+
+export default function ConversationList({
+  conversations,
+  activeId,
+  onSelect,
+  onDelete,
+  hasMore,
+  isLoadingMore,
+  onLoadMore,
+}) {
+  const handleScroll = (e) => {
+    const el = e.currentTarget;
+    if (hasMore && el.scrollHeight - el.scrollTop - el.clientHeight < LOAD_MORE_THRESHOLD) {
+      onLoadMore();
+    }
+  };
+
   return (
-    <ul className="flex-1 overflow-y-auto">
+    <ul className="flex-1 overflow-y-auto" onScroll={handleScroll}>
       {conversations.map((conv) => (
         <ConversationItem
           key={conv.id}
@@ -14,9 +32,20 @@ export default function ConversationList({ conversations, activeId, onSelect, on
           onDelete={() => onDelete(conv.id)}
         />
       ))}
-      {conversations.length === 0 && (
+      {conversations.length === 0 && !hasMore && (
         <li className="p-4 text-gray-400">No conversations yet.</li>
       )}
+      {hasMore && (
+        <li className="p-2">
+          <button
+            onClick={onLoadMore}
+            disabled={isLoadingMore}
+            className="w-full text-sm text-gray-400 hover:text-white py-2 cursor-pointer"
+          >
+            {isLoadingMore ? "Loading…" : "Load more"}
+          </button>
+        </li>
+      )}
     </ul>
   );
 }
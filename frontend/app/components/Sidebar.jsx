@@ -29,6 +29,9 @@ export default function Sidebar() {
     selectConversation,
     deleteConversation,
     isCreating,
+    hasMoreConversations,
+    isLoadingMore,
+    loadMoreConversations,
   } = useConversations();
 
   const { setBuffer } = useChatInputBridge(); // to push vocab → chat input
@@ -93,6 +96,9 @@ export default function Sidebar() {
         activeId={activeId}
         onSelect={selectConversation}
         onDelete={deleteConversation}
+        hasMore={hasMoreConversations}
+        isLoadingMore={isLoadingMore}
+        onLoadMore={loadMoreConversations}
       />
     </div>
   );
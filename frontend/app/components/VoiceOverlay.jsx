@@ -3,7 +3,6 @@
 
 import { useEffect, useRef, useState, useCallback, useContext } from "react";
 import { AuthContext } from "../auth/AuthContext";
-import axios from "axios";
 
 export default function VoiceOverlay({
   open,
@@ -49,67 +48,96 @@ export default function VoiceOverlay({
         return;
       }
 
-      // 3) Voice turn -> backend
-      let assistantText = "";
+      const resumeListening = () => {
+        isProcessingRef.current = false;
+        if (open) {
+          try { rec.start(); setListening(true); } catch {}
+        }
+      };
+
+      // 3) Streamed voice turn: reply sentences arrive with their audio, in order
+      const audioQueue = [];
+      let playing = false;
+      let streamDone = false;
+
+      const playNext = () => {
+        if (playing) return;
+        const bytes = audioQueue.shift();
+        if (!bytes) {
+          if (streamDone) resumeListening();
+          return;
+        }
+        playing = true;
+        const url = URL.createObjectURL(new Blob([bytes], { type: "audio/mpeg" }));
+        const audio = new Audio(url);
+        const finish = () => {
+          URL.revokeObjectURL(url);
+          playing = false;
+          playNext();
+        };
+        audio.onended = finish;
+        audio.play().catch((err) => {
+          console.error("tts playback error", err);
+          finish();
+        });
+      };
+
       try {
-        const { data: vt } = await axios.post(
-          "/voice-turn",
-          {
+        const res = await fetch("/api/voice-turn/stream", {
+          method: "POST",
+          headers: {
+            "Content-Type": "application/json",
+            Authorization: `Bearer ${token}`,
+          },
+          body: JSON.stringify({
             text,
             native_language: nativeLanguage,
             target_language: targetLanguage,
             conversation_id: id,
             prompt: scenarioPrompt,
-          },
-          { headers: { Authorization: `Bearer ${token}` } }
-        );
-        assistantText = vt.assistant_text || vt.text || "";
-      } catch (err) {
-        console.error("voice-turn error", err);
-        if (open) {
-          try { rec.start(); setListening(true); } catch {}
-        }
-        isProcessingRef.current = false;
-        return;
-      }
+          }),
+        });
+        if (!res.ok) throw new Error(res.statusText);
+
+        const reader = res.body.getReader();
+        const dec = new TextDecoder();
+        let pending = "";
+        let assistantText = "";
+
+        const handleEvent = (evt) => {
+          if (evt.type === "audio") {
+            audioQueue.push(Uint8Array.from(atob(evt.audio), (c) => c.charCodeAt(0)));
+            playNext();
+          } else if (evt.type === "done") {
+            assistantText = evt.assistant_text;
+          } else if (evt.type === "error") {
+            throw new Error(evt.detail);
+          }
+        };
 
-      // record assistant turn
-      setTranscriptHistory((h) => [...h, { speaker: "Patty", text: assistantText }]);
+        while (true) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          pending += dec.decode(value, { stream: true });
+          const lines = pending.split("\n");
+          pending = lines.pop();
+          lines.filter(Boolean).forEach((line) => handleEvent(JSON.parse(line)));
+        }
 
-      // Update main UI
-      try {
-        onNewAssistantTurn(assistantText, id);
-      } catch (err) {
-        console.error("onNewAssistantTurn error", err);
-      }
+        // record assistant turn
+        setTranscriptHistory((h) => [...h, { speaker: "Patty", text: assistantText }]);
 
-      // 4) TTS playback
-      try {
-        const { data: ttsBytes } = await axios.post(
-          "/tts",
-          { text: assistantText },
-          {
-            headers: { Authorization: `Bearer ${token}` },
-            responseType: "arraybuffer",
-          }
-        );
-        const blob = new Blob([ttsBytes], { type: "audio/mpeg" });
-        const url = URL.createObjectURL(blob);
-        const audio = new Audio(url);
-        audio.onended = () => {
-          URL.revokeObjectURL(url);
-          isProcessingRef.current = false;
-          if (open) {
-            try { rec.start(); setListening(true); } catch {}
-          }
-        };
-        await audio.play();
-      } catch (err) {
-        console.error("tts error", err);
-        isProcessingRef.current = false;
-        if (open) {
-          try { rec.start(); setListening(true); } catch {}
+        // Update main UI
+        try {
+          onNewAssistantTurn(assistantText, id);
+        } catch (err) {
+          console.error("onNewAssistantTurn error", err);
         }
+      } catch (err) {
+        console.error("voice-turn error", err);
+      } finally {
+        streamDone = true;
+        if (!playing && audioQueue.length === 0) resumeListening();
       }
     },
     [